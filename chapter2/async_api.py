@@ -0,0 +1,239 @@
+import asyncio
+
+import aiohttp
+from loguru import logger
+
+from utils import (
+    KoreaInvestAPIBase,
+    APIResponse,
+    BufferedResponse,
+    DEFAULT_HTTP_POOL_SIZE,
+    MAX_CONTINUATION_PAGES,
+    ORDER_REQUEST,
+    RATE_LIMIT_ERROR_CODE,
+    RATE_LIMIT_RETRY,
+    classify_tr_id,
+    get_http_timeout,
+    json_dumps_bytes,
+    json_loads,
+)
+
+
+# KoreaInvestAPI 의 asyncio 버전
+# 요청 정의(url, tr_id, params)와 응답 해석은 KoreaInvestAPIBase 를 그대로 사용하므로 동기 버전과 어긋나지 않는다.
+# 하나의 이벤트 루프에서 수백 개의 요청을 동시에 보내도 공용 RateLimiter 의 한도 안에서 전송된다.
+#
+# 사용 예)
+#     async with AsyncKoreaInvestAPI(cfg, base_headers) as api:
+#         prices = await asyncio.gather(*[api.get_current_price(code) for code in codes])
+
+
+def make_client_timeout(cfg):
+    timeout = get_http_timeout(cfg)
+    if isinstance(timeout, tuple):
+        return aiohttp.ClientTimeout(sock_connect=timeout[0], sock_read=timeout[1])
+    return aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+
+
+class AsyncKoreaInvestAPI(KoreaInvestAPIBase):
+    def __init__(self, cfg, base_headers, session=None, rate_limiter=None, response_cache=None):
+        super().__init__(cfg, base_headers, rate_limiter, response_cache)
+        self._pool_size = cfg.get('http_pool_size', DEFAULT_HTTP_POOL_SIZE)
+        self._client_timeout = make_client_timeout(cfg)
+        # aiohttp 세션은 이벤트 루프 안에서 만들어야 하므로 첫 요청 때 생성한다. (session 을 넘기면 공유)
+        self._session = session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    def _get_session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(limit=self._pool_size)
+            self._session = aiohttp.ClientSession(connector=connector, timeout=self._client_timeout)
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        if self.response_cache is not None:
+            self.response_cache.save()
+
+    async def _send(self, method, url, headers, params):
+        session = self._get_session()
+        if method == 'POST':
+            request = session.post(url, headers=headers, data=json_dumps_bytes(params))
+        else:
+            request = session.get(url, headers=headers, params=params)
+        async with request as res:
+            content = await res.read()
+            return BufferedResponse(res.status, res.headers, content)
+
+    async def set_order_hash_key(self, h, p):
+        # 주문 API에서 사용할 hash key값을 받아 header에 설정해 주는 함수
+        url = f"{self.using_url}/uapi/hashkey"
+
+        await self._rate_limiter.acquire_async(ORDER_REQUEST)
+        res = await self._send('POST', url, h, p)
+        if res.status_code == 200:
+            h['hashkey'] = res.json()['HASH']
+        else:
+            logger.info(f"Error: {res.status_code}")
+
+    async def _url_fetch(self, api_url, tr_id, params, is_post_request=False, use_hash=True, tr_cont=''):
+        try:
+            cache_key = self._response_cache_key(api_url, tr_id, params, is_post_request, tr_cont)
+            if cache_key is not None:
+                res = self.response_cache.get(cache_key[0])
+                if res is not None:
+                    return APIResponse(res)
+
+            url = f"{self.using_url}{api_url}"
+            tr_id, headers = self._make_headers(tr_id, tr_cont)
+            request_kind = classify_tr_id(tr_id)
+
+            if is_post_request and use_hash:
+                await self.set_order_hash_key(headers, params)
+
+            token_retried = False
+            for _ in range(RATE_LIMIT_RETRY + 1):
+                await self._rate_limiter.acquire_async(request_kind)
+                res = await self._send('POST' if is_post_request else 'GET', url, headers, params)
+                if res.status_code != 200 and RATE_LIMIT_ERROR_CODE in res.text:
+                    logger.info(f"Rate limited ({RATE_LIMIT_ERROR_CODE}): {tr_id}, retry")
+                    self._rate_limiter.penalize()
+                    continue
+                if not token_retried and self._is_token_rejected(res):
+                    # 재발급은 blocking 호출이므로 thread 에서 실행
+                    logger.info(f"Access token rejected: {tr_id}, reissue and retry")
+                    token_retried = True
+                    headers["authorization"] = await asyncio.to_thread(self.on_token_rejected, headers["authorization"])
+                    if is_post_request and use_hash:
+                        await self.set_order_hash_key(headers, params)
+                    continue
+                break
+
+            if res.status_code == 200:
+                ar = APIResponse(res)
+                if cache_key is not None and ar.is_ok():
+                    self.response_cache.put(cache_key[0], cache_key[1], res)
+                return ar
+            else:
+                logger.info(f"Error Code : {res.status_code} | {res.text}")
+                return None
+        except Exception as e:
+            logger.info(f"URL exception: {e!r}")
+
+    async def _url_fetch_all(self, api_url, tr_id, params, output_names=('output',), max_pages=MAX_CONTINUATION_PAGES):
+        # 연속조회 페이지를 모두 받아 output 을 이어붙인 하나의 APIResponse
+        fk_name, nk_name = self._continuation_key_names(params)
+        pages = []
+        tr_cont = ''
+        for _ in range(max_pages):
+            t1 = await self._url_fetch(api_url, tr_id, params, tr_cont=tr_cont)
+            if t1 is None:
+                break
+            pages.append(t1)
+            params = self._next_page_params(t1, params, fk_name, nk_name)
+            if params is None:
+                break
+            tr_cont = 'N'
+        return self._merge_pages(pages, output_names)
+
+    # 시세
+    async def get_current_price(self, stock_no):
+        url, tr_id, params = self._current_price_request(stock_no)
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._output_result(t1)
+
+    async def get_hoga_info(self, stock_no):
+        url, tr_id, params = self._hoga_info_request(stock_no)
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._output_result(t1, 'output1')
+
+    async def get_overseas_current_price(self, exchange_code, stock_no):
+        url, tr_id, params = self._overseas_current_price_request(exchange_code, stock_no)
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._output_result(t1)
+
+    async def get_futures_price(self, future_code):
+        url, tr_id, params = self._futures_price_request(future_code)
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._futures_price_result(t1)
+
+    # 잔고
+    async def get_acct_balance(self):
+        url, tr_id, params = self._acct_balance_request()
+        t1 = await self._url_fetch_all(url, tr_id, params, ('output1',))
+        return self._acct_balance_result(t1)
+
+    async def get_overseas_acct_balance(self):
+        url, tr_id, params = self._overseas_acct_balance_request()
+        t1 = await self._url_fetch_all(url, tr_id, params, ('output1',))
+        return self._overseas_acct_balance_result(t1)
+
+    async def get_future_option_balance(self):
+        url, tr_id, params = self._future_option_balance_request()
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._future_option_balance_result(t1)
+
+    async def get_buyable_cash(self, stock_code='', qry_price=0, prd_code='01'):
+        url, tr_id, params = self._buyable_cash_request(stock_code, qry_price, prd_code)
+        t1 = await self._url_fetch(url, tr_id, params)
+        return self._buyable_cash_result(t1)
+
+    # 주문
+    async def do_order(self, stock_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00", exchange="KRX"):
+        url, tr_id, params = self._do_order_request(stock_code, order_qty, order_price, prd_code, buy_flag, order_type, exchange)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True, use_hash=True)
+        return self._order_result(t1)
+
+    async def do_sell(self, stock_code, order_qty, order_price, order_type="00"):
+        return await self.do_order(stock_code, order_qty, order_price, buy_flag=False, order_type=order_type)
+
+    async def do_buy(self, stock_code, order_qty, order_price, order_type="00"):
+        return await self.do_order(stock_code, order_qty, order_price, buy_flag=True, order_type=order_type)
+
+    async def overseas_do_order(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00"):
+        url, tr_id, params = self._overseas_do_order_request(stock_code, exchange_code, order_qty, order_price, prd_code, buy_flag, order_type)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True, use_hash=True)
+        return self._order_result(t1)
+
+    async def overseas_do_sell(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", order_type="00"):
+        return await self.overseas_do_order(stock_code, exchange_code, order_qty, order_price, prd_code=prd_code, buy_flag=False, order_type=order_type)
+
+    async def overseas_do_buy(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", order_type="00"):
+        return await self.overseas_do_order(stock_code, exchange_code, order_qty, order_price, prd_code=prd_code, buy_flag=True, order_type=order_type)
+
+    async def do_cancel(self, order_no, order_qty, order_price="01", order_branch='06010', prd_code='01', order_dv='00', cncl_dv='02', qty_all_yn="Y"):
+        url, tr_id, params = self._do_cancel_revise_request(order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, "KRX")
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
+    async def do_revise(self, order_no, order_qty, order_price, order_branch='06010', prd_code='01', order_dv='00', cncl_dv='01', qty_all_yn="Y"):
+        url, tr_id, params = self._do_cancel_revise_request(order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, "KRX")
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
+    async def overseas_do_cancel(self, order_no, stock_code, order_qty, order_price="0", order_branch='06010', prd_code='01', cncl_dv='02'):
+        url, tr_id, params = self._overseas_do_cancel_revise_request(order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
+    async def overseas_do_revise(self, order_no, stock_code, order_qty, order_price="0", order_branch='06010', prd_code='01', cncl_dv='01'):
+        url, tr_id, params = self._overseas_do_cancel_revise_request(order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
+    async def future_options_do_order(self, product_code, order_qty, order_price=0, is_buy_order=True, prd_code="03", order_type="04"):
+        url, tr_id, params = self._future_options_do_order_request(product_code, order_qty, order_price, is_buy_order, prd_code, order_type)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
+    async def future_options_do_amend_cancel_order(self, order_qty, order_price=0, order_num='', is_cancel_order=True, prd_code="03", order_type="04"):
+        url, tr_id, params = self._future_options_do_amend_cancel_order_request(order_qty, order_price, order_num, is_cancel_order, prd_code, order_type)
+        t1 = await self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
+
@@ -0,0 +1,285 @@
+import asyncio
+import datetime
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from utils import DEFAULT_BULK_WORKERS
+
+
+# 실시간 체결(H0UNCNT0)로 여러 종목의 1/3/5/15/60분봉, 일봉을 직접 만든다. (get_minute_chart_data 반복 호출 대신)
+# - 봉 시각(key)은 YYYYMMDDHHMM 정수 (일봉은 YYYYMMDD0000), 봉 시작 시각 기준
+# - 완성된 봉은 종목/주기별 열 단위 배열에 쌓고, 봉이 완성될 때마다 listener 를 호출한다
+# - 재접속 등으로 끊긴 구간만 REST 분봉 조회로 채운다
+#
+# 사용 예)
+#     bars = BarAggregator(korea_invest_api)
+#     bars.add_listener(lambda bar: print(bar))
+#     realtime.add_callback('H0UNCNT0', bars.on_message)
+#     realtime.add_connect_callback(bars.on_connect)
+#     ...
+#     df = bars.get_series('005930', 5).to_frame()
+
+DAILY = 'D'
+BAR_INTERVALS = (1, 3, 5, 15, 60, DAILY)  # 분 단위 주기와 일봉
+DEFAULT_BAR_CAPACITY = 512  # 처음 잡아두는 봉 개수 (모자라면 2배씩 늘림)
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'volume')
+MINUTE_CHART_PAGE_SIZE = 30  # 분봉 조회 1회에 오는 봉 개수
+
+# 완성된 봉 하나
+Bar = namedtuple('Bar', ['code', 'interval', 'key', 'open', 'high', 'low', 'close', 'volume'])
+
+
+def bar_key(date, hhmm, interval):
+    # date: YYYYMMDD 정수, hhmm: HHMM 정수 -> interval 봉의 시작 시각 key
+    if interval == DAILY:
+        return date * 10000
+    minutes = (hhmm // 100) * 60 + hhmm % 100
+    minutes -= minutes % interval
+    return date * 10000 + (minutes // 60) * 100 + minutes % 60
+
+
+def key_to_datetime(key):
+    return datetime.datetime.strptime(str(key), "%Y%m%d%H%M")
+
+
+class BarSeries:
+    # 종목 하나, 주기 하나의 봉. 완성된 봉은 배열에, 진행 중인 봉은 list 로 보관
+    def __init__(self, code, interval, capacity=DEFAULT_BAR_CAPACITY):
+        self.code = code
+        self.interval = interval
+        self._keys = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, len(BAR_COLUMNS)))
+        self._size = 0
+        self._current = None  # [key, open, high, low, close, volume]
+
+    def __len__(self):
+        return self._size
+
+    def keys(self):
+        # 완성된 봉 key (view)
+        return self._keys[:self._size]
+
+    def values(self):
+        # 완성된 봉 (봉 개수, open/high/low/close/volume) (view)
+        return self._values[:self._size]
+
+    def column(self, name):
+        return self._values[:self._size, BAR_COLUMNS.index(name)]
+
+    def last_key(self):
+        # 진행 중인 봉 또는 마지막으로 완성된 봉의 key
+        if self._current is not None:
+            return self._current[0]
+        return int(self._keys[self._size - 1]) if self._size else None
+
+    def current(self):
+        # 진행 중인 봉
+        if self._current is None:
+            return None
+        return Bar(self.code, self.interval, *self._current)
+
+    def update(self, key, open_, high, low, close, volume):
+        # 체결 또는 분봉 하나 반영. 이전 봉이 완성되면 그 Bar 를 반환
+        current = self._current
+        if current is not None:
+            if key == current[0]:
+                if high > current[2]:
+                    current[2] = high
+                if low < current[3]:
+                    current[3] = low
+                current[4] = close
+                current[5] += volume
+                return None
+            if key < current[0]:
+                return None  # 이미 지난 봉의 데이터는 무시
+        closed = self.close_current()
+        self._current = [key, open_, high, low, close, volume]
+        return closed
+
+    def close_current(self):
+        # 진행 중인 봉을 완성 처리
+        current = self._current
+        if current is None:
+            return None
+        if self._size == len(self._keys):
+            self._grow()
+        self._keys[self._size] = current[0]
+        self._values[self._size] = current[1:]
+        self._size += 1
+        self._current = None
+        return Bar(self.code, self.interval, *current)
+
+    def _grow(self):
+        capacity = len(self._keys) * 2
+        keys = np.zeros(capacity, dtype=np.int64)
+        values = np.zeros((capacity, len(BAR_COLUMNS)))
+        keys[:self._size] = self._keys[:self._size]
+        values[:self._size] = self._values[:self._size]
+        self._keys, self._values = keys, values
+
+    def to_frame(self, include_current=True):
+        keys = list(self.keys())
+        values = list(self.values())
+        if include_current and self._current is not None:
+            keys.append(self._current[0])
+            values.append(self._current[1:])
+        df = pd.DataFrame(values, columns=list(BAR_COLUMNS), index=pd.to_datetime([str(k) for k in keys], format="%Y%m%d%H%M"))
+        df.index.name = 'time'
+        return df
+
+
+class BarAggregator:
+    def __init__(self, korea_invest_api=None, intervals=BAR_INTERVALS, capacity=DEFAULT_BAR_CAPACITY):
+        self.api = korea_invest_api  # 끊긴 구간 보충용 (없으면 보충하지 않음)
+        self.intervals = tuple(intervals)
+        self.capacity = capacity
+        self._series = dict()  # code -> [BarSeries (intervals 순서)]
+        self._last_tick = dict()  # code -> (date, hhmmss) 마지막 체결 시각
+        self._listeners = []
+        self._pending = None  # 보충하는 동안 받은 체결
+
+    def add_listener(self, callback):
+        # callback(Bar): 봉이 완성될 때 호출
+        self._listeners.append(callback)
+
+    def codes(self):
+        return list(self._series)
+
+    def get_series(self, code, interval):
+        return self._get_series_list(code)[self.intervals.index(interval)]
+
+    def _get_series_list(self, code):
+        series_list = self._series.get(code)
+        if series_list is None:
+            series_list = [BarSeries(code, interval, self.capacity) for interval in self.intervals]
+            self._series[code] = series_list
+        return series_list
+
+    def _emit(self, bar):
+        for callback in self._listeners:
+            try:
+                callback(bar)
+            except Exception as e:
+                logger.exception(f"bar listener exception: {e!r}")
+
+    def _update(self, code, date, hhmm, open_, high, low, close, volume):
+        for series in self._get_series_list(code):
+            closed = series.update(bar_key(date, hhmm, series.interval), open_, high, low, close, volume)
+            if closed is not None:
+                self._emit(closed)
+
+    def add_tick(self, code, date, hhmmss, price, volume):
+        # 체결 하나 반영 (date: YYYYMMDD 정수, hhmmss: HHMMSS 정수)
+        if self._pending is not None:
+            self._pending.append((code, date, hhmmss, price, volume))
+            return
+        self._last_tick[code] = (date, hhmmss)
+        self._update(code, date, hhmmss // 100, price, price, price, price, volume)
+
+    def add_minute_bar(self, code, date, hhmm, open_, high, low, close, volume):
+        # 1분봉 하나 반영 (REST 로 받은 분봉 보충용)
+        self._update(code, date, hhmm, open_, high, low, close, volume)
+
+    def close_bars(self, date, hhmmss):
+        # 체결이 없어도 시간이 지난 봉을 완성 처리 (타이머에서 주기적으로 호출)
+        now_minute = bar_key(date, hhmmss // 100, 1)
+        for series_list in self._series.values():
+            for series in series_list:
+                current = series._current
+                if current is None:
+                    continue
+                if series.interval == DAILY:
+                    expired = current[0] < date * 10000
+                else:
+                    end = key_to_datetime(current[0]) + datetime.timedelta(minutes=series.interval)
+                    expired = now_minute >= int(end.strftime("%Y%m%d%H%M"))
+                if expired:
+                    self._emit(series.close_current())
+
+    def on_message(self, message):
+        # KoreaInvestRealtime 의 callback 으로 사용 (H0UNCNT0: 종목코드 0, 체결시간 1, 현재가 2, 체결량 12, 영업일자 33)
+        fields = message.data.split('^')
+        n = len(fields) // message.count
+        for base in range(0, n * message.count, n):
+            self.add_tick(
+                fields[base], int(fields[base + 33]), int(fields[base + 1]),
+                float(fields[base + 2]), float(fields[base + 12]),
+            )
+
+    def _fetch_minute_bars(self, code, since, until):
+        # since(YYYYMMDDHHMM) 이후 ~ until(HHMMSS) 이전 1분봉을 시간 순서로 반환
+        bars = []
+        hour = until
+        while True:
+            url, tr_id, params = self.api._minute_chart_request(code, hour)
+            t1 = self.api._url_fetch(url, tr_id, params)
+            if t1 is None or not t1.is_ok():
+                break
+            rows = t1.get_body().output2 or []
+            reached = False
+            for row in rows:  # 최근 봉부터 온다
+                key = int(row['stck_bsop_date'] + row['stck_cntg_hour'][:4])
+                if key <= since:
+                    reached = True
+                    break
+                bars.append((key, row))
+            if reached or len(rows) < MINUTE_CHART_PAGE_SIZE:
+                break
+            earliest = key_to_datetime(int(rows[-1]['stck_bsop_date'] + rows[-1]['stck_cntg_hour'][:4]))
+            hour = (earliest - datetime.timedelta(minutes=1)).strftime("%H%M%S")
+        return bars[::-1]
+
+    def fetch_gaps(self, codes=None, now=None):
+        # 종목별 마지막 체결 이후 ~ 현재 분 이전 구간의 분봉 조회 {code: [(key, row)]}
+        now = now or datetime.datetime.now()
+        until = now.strftime("%H%M%S")
+        now_minute = int(now.strftime("%Y%m%d%H%M"))
+        since_by_code = dict()
+        for code in (codes or list(self._last_tick)):
+            last = self._last_tick.get(code)
+            if last is not None:
+                since_by_code[code] = bar_key(last[0], last[1] // 100, 1)
+
+        def fetch(code):
+            bars = self._fetch_minute_bars(code, since_by_code[code], until)
+            return code, [(key, row) for key, row in bars if key < now_minute]  # 현재 분은 실시간 체결로 만든다
+
+        with ThreadPoolExecutor(max_workers=DEFAULT_BULK_WORKERS) as executor:
+            return dict(executor.map(fetch, list(since_by_code)))
+
+    def apply_gaps(self, gaps):
+        # fetch_gaps 결과 반영. 반영한 분봉 수 반환
+        count = 0
+        for code, bars in gaps.items():
+            for key, row in bars:
+                self.add_minute_bar(
+                    code, key // 10000, key % 10000, float(row['stck_oprc']), float(row['stck_hgpr']),
+                    float(row['stck_lwpr']), float(row['stck_prpr']), float(row['cntg_vol']),
+                )
+                count += 1
+        return count
+
+    def backfill(self, codes=None, now=None):
+        # 끊긴 구간을 REST 분봉으로 채운다. 반영한 분봉 수 반환
+        if self.api is None:
+            return 0
+        return self.apply_gaps(self.fetch_gaps(codes, now))
+
+    async def on_connect(self, reconnected):
+        # KoreaInvestRealtime 의 connect callback 으로 사용. 재접속이면 끊긴 구간을 보충한다.
+        # 조회는 thread 에서 하고, 그동안 들어온 체결은 모아 두었다가 분봉을 반영한 뒤 순서대로 반영한다.
+        # (connect callback 은 task 로 실행되므로 조회하는 동안에도 수신은 계속된다)
+        if not reconnected or self.api is None or not self._last_tick:
+            return
+        self._pending = []
+        try:
+            gaps = await asyncio.to_thread(self.fetch_gaps)
+            logger.info(f"분봉 보충: {self.apply_gaps(gaps)}개")
+        finally:
+            pending, self._pending = self._pending, None
+            for tick in pending:
+                self.add_tick(*tick)
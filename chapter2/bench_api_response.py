@@ -0,0 +1,75 @@
+import json
+import time
+from collections import namedtuple
+
+import requests
+
+from utils import APIResponse
+
+
+# APIResponse 생성 속도 측정 (응답/초)
+# LegacyAPIResponse 는 이전 구현 (응답마다 namedtuple 클래스 생성, json 2회 파싱, 헤더 즉시 파싱)
+# 실행: chapter2 폴더에서 python bench_api_response.py
+
+
+class LegacyAPIResponse:
+    def __init__(self, resp):
+        self._rescode = resp.status_code
+        self._resp = resp
+        self._header = self._set_header()
+        self._body = self._set_body()
+        self._err_code = self._body.rt_cd
+        self._err_message = self._body.msg1
+
+    def _set_header(self):
+        fld = dict()
+        for x in self._resp.headers.keys():
+            if x.islower():
+                fld[x] = self._resp.headers.get(x)
+        _th_ = namedtuple('header', fld.keys())
+        return _th_(**fld)
+
+    def _set_body(self):
+        _tb_ = namedtuple('body', self._resp.json().keys())
+        return _tb_(**self._resp.json())
+
+    def get_body(self):
+        return self._body
+
+
+def make_response():
+    # 현재가 조회 응답과 비슷한 크기의 응답
+    output = {f'field_{i}': str(i * 100) for i in range(70)}
+    body = {'rt_cd': '0', 'msg_cd': 'MCA00000', 'msg1': '정상처리 되었습니다.', 'output': output}
+    resp = requests.models.Response()
+    resp.status_code = 200
+    resp._content = json.dumps(body).encode('utf-8')
+    resp.encoding = 'utf-8'
+    resp.headers.update({
+        'Content-Type': 'application/json;charset=UTF-8',
+        'tr_id': 'FHKST01010100',
+        'tr_cont': '',
+        'gt_uid': 'x' * 32,
+        'Date': 'Mon, 01 Jan 2024 00:00:00 GMT',
+    })
+    return resp
+
+
+def bench(cls, resp, n):
+    start = time.perf_counter()
+    for _ in range(n):
+        cls(resp).get_body().output
+    return n / (time.perf_counter() - start)
+
+
+def main(n=20000):
+    resp = make_response()
+    legacy = bench(LegacyAPIResponse, resp, n)
+    current = bench(APIResponse, resp, n)
+    print(f"LegacyAPIResponse: {legacy:,.0f} responses/s")
+    print(f"APIResponse: {current:,.0f} responses/s")
+    print(f"speedup: x{current / legacy:.1f}")
+
+
+if __name__ == "__main__":
+    main()
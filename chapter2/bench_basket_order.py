@@ -0,0 +1,71 @@
+import os
+import time
+
+import pandas as pd
+
+from mock_kis_server import start_mock_server, make_mock_config, make_mock_headers
+from utils import KoreaInvestAPI, RateLimiter, get_frame_schema
+
+
+# 미체결 100건 일괄 취소 시간 측정 (mock 서버, 응답마다 서버 지연 latency 추가)
+# legacy 는 이전 do_cancel_all (iterrows 로 한 건씩 do_cancel), do_cancels 는 worker pool 로 동시에 전송
+# 실제 초당 주문 한도(실전 18건)에서는 hashkey 요청도 한도를 쓰므로 hashkey 생략(기본값)이 두 배 빠르다
+# 실행: chapter2 폴더에서 python bench_basket_order.py
+
+
+def make_orders(n):
+    # get_orders() 와 같은 형식의 미체결 주문 DataFrame
+    return get_frame_schema('TTTC8036R').build([
+        {
+            'odno': f'{i:010d}', 'pdno': f'{i % 50:06d}', 'ord_qty': '10', 'ord_unpr': '70000',
+            'ord_tmd': '090000', 'ord_gno_brno': '06010', 'orgn_odno': '', 'psbl_qty': '10',
+        }
+        for i in range(n)
+    ])
+
+
+def legacy_cancel_all(api, orders):
+    for order_num, row in orders.iterrows():
+        api.do_cancel(order_num, row["주문수량"], row["주문가격"], row["주문점"])
+
+
+def measure(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main(n=100, latency=0.02):
+    server, base_url, cert_file = start_mock_server(latency=latency)
+    os.environ['REQUESTS_CA_BUNDLE'] = cert_file
+    orders = make_orders(n)
+
+    for name, limiter in (('초당 한도 없음', RateLimiter(1e6)), ('실전 초당 18건', RateLimiter(18))):
+        api = KoreaInvestAPI(make_mock_config(base_url), base_headers=make_mock_headers(), rate_limiter=limiter)
+        api.do_cancels(orders.iloc[:8])  # warm-up (연결 생성)
+        time.sleep(1)  # 토큰 bucket 초기화
+        legacy_time = measure(lambda: legacy_cancel_all(api, orders))
+        time.sleep(1)
+        basket_time = measure(lambda: api.do_cancels(orders, use_hash=True))
+        time.sleep(1)
+        df = None
+
+        def run_basket():
+            nonlocal df
+            df = api.do_cancels(orders)
+        no_hash_time = measure(run_basket)
+        assert df['error'].isna().all() and len(df) == n
+
+        print(f"[{name}] 미체결 {n}건 취소, 서버 지연 {latency * 1000:.0f} ms")
+        print(f"  legacy (한 건씩):          {legacy_time:.3f}s")
+        print(f"  do_cancels (hashkey 사용): {basket_time:.3f}s  (x{legacy_time / basket_time:.1f})")
+        print(f"  do_cancels (hashkey 생략): {no_hash_time:.3f}s  (x{legacy_time / no_hash_time:.1f})")
+        print(f"  결과 p50 {df['elapsed_ms'].median():.1f} ms, max {df['elapsed_ms'].max():.1f} ms")
+        api.close()
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    pd.set_option('display.width', 200)
+    main()
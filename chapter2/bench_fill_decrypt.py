@@ -0,0 +1,68 @@
+import time
+from base64 import b64encode
+
+from Crypto.Cipher import AES
+from Crypto.Util.Padding import pad
+
+from realtime import parse_fill_records
+from utils import AESCBCDecryptor, aes_cbc_base64_dec
+
+
+# 체결통보 복호화 + 파싱 처리량 비교 (건/s)
+# aes_cbc_base64_dec (건마다 cipher 생성) / AESCBCDecryptor 한 건씩 / AESCBCDecryptor 묶음 처리
+# 실행: chapter2 폴더에서 python bench_fill_decrypt.py
+
+KEY = 'k' * 32
+IV = 'i' * 16
+
+
+def make_notice(i):
+    # 국내주식 체결통보(H0STCNI0) 평문과 같은 구성
+    fields = [
+        'mockid', '1234567801', f'{i:010d}', '', '02', '0', '00', '0', '005930', '10', '70000', '090102',
+        '0', '2', '2', '06010', '10', '홍길동', '삼성전자', '10', '', '삼성전자', '70000',
+    ]
+    cipher = AES.new(KEY.encode('utf-8'), AES.MODE_CBC, IV.encode('utf-8'))
+    return b64encode(cipher.encrypt(pad('^'.join(fields).encode('utf-8'), AES.block_size))).decode('ascii')
+
+
+def legacy(notices):
+    return [parse_fill_records('H0STCNI0', aes_cbc_base64_dec(KEY, IV, c)) for c in notices]
+
+
+def cached(notices, decryptor):
+    return [parse_fill_records('H0STCNI0', decryptor.decrypt(c)) for c in notices]
+
+
+def batched(notices, decryptor):
+    return [parse_fill_records('H0STCNI0', p) for p in decryptor.decrypt_many(notices)]
+
+
+def bench(func, *args):
+    start = time.perf_counter()
+    for _ in range(10):
+        func(*args)
+    return len(args[0]) * 10 / (time.perf_counter() - start)
+
+
+def main(n=10000):
+    notices = [make_notice(i) for i in range(n)]
+    decryptor = AESCBCDecryptor(KEY, IV)
+    assert legacy(notices[:100]) == cached(notices[:100], decryptor) == batched(notices[:100], decryptor)
+
+    base = bench(legacy, notices)
+    single = bench(cached, notices, decryptor)
+    print(f"aes_cbc_base64_dec: {base:10,.0f} notices/s")
+    print(f"AESCBCDecryptor: {single:10,.0f} notices/s  (x{single / base:.1f})")
+    for size in (10, 100):
+        chunks = [notices[i:i + size] for i in range(0, n, size)]
+        start = time.perf_counter()
+        for _ in range(10):
+            for chunk in chunks:
+                batched(chunk, decryptor)
+        rate = n * 10 / (time.perf_counter() - start)
+        print(f"AESCBCDecryptor.decrypt_many({size}): {rate:10,.0f} notices/s  (x{rate / base:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+import random
+import time
+
+import pandas as pd
+
+from utils import get_frame_schema
+
+
+# 응답 목록 -> DataFrame 변환 속도 측정 (잔고 TTTC8434R, 체결 TTTC8001R)
+# legacy 는 이전 구현 (전체 응답을 DataFrame 으로 만든 뒤 열 선택, apply(pd.to_numeric), rename)
+# 실행: chapter2 폴더에서 python bench_frame_schema.py
+
+BALANCE_EXTRA_FIELDS = 17  # 실제 잔고 output1 은 26개 필드
+COMPLETE_EXTRA_FIELDS = 35  # 실제 일별 체결 output1 은 46개 필드
+
+
+def make_balance_rows(n):
+    rows = []
+    for i in range(n):
+        row = {
+            'pdno': f'{i:06d}', 'prdt_name': f'종목{i}', 'hldg_qty': str(random.randint(0, 1000)),
+            'ord_psbl_qty': str(random.randint(0, 1000)), 'pchs_avg_pric': f'{random.uniform(1000, 90000):.4f}',
+            'evlu_pfls_rt': f'{random.uniform(-30, 30):.2f}', 'prpr': str(random.randint(1000, 90000)),
+            'bfdy_cprs_icdc': str(random.randint(-500, 500)), 'fltt_rt': f'{random.uniform(-30, 30):.2f}',
+        }
+        row.update({f'extra_{k}': str(random.randint(0, 10 ** 9)) for k in range(BALANCE_EXTRA_FIELDS)})
+        rows.append(row)
+    return rows
+
+
+def make_complete_rows(n):
+    rows = []
+    for i in range(n):
+        row = {
+            'odno': f'{i:010d}', 'ord_dt': '20241015', 'orgn_odno': '', 'sll_buy_dvsn_cd_name': '매수',
+            'pdno': f'{i % 2000:06d}', 'ord_qty': '10', 'ord_unpr': '70000', 'avg_prvs': '70000',
+            'cncl_yn': 'N', 'tot_ccld_amt': '700000', 'rmn_qty': '0',
+        }
+        row.update({f'extra_{k}': str(random.randint(0, 10 ** 9)) for k in range(COMPLETE_EXTRA_FIELDS)})
+        rows.append(row)
+    return rows
+
+
+def legacy_balance(output1):
+    output_columns = ['종목코드', '종목명', '보유수량', '매도가능수량', '매입단가', '수익률', '현재가', '전일대비', '전일대비 등락률']
+    df = pd.DataFrame(output1)
+    target_columns = ['pdno', 'prdt_name', 'hldg_qty', 'ord_psbl_qty', 'pchs_avg_pric', 'evlu_pfls_rt', 'prpr', 'bfdy_cprs_icdc', 'fltt_rt']
+    df = df[target_columns]
+    df[target_columns[2:]] = df[target_columns[2:]].apply(pd.to_numeric)
+    df.rename(columns=dict(zip(target_columns, output_columns)), inplace=True)
+    return df
+
+
+def legacy_complete(output1):
+    tdf = pd.DataFrame(output1)
+    tdf.set_index('odno', inplace=True)
+    return tdf[
+        [
+            'ord_dt', 'orgn_odno', 'sll_buy_dvsn_cd_name', 'pdno',
+            'ord_qty', 'ord_unpr', 'avg_prvs', 'cncl_yn',
+            'tot_ccld_amt', 'rmn_qty',
+        ]
+    ]
+
+
+def bench(func, rows, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        df = func(rows)
+    return (time.perf_counter() - start) / repeat, df
+
+
+def main():
+    for name, make_rows, legacy, tr_id in (
+        ('잔고', make_balance_rows, legacy_balance, 'TTTC8434R'),
+        ('체결', make_complete_rows, legacy_complete, 'TTTC8001R'),
+    ):
+        schema = get_frame_schema(tr_id)
+        for n in (100, 10000):
+            rows = make_rows(n)
+            repeat = max(10, 20000 // n)
+            legacy_time, expected = bench(legacy, rows, repeat)
+            schema_time, result = bench(schema.build, rows, repeat)
+            pd.testing.assert_frame_equal(expected, result)
+            print(f"[{name} {n:>6} 건] legacy: {legacy_time * 1000:8.2f} ms   FrameSchema: {schema_time * 1000:8.2f} ms  (x{legacy_time / schema_time:.1f})")
+
+        # 빈 결과: 1000 회 평균 (ms)
+        start = time.perf_counter()
+        for _ in range(1000):
+            pd.DataFrame(columns=list(schema.names))
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for _ in range(1000):
+            schema.empty_frame()
+        schema_time = time.perf_counter() - start
+        print(f"[{name} 빈 결과] legacy: {legacy_time:8.3f} ms   FrameSchema: {schema_time:8.3f} ms  (x{legacy_time / schema_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+import os
+import time
+
+import requests
+
+from mock_kis_server import start_mock_server, make_mock_config, make_mock_headers
+from utils import KoreaInvestAPI, RateLimiter
+
+
+# 요청마다 새 연결을 맺는 방식(requests.get)과 커넥션 풀 세션의 호출당 지연 시간 비교
+# 실행: chapter2 폴더에서 python bench_http_session.py
+
+
+def bench(func, n):
+    func()  # warm-up
+    start = time.perf_counter()
+    for _ in range(n):
+        func()
+    return (time.perf_counter() - start) / n * 1000
+
+
+def main(n=200):
+    server, base_url, cert_file = start_mock_server()
+    os.environ['REQUESTS_CA_BUNDLE'] = cert_file  # self-signed 인증서 신뢰
+
+    headers = make_mock_headers()
+    headers['tr_id'] = 'FHKST01010100'
+    headers['custtype'] = 'P'
+    url = f'{base_url}/uapi/domestic-stock/v1/quotations/inquire-price'
+    params = {'FID_COND_MRKT_DIV_CODE': 'J', 'FID_INPUT_ISCD': '005930'}
+
+    def no_pool():
+        requests.get(url, headers=headers, params=params)
+
+    # 전송 지연만 비교하기 위해 초당 호출 제한은 사실상 끈다
+    api = KoreaInvestAPI(make_mock_config(base_url), base_headers=make_mock_headers(), rate_limiter=RateLimiter(1e6))
+
+    def pooled():
+        api.get_current_price('005930')
+
+    no_pool_ms = bench(no_pool, n)
+    pooled_ms = bench(pooled, n)
+    print(f"requests.get (연결 재사용 없음): {no_pool_ms:.3f} ms/call")
+    print(f"KoreaInvestAPI (keep-alive 세션): {pooled_ms:.3f} ms/call")
+    print(f"speedup: x{no_pool_ms / pooled_ms:.1f}")
+
+    api.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+import json
+import time
+
+from utils import JSON_BACKEND, json_dumps_bytes, json_loads, make_ws_send_data
+
+
+# 표준 json 과 utils 의 JSON 코덱 처리량 비교 (MB/s, 건/s)
+# 잔고 조회(주식 50종목), 옵션 전광판(행사가 90개 x 콜/풋) 크기의 응답과 웹소켓 등록 요청으로 측정
+# 실행: chapter2 폴더에서 python bench_json_codec.py  (orjson 설치 시 orjson 사용)
+
+
+def make_balance_body(n=50):
+    # 주식잔고조회(TTTC8434R) 응답과 같은 구조, 같은 필드 수
+    fields = [
+        'pdno', 'prdt_name', 'trad_dvsn_name', 'bfdy_buy_qty', 'bfdy_sll_qty', 'thdt_buyqty', 'thdt_sll_qty',
+        'hldg_qty', 'ord_psbl_qty', 'pchs_avg_pric', 'pchs_amt', 'prpr', 'evlu_amt', 'evlu_pfls_amt',
+        'evlu_pfls_rt', 'evlu_erng_rt', 'loan_dt', 'loan_amt', 'stln_slng_chgs', 'expd_dt', 'fltt_rt',
+        'bfdy_cprs_icdc', 'item_mgna_rt_name', 'grta_rt_name', 'sbst_pric', 'stck_loan_unpr',
+    ]
+    output1 = [{f: f'{i * 1234 + j}.{j:02d}' if j > 2 else f'{i:06d}' for j, f in enumerate(fields)} for i in range(n)]
+    for row in output1:
+        row['prdt_name'] = '삼성전자'
+    output2 = [{f'field_{j}': str(j * 1000000) for j in range(24)}]
+    return {
+        'ctx_area_fk100': ' ' * 100, 'ctx_area_nk100': ' ' * 100,
+        'output1': output1, 'output2': output2,
+        'rt_cd': '0', 'msg_cd': 'KIOK0510', 'msg1': '조회가 완료되었습니다',
+    }
+
+
+def make_option_board_body(n=90):
+    # 국내옵션전광판 콜/풋 응답과 같은 구조 (행사가별 약 40개 필드)
+    def rows(kind):
+        return [
+            {**{f'{kind}_field_{j}': f'{(i + 1) * (j + 1) * 0.01:.2f}' for j in range(38)},
+             'optn_shrn_iscd': f'{kind}01W{i:03d}', 'acpr': f'{300 + i * 2.5:.2f}'}
+            for i in range(n)
+        ]
+    return {'output1': rows('C'), 'output2': rows('P'), 'rt_cd': '0', 'msg_cd': 'MCA00000', 'msg1': '정상처리 되었습니다.'}
+
+
+def bench(func, arg, n):
+    func(arg)
+    start = time.perf_counter()
+    for _ in range(n):
+        func(arg)
+    return n / (time.perf_counter() - start)
+
+
+def report(name, body, n):
+    data = json.dumps(body).encode('utf-8')
+    size_mb = len(data) / 1e6
+    std_loads = bench(json.loads, data, n)
+    fast_loads = bench(json_loads, data, n)
+    std_dumps = bench(lambda x: json.dumps(x).encode('utf-8'), body, n)
+    fast_dumps = bench(json_dumps_bytes, body, n)
+    print(f"[{name}] {len(data):,} bytes")
+    print(f"  loads  json: {std_loads * size_mb:8.1f} MB/s   {JSON_BACKEND}: {fast_loads * size_mb:8.1f} MB/s  (x{fast_loads / std_loads:.1f})")
+    print(f"  dumps  json: {std_dumps * size_mb:8.1f} MB/s   {JSON_BACKEND}: {fast_dumps * size_mb:8.1f} MB/s  (x{fast_dumps / std_dumps:.1f})")
+
+
+def main():
+    report('잔고 조회', make_balance_body(), 2000)
+    report('옵션 전광판', make_option_board_body(), 500)
+
+    def legacy_send_data(key):
+        return '{"header":{"approval_key":"' + key + '","custtype":"P","tr_type":"1","content-type":"utf-8"},"body":{"input":{"tr_id":"H0UNCNT0","tr_key":"005930"}}}'
+
+    n = 100000
+    legacy = bench(legacy_send_data, 'x' * 36, n)
+    codec = bench(lambda key: make_ws_send_data(key, 'P', '1', 'H0UNCNT0', '005930'), 'x' * 36, n)
+    print(f"[웹소켓 등록 요청] 문자열 연결: {legacy:,.0f}/s   {JSON_BACKEND}: {codec:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
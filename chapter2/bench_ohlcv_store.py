@@ -0,0 +1,52 @@
+import datetime
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import DAILY, OHLCVStore, frame_to_records
+
+
+# 종목 2,000 개 일봉 warm-up 시간 측정
+# 종목마다 pickle 된 DataFrame 을 읽는 방식과 OHLCVStore (memmap) 로 여는 방식 비교
+# 실행: chapter2 폴더에서 python bench_ohlcv_store.py
+
+
+def make_frame(n_days, seed):
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=datetime.date.today(), periods=n_days)
+    close = 10000 * np.exp(np.cumsum(rng.normal(0, 0.02, n_days)))
+    df = pd.DataFrame({
+        'Open': close * 0.99, 'High': close * 1.01, 'Low': close * 0.98, 'Close': close,
+        'Volume': rng.integers(1000, 1000000, n_days).astype(float),
+    }, index=pd.Index(dates, name='Date'))
+    return df
+
+
+def main(n_codes=2000, n_days=2500, last=250):
+    codes = [f'{i:06d}' for i in range(n_codes)]
+    with tempfile.TemporaryDirectory() as path:
+        store = OHLCVStore(path)
+        for i, code in enumerate(codes):
+            df = make_frame(n_days, i)
+            store.append(code, DAILY, frame_to_records(df))
+            df.to_pickle(f'{path}/{code}.pkl')
+
+        start = time.perf_counter()
+        closes = [pd.read_pickle(f'{path}/{code}.pkl')['Close'].to_numpy()[-last:].mean() for code in codes]
+        pickle_time = time.perf_counter() - start
+
+        store = OHLCVStore(path)  # 열려 있는 memmap 없이 새로 시작
+        start = time.perf_counter()
+        bars = store.load(codes, DAILY)
+        memmap_closes = [records['close'][-last:].mean() for records in bars.values()]
+        memmap_time = time.perf_counter() - start
+        assert np.allclose(closes, memmap_closes)
+
+        print(f"{n_codes} 종목 x {n_days} 일봉, 최근 {last}일 종가 평균")
+        print(f"pickle DataFrame: {pickle_time:.3f}s   OHLCVStore: {memmap_time:.3f}s  (x{pickle_time / memmap_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
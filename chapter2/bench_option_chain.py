@@ -0,0 +1,87 @@
+import datetime
+import math
+import time
+
+import numpy as np
+
+from option_chain import OptionChain, black76, compute_chains, option_expiry, time_to_expiry
+from utils import OPTION_BOARD_MONTHLY, OPTION_BOARD_WEEKLY_MON, OPTION_BOARD_WEEKLY_THU
+
+
+# 옵션 체인 전체(월물 3개 + 위클리 목/월 각 2개)의 내재변동성/greeks 재계산 시간 측정
+# scalar 는 옵션 하나씩 math 로 Newton 반복하는 방식, OptionChain 은 전체 행사가를 배열로 한 번에 계산
+# 실행: chapter2 폴더에서 python bench_option_chain.py
+
+NOW = datetime.datetime(2024, 10, 17, 10, 0)
+EXPIRIES = [
+    ('202410', OPTION_BOARD_MONTHLY), ('202411', OPTION_BOARD_MONTHLY), ('202412', OPTION_BOARD_MONTHLY),
+    ('241004', OPTION_BOARD_WEEKLY_THU), ('241101', OPTION_BOARD_WEEKLY_THU),
+    ('241004', OPTION_BOARD_WEEKLY_MON), ('241101', OPTION_BOARD_WEEKLY_MON),
+]
+FORWARD = 352.3
+RATE = 0.035
+
+
+def make_board(expiry):
+    strikes = np.arange(250, 450.1, 2.5)
+    t = time_to_expiry(expiry, NOW)
+    vol = 0.15 + 0.3 * ((strikes - FORWARD) / FORWARD) ** 2
+    call, _ = black76(FORWARD, strikes, t, RATE, vol, True)
+    put, _ = black76(FORWARD, strikes, t, RATE, vol, False)
+    return strikes, np.round(call, 2), np.round(put, 2)
+
+
+def scalar_iv(price, forward, strike, t, rate, is_call):
+    df = math.exp(-rate * t)
+    intrinsic = df * max(forward - strike, 0.0) if is_call else df * max(strike - forward, 0.0)
+    if price <= intrinsic:
+        return math.nan
+    sigma = 0.2
+    for _ in range(50):
+        sqrt_t = math.sqrt(t)
+        d1 = (math.log(forward / strike) + 0.5 * sigma * sigma * t) / (sigma * sqrt_t)
+        d2 = d1 - sigma * sqrt_t
+        n1, n2 = 0.5 * (1 + math.erf(d1 / math.sqrt(2))), 0.5 * (1 + math.erf(d2 / math.sqrt(2)))
+        call = df * (forward * n1 - strike * n2)
+        model = call if is_call else call - df * (forward - strike)
+        vega = df * forward * math.exp(-0.5 * d1 * d1) / math.sqrt(2 * math.pi) * sqrt_t
+        diff = model - price
+        if abs(diff) < 1e-6 or vega < 1e-12:
+            break
+        sigma = min(max(sigma - diff / vega, 1e-4), 5.0)
+    return sigma
+
+
+def main(repeat=20):
+    boards = {key: (option_expiry(*key), *make_board(option_expiry(*key))) for key in EXPIRIES}
+    chains = {key: OptionChain(strikes, call, put, expiry, forward=FORWARD, rate=RATE, now=NOW) for key, (expiry, strikes, call, put) in boards.items()}
+    n_options = sum(len(chain) * 2 for chain in chains.values())
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for expiry, strikes, call, put in boards.values():
+            t = time_to_expiry(expiry, NOW)
+            for k, c, p in zip(strikes, call, put):
+                scalar_iv(c, FORWARD, k, t, RATE, True)
+                scalar_iv(p, FORWARD, k, t, RATE, False)
+    scalar_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for chain in chains.values():
+            chain.compute()
+    chain_time = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compute_chains(chains)
+    batch_time = (time.perf_counter() - start) / repeat
+
+    print(f"만기 {len(chains)}개, 옵션 {n_options}개 전체 재계산")
+    print(f"scalar (IV 만): {scalar_time * 1000:.2f} ms")
+    print(f"만기별 OptionChain.compute (IV + greeks): {chain_time * 1000:.2f} ms  (x{scalar_time / chain_time:.1f})")
+    print(f"compute_chains (IV + greeks, 전체 한 번에): {batch_time * 1000:.2f} ms  (x{scalar_time / batch_time:.1f})")
+
+
+if __name__ == "__main__":
+    main()
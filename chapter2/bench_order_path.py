@@ -0,0 +1,46 @@
+import os
+import statistics
+import time
+
+from mock_kis_server import start_mock_server, make_mock_config, make_mock_headers
+from utils import KoreaInvestAPI, RateLimiter
+from fast_order import FastOrderClient
+
+
+# 기존 주문 경로(do_buy: hashkey 요청 + 매번 params/헤더 생성)와 FastOrderClient 의 신호->접수응답 지연 비교
+# mock 서버에 서버 처리 지연(latency)을 넣어 실제 왕복 시간을 흉내낸다.
+# 실행: chapter2 폴더에서 python bench_order_path.py
+
+
+def measure(func, n):
+    func()  # warm-up (연결 생성)
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter_ns()
+        func()
+        samples.append((time.perf_counter_ns() - start) / 1e6)
+    return statistics.median(samples), sorted(samples)[int(n * 0.99) - 1]
+
+
+def main(n=300, latency=0.002):
+    server, base_url, cert_file = start_mock_server(latency=latency)
+    os.environ['REQUESTS_CA_BUNDLE'] = cert_file
+
+    api = KoreaInvestAPI(make_mock_config(base_url), base_headers=make_mock_headers(), rate_limiter=RateLimiter(1e6))
+    fast = FastOrderClient(api)
+    fast_hash = FastOrderClient(api, use_hash=True)
+
+    results = [
+        ("do_buy (hashkey + 기존 경로)", measure(lambda: api.do_buy("005930", 1, 70000), n)),
+        ("FastOrderClient (hashkey 사용)", measure(lambda: fast_hash.buy("005930", 1, 70000), n)),
+        ("FastOrderClient (hashkey 생략)", measure(lambda: fast.buy("005930", 1, 70000), n)),
+    ]
+    for name, (p50, p99) in results:
+        print(f"{name}: p50 {p50:.3f} ms, p99 {p99:.3f} ms")
+
+    api.close()
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import random
+import time
+
+from realtime import RealtimeMessage, split_records
+from tick_parser import TickParser
+
+
+# 실시간 데이터 처리량 비교 (messages/s)
+# 틱마다 dict 를 만드는 방식(형 변환 없음)과 TickParser (float64 변환 + NumPy ring buffer 기록) 비교
+# 실행: chapter2 폴더에서 python bench_tick_parser.py
+
+FIELD_COUNTS = {'H0UNCNT0': 46, 'H0UNASP0': 59, 'H0IFCNT0': 50, 'H0IOCNT0': 58}
+
+
+def make_record(code, n_fields):
+    fields = [code, f'09{random.randint(0, 5959):04d}']
+    fields += [f'{random.uniform(100, 90000):.2f}' for _ in range(n_fields - 2)]
+    return fields
+
+
+def make_frames(tr_id, codes, n, count):
+    # 레코드 count 건이 이어진 실시간 데이터 n 개
+    n_fields = FIELD_COUNTS[tr_id]
+    frames = []
+    for i in range(n):
+        code = codes[i % len(codes)]
+        data = '^'.join('^'.join(make_record(code, n_fields)) for _ in range(count))
+        frames.append(f'0|{tr_id}|{count:03d}|{data}')
+    return frames
+
+
+def dict_per_tick(frames, n_fields):
+    names = [f'field_{i}' for i in range(n_fields)]
+    history = dict()
+    for raw in frames:
+        _, tr_id, count, data = raw.split('|', 3)
+        for record in split_records(RealtimeMessage(tr_id, int(count), data)):
+            tick = dict(zip(names, record))
+            history.setdefault(tick['field_0'], []).append(tick)
+
+
+def bench(func, frames):
+    start = time.perf_counter()
+    func(frames)
+    return len(frames) / (time.perf_counter() - start)
+
+
+def main(n=50000):
+    codes = [f'{i:06d}' for i in range(50)]
+    for tr_id, n_fields in FIELD_COUNTS.items():
+        for count in (1, 5):
+            frames = make_frames(tr_id, codes, n, count)
+            baseline = bench(lambda x: dict_per_tick(x, n_fields), frames)
+            parser = TickParser()
+            parsed = bench(lambda x: [parser.parse(raw) for raw in x], frames)
+            print(f"[{tr_id} x{count}] dict: {baseline:10,.0f} msgs/s   TickParser: {parsed:10,.0f} msgs/s  (x{parsed / baseline:.1f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import datetime
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from ohlcv_store import DAILY, MINUTE, OHLCVStore, frame_to_records
+
+
+# OHLCVStore smoke test: append -> read -> update (REST 대신 가짜 API) 가 끝까지 저장되는지 확인
+# 실행: chapter2 폴더에서 python check_ohlcv_store.py
+
+
+def make_frame(index):
+    close = np.arange(1, len(index) + 1, dtype=float) * 100
+    return pd.DataFrame({
+        'Open': close, 'High': close + 1, 'Low': close - 1, 'Close': close, 'Volume': np.full(len(index), 10.0),
+    }, index=pd.Index(index, name='Date'))
+
+
+class FakeAPI:
+    # get_stock_history_range / get_minute_history_range 와 같은 형식 (최근 날짜가 위)
+    def __init__(self, daily, minute):
+        self.daily, self.minute = daily, minute
+        self.calls = []
+
+    def _range(self, df, start_date, end_date):
+        self.calls.append((start_date, end_date))
+        dates = df.index.strftime("%Y%m%d")
+        return df[(dates >= start_date) & (dates <= end_date)].sort_index(ascending=False)
+
+    def get_stock_history_range(self, code, start_date, end_date, adjusted=False):
+        assert not adjusted  # 저장소는 원주가만 이어 붙인다
+        return self._range(self.daily, start_date, end_date)
+
+    def get_minute_history_range(self, code, start_date, end_date):
+        return self._range(self.minute, start_date, end_date)
+
+
+def main():
+    now = datetime.datetime(2024, 10, 17, 16, 0)
+    daily = make_frame(pd.bdate_range(end=now.date(), periods=30))
+    minute = make_frame(pd.date_range(datetime.datetime(2024, 10, 17, 9, 0), periods=60, freq='min'))
+
+    with tempfile.TemporaryDirectory() as path:
+        store = OHLCVStore(path)
+
+        # append / read
+        assert store.append('000001', DAILY, frame_to_records(daily.iloc[:10])) == 10
+        assert store.append('000001', DAILY, frame_to_records(daily.iloc[:12])) == 2  # 저장된 봉은 건너뜀
+        assert np.array_equal(store.read('000001', DAILY)['close'], daily['Close'].to_numpy()[:12])
+
+        # update: 처음이면 전체, 다시 하면 빠진 봉만
+        api = FakeAPI(daily, minute)
+        assert store.update(api, '005930', DAILY, now=now) == len(daily)
+        assert store.update(api, '005930', DAILY, now=now) == 0
+        assert OHLCVStore(path).to_frame('005930', DAILY)['Close'].tolist() == daily['Close'].tolist()
+
+        # 분봉 첫 update 는 DEFAULT_MINUTE_HISTORY_DAYS 일 전부터 조회
+        assert store.update(api, '005930', MINUTE, now=now) == len(minute)
+        assert api.calls[-1] == ('20231018', '20241017')
+        assert store.update(api, '005930', MINUTE, now=now) == 0
+        assert len(store.read('005930', MINUTE, 202410170930, 202410170939)) == 10
+
+    print("OHLCVStore append/read/update OK")
+
+
+if __name__ == "__main__":
+    main()
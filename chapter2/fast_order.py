@@ -0,0 +1,154 @@
+import time
+from collections import namedtuple
+
+import requests
+from loguru import logger
+
+from utils import APIResponse, ORDER_REQUEST, RATE_LIMIT_ERROR_CODE, RATE_LIMIT_RETRY, json_dumps_bytes
+
+
+# 신호 발생부터 주문 접수 응답까지의 지연을 줄이기 위한 주문 전용 경로
+# - hashkey 는 선택 사항이므로 기본으로 생략 (/uapi/hashkey 왕복 1회 절약)
+# - 계좌/상품별 주문 params 와 헤더를 미리 만들어 두고 주문마다 바뀌는 값만 채운다
+# - requests 의 PreparedRequest 를 tr_id 별로 만들어 두어 헤더 병합/인코딩을 매번 하지 않는다
+# - 주문마다 (신호, 전송, 응답) 시각을 ns 단위로 남긴다
+#
+# 사용 예)
+#     fast = FastOrderClient(korea_invest_api)
+#     t1, timing = fast.buy("005930", 1, 70000)
+#     logger.info(f"ack latency: {(timing.ack_ns - timing.send_ns) / 1e6:.2f} ms")
+
+OrderTiming = namedtuple('OrderTiming', ['signal_ns', 'send_ns', 'ack_ns'])
+
+
+class FastOrderClient:
+    def __init__(self, api, use_hash=False):
+        self.api = api
+        self.use_hash = use_hash
+        self._templates = dict()
+        self._headers_ref = api._base_headers
+
+    def _template(self, key, build_request):
+        # key 별 (PreparedRequest, 고정 params, 전송 옵션) 을 한 번만 만든다
+        # 토큰 재발급으로 기본 헤더가 교체되면 템플릿을 다시 만든다.
+        if self.api._base_headers is not self._headers_ref:
+            self._templates.clear()
+            self._headers_ref = self.api._base_headers
+        template = self._templates.get(key)
+        if template is None:
+            api_url, tr_id, params = build_request()
+            tr_id, headers = self.api._make_headers(tr_id)
+            url = f"{self.api.using_url}{api_url}"
+            session = self.api._session
+            prepared = session.prepare_request(requests.Request('POST', url, headers=headers))
+            # proxy, 인증서(REQUESTS_CA_BUNDLE) 등 환경 설정도 미리 계산해 둔다
+            send_kwargs = session.merge_environment_settings(url, dict(), None, None, None)
+            send_kwargs['timeout'] = self.api._timeout
+            template = (prepared, params, send_kwargs)
+            self._templates[key] = template
+        return template
+
+    def _send(self, template, fields, signal_ns):
+        prepared, params, send_kwargs = template
+        params = dict(params)
+        params.update(fields)
+        body = json_dumps_bytes(params)
+
+        request = prepared.copy()
+        request.body = body
+        request.headers['Content-Length'] = str(len(body))
+        if self.use_hash:
+            self.api.set_order_hash_key(request.headers, params)
+
+        for _ in range(RATE_LIMIT_RETRY + 1):
+            self.api._rate_limiter.acquire(ORDER_REQUEST)
+            send_ns = time.perf_counter_ns()  # 재전송하면 마지막 전송 시각
+            try:
+                res = self.api._session.send(request, **send_kwargs)
+            except Exception as e:
+                logger.info(f"URL exception: {e}")
+                return None, OrderTiming(signal_ns, send_ns, None)
+            if res.status_code != 200 and RATE_LIMIT_ERROR_CODE in res.text:
+                # _url_fetch 와 같이 초당 한도 초과로 거부된 주문은 공용 limiter 를 잠시 멈추고 다시 보낸다
+                logger.info(f"Rate limited ({RATE_LIMIT_ERROR_CODE}): order, retry")
+                self.api._rate_limiter.penalize()
+                continue
+            break
+        ack_ns = time.perf_counter_ns()
+
+        timing = OrderTiming(signal_ns, send_ns, ack_ns)
+        if res.status_code != 200:
+            logger.info(f"Error Code : {res.status_code} | {res.text}")
+            return None, timing
+        return self.api._order_result(APIResponse(res)), timing
+
+    def order(self, stock_code, order_qty, order_price, buy_flag=True, order_type="00", exchange="KRX", prd_code="01"):
+        # 국내주식 현금 주문. 반환값: (APIResponse 또는 None, OrderTiming)
+        signal_ns = time.perf_counter_ns()
+        template = self._template(
+            ('domestic', buy_flag, prd_code),
+            lambda: self.api._do_order_request('', 0, 0, prd_code, buy_flag, order_type, exchange),
+        )
+        fields = {
+            'PDNO': stock_code,
+            'ORD_DVSN': order_type,
+            'ORD_QTY': str(order_qty),
+            'ORD_UNPR': str(order_price),
+            'EXCG_ID_DVSN_CD': exchange,
+        }
+        return self._send(template, fields, signal_ns)
+
+    def buy(self, stock_code, order_qty, order_price, order_type="00", exchange="KRX"):
+        return self.order(stock_code, order_qty, order_price, True, order_type, exchange)
+
+    def sell(self, stock_code, order_qty, order_price, order_type="00", exchange="KRX"):
+        return self.order(stock_code, order_qty, order_price, False, order_type, exchange)
+
+    def cancel(self, order_no, order_qty, order_price="01", order_branch='06010', prd_code='01', order_dv='00', qty_all_yn="Y"):
+        # 국내주식 주문 취소
+        signal_ns = time.perf_counter_ns()
+        template = self._template(
+            ('domestic_cancel', prd_code),
+            lambda: self.api._do_cancel_revise_request('', order_branch, 0, 0, prd_code, order_dv, '02', qty_all_yn, "KRX"),
+        )
+        fields = {
+            'KRX_FWDG_ORD_ORGNO': order_branch,
+            'ORGN_ODNO': order_no,
+            'ORD_DVSN': order_dv,
+            'ORD_QTY': str(order_qty),
+            'ORD_UNPR': str(order_price),
+            'QTY_ALL_ORD_YN': qty_all_yn,
+        }
+        return self._send(template, fields, signal_ns)
+
+    def overseas_order(self, stock_code, exchange_code, order_qty, order_price, buy_flag=True, order_type="00", prd_code="01"):
+        # 해외주식 주문. 반환값: (APIResponse 또는 None, OrderTiming)
+        signal_ns = time.perf_counter_ns()
+        template = self._template(
+            ('overseas', buy_flag, prd_code),
+            lambda: self.api._overseas_do_order_request('', exchange_code, 0, 0, prd_code, buy_flag, order_type),
+        )
+        fields = {
+            'OVRS_EXCG_CD': exchange_code,
+            'PDNO': stock_code,
+            'ORD_QTY': str(order_qty),
+            'OVRS_ORD_UNPR': str(order_price),
+            'ORD_DVSN': order_type,
+        }
+        return self._send(template, fields, signal_ns)
+
+    def future_options_order(self, product_code, order_qty, order_price=0, is_buy_order=True, order_type="04", prd_code="03"):
+        # 선물옵션 주문. 반환값: (APIResponse 또는 None, OrderTiming)
+        signal_ns = time.perf_counter_ns()
+        template = self._template(
+            ('future_options', is_buy_order, prd_code),
+            lambda: self.api._future_options_do_order_request('', 0, 0, is_buy_order, prd_code, order_type),
+        )
+        fields = {
+            'SHTN_PDNO': product_code,
+            'ORD_QTY': str(order_qty),
+            'UNIT_PRICE': str(order_price),
+            'NMPR_TYPE_CD': order_type,
+            'ORD_DVSN_CD': order_type,
+        }
+        return self._send(template, fields, signal_ns)
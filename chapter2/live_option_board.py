@@ -0,0 +1,219 @@
+import asyncio
+from collections import namedtuple
+
+import numpy as np
+from loguru import logger
+
+from option_chain import CALL, DEFAULT_RISK_FREE_RATE, PUT, compute_chains, fetch_option_chains
+from tick_parser import to_float
+from utils import DEFAULT_BULK_WORKERS
+
+
+# 실시간 옵션 전광판
+# display_options / display_weekly_options 로 한 번 채운 OptionChain 을 실시간 지수옵션 체결(H0IOCNT0)과 호가(H0IOASP0)로
+# 행사가 단위로 갱신한다. (전광판 전체를 다시 조회/병합하지 않음)
+# - 메시지 하나에 들어 있는 레코드를 만기별로 모아서 바뀐 행사가의 내재변동성/greeks 만 다시 계산한다
+# - 추정 선물가격(parity)이 forward_tolerance 보다 크게 움직였을 때만 그 만기 전체를 다시 계산한다
+# - 바뀐 옵션마다 OptionQuote 를 listener 에 전달한다
+# - 재접속하면 전광판을 다시 조회해서 끊긴 동안 바뀐 가격만 반영한다
+#
+# 사용 예)
+#     board = LiveOptionBoard(korea_invest_api)
+#     board.seed([('202411', OPTION_BOARD_MONTHLY), ('241101', OPTION_BOARD_WEEKLY_THU)])
+#     board.add_listener(lambda quote: print(quote.code, quote.price, quote.iv, quote.delta))
+#     realtime.add_callback(OPTION_TRADE_TR_ID, board.on_message)
+#     realtime.add_callback(OPTION_QUOTE_TR_ID, board.on_message)
+#     realtime.add_connect_callback(board.on_connect)
+#     await realtime.subscribe_many(OPTION_TRADE_TR_ID, board.codes(near=10))  # 세션당 등록 개수 제한이 있으므로 ATM 근처만
+
+OPTION_TRADE_TR_ID = 'H0IOCNT0'  # 지수옵션 실시간체결가
+OPTION_QUOTE_TR_ID = 'H0IOASP0'  # 지수옵션 실시간호가
+_TRADE_PRICE_FIELD = 2  # H0IOCNT0: 종목코드 0, 영업시간 1, 현재가 2
+_QUOTE_ASK_FIELD, _QUOTE_BID_FIELD = 2, 7  # H0IOASP0: 매도호가1~5 (2~6), 매수호가1~5 (7~11)
+DEFAULT_FORWARD_TOLERANCE = 0.01  # 추정 선물가격이 이 이상 움직일 때만 만기 전체 재계산 (포인트)
+
+PRICE_LAST = 'last'  # 내재변동성 계산에 현재가(체결가) 사용
+PRICE_MID = 'mid'  # 매도/매수 1호가 중간값 사용 (호가가 없으면 현재가)
+
+# 바뀐 옵션 하나. key: (target_date, market_cls_code), side: CALL/PUT, index: 행사가 위치
+OptionQuote = namedtuple('OptionQuote', [
+    'key', 'code', 'side', 'index', 'strike', 'price', 'bid', 'ask', 'forward',
+    'iv', 'delta', 'gamma', 'vega', 'theta',
+])
+
+
+class LiveOptionBoard:
+    def __init__(self, korea_invest_api, rate=DEFAULT_RISK_FREE_RATE, price_source=PRICE_LAST,
+                 forward_tolerance=DEFAULT_FORWARD_TOLERANCE, max_workers=DEFAULT_BULK_WORKERS):
+        assert price_source in (PRICE_LAST, PRICE_MID)
+        self.api = korea_invest_api
+        self.rate = rate
+        self.price_source = price_source
+        self.forward_tolerance = forward_tolerance
+        self.max_workers = max_workers
+        self.chains = dict()  # (target_date, market_cls_code) -> OptionChain
+        self._last = dict()  # key -> [CALL, PUT] x 행사가 현재가
+        self._bid = dict()  # key -> [CALL, PUT] x 행사가 매수1호가
+        self._ask = dict()  # key -> [CALL, PUT] x 행사가 매도1호가
+        self._locations = dict()  # 종목코드 -> (key, CALL/PUT, 행사가 위치)
+        self._forward = dict()  # key -> 고정 선물가격 (없으면 parity 추정)
+        self._listeners = []
+        self._pending = None  # 재조회하는 동안 받은 메시지
+
+    def add_listener(self, callback):
+        # callback(OptionQuote): 옵션 가격/호가가 바뀌어 greeks 를 다시 계산한 뒤 호출
+        self._listeners.append(callback)
+
+    def seed(self, expiries, forward=None, now=None):
+        # 여러 만기 전광판을 동시에 조회해서 초기화. 조회에 성공한 만기 key 목록 반환
+        # forward: 선물가격 (숫자 또는 {만기 key: 숫자}, None 이면 parity 추정)
+        chains = fetch_option_chains(self.api, expiries, forward=forward, rate=self.rate, now=now, max_workers=self.max_workers)
+        for key, chain in chains.items():
+            self.chains[key] = chain
+            self._last[key] = chain.prices.copy()
+            self._bid[key] = np.full(chain.prices.shape, np.nan)
+            self._ask[key] = np.full(chain.prices.shape, np.nan)
+            self._forward[key] = forward.get(key) if isinstance(forward, dict) else forward
+            for side in (CALL, PUT):
+                for i, code in enumerate(chain.codes[side]):
+                    if code:
+                        self._locations[code] = (key, side, i)
+        return list(chains)
+
+    def codes(self, key=None, near=None):
+        # 실시간 등록할 종목코드. key 를 주면 그 만기만, near 를 주면 ATM 에서 가까운 near 개 행사가만
+        codes = []
+        for chain_key, chain in self.chains.items():
+            if key is not None and chain_key != key:
+                continue
+            index = np.arange(len(chain))
+            if near is not None:
+                index = np.sort(np.argsort(np.abs(chain.strikes - chain.forward))[:near])
+            codes.extend(code for i in index for code in chain.codes[:, i] if code)
+        return codes
+
+    def get_chain(self, key):
+        return self.chains.get(key)
+
+    def _price(self, key, side, i):
+        if self.price_source == PRICE_MID:
+            bid, ask = self._bid[key][side, i], self._ask[key][side, i]
+            if bid > 0 and ask > 0:
+                return (bid + ask) / 2
+        return self._last[key][side, i]
+
+    def on_message(self, message):
+        # KoreaInvestRealtime 의 callback 으로 사용 (RealtimeMessage, H0IOCNT0 / H0IOASP0)
+        if message.tr_id not in (OPTION_TRADE_TR_ID, OPTION_QUOTE_TR_ID):
+            return
+        if self._pending is not None:
+            self._pending.append(message)
+            return
+        fields = message.data.split('^')
+        n = len(fields) // message.count
+        changed = dict()  # key -> {(side, 행사가 위치)}
+        for base in range(0, n * message.count, n):
+            location = self._locations.get(fields[base])
+            if location is None:
+                continue
+            key, side, i = location
+            # 체결가 또는 1호가가 그대로면 다시 계산하지 않는다
+            if message.tr_id == OPTION_TRADE_TR_ID:
+                price = to_float(fields[base + _TRADE_PRICE_FIELD])
+                if not price > 0 or price == self._last[key][side, i]:
+                    continue
+                self._last[key][side, i] = price
+            else:
+                ask = to_float(fields[base + _QUOTE_ASK_FIELD])
+                bid = to_float(fields[base + _QUOTE_BID_FIELD])
+                if ask == self._ask[key][side, i] and bid == self._bid[key][side, i]:
+                    continue
+                self._ask[key][side, i] = ask
+                self._bid[key][side, i] = bid
+            changed.setdefault(key, set()).add((side, i))
+        for key, options in changed.items():
+            self._apply(key, options)
+
+    def _apply(self, key, options):
+        # 바뀐 옵션의 가격을 OptionChain 에 반영하고, 가격이 달라진 행사가만 다시 계산해서 이벤트 전달
+        chain = self.chains[key]
+        repriced = set()
+        for side, i in options:
+            price = self._price(key, side, i)
+            if not (price == chain.prices[side, i] or (np.isnan(price) and np.isnan(chain.prices[side, i]))):
+                chain.prices[side, i] = price
+                repriced.add(i)
+        if repriced:
+            if chain.update_prices(np.fromiter(sorted(repriced), dtype=np.int64, count=len(repriced)), forward_tolerance=self.forward_tolerance):
+                # 선물가격이 바뀌어 전체 행사가의 greeks 가 바뀜
+                options = {(side, i) for side in (CALL, PUT) for i in range(len(chain)) if chain.codes[side, i]}
+        for side, i in sorted(options):
+            self._emit(key, side, int(i))
+
+    def _emit(self, key, side, i):
+        if not self._listeners:
+            return
+        chain = self.chains[key]
+        quote = OptionQuote(
+            key, chain.codes[side, i], side, i, chain.strikes[i], chain.prices[side, i],
+            self._bid[key][side, i], self._ask[key][side, i], chain.forward,
+            chain.iv[side, i], chain.delta[side, i], chain.gamma[side, i], chain.vega[side, i], chain.theta[side, i],
+        )
+        for callback in self._listeners:
+            try:
+                callback(quote)
+            except Exception as e:
+                logger.exception(f"option board listener exception: {e!r}")
+
+    def recompute(self, now=None):
+        # 전체 만기를 한 번에 다시 계산 (시간 경과로 남은 만기가 줄어든 것 반영, 타이머에서 주기적으로 호출)
+        compute_chains(self.chains, now)
+        for key, chain in self.chains.items():
+            for side in (CALL, PUT):
+                for i in np.flatnonzero(chain.codes[side] != ''):
+                    self._emit(key, side, int(i))
+
+    def fetch_boards(self, now=None):
+        # 현재 만기 전광판을 다시 조회 ({key: OptionChain})
+        return fetch_option_chains(
+            self.api, list(self.chains), forward=self._forward, rate=self.rate, now=now, max_workers=self.max_workers,
+        )
+
+    def apply_boards(self, chains):
+        # fetch_boards 결과에서 현재가가 바뀐 옵션만 반영. 반영한 옵션 개수 반환
+        count = 0
+        for key, fresh in chains.items():
+            if key not in self.chains:
+                continue
+            options = set()
+            for side in (CALL, PUT):
+                for code, price in zip(fresh.codes[side], fresh.prices[side]):
+                    location = self._locations.get(code)
+                    if location is None or location[0] != key or not price > 0:
+                        continue
+                    i = location[2]
+                    if price != self._last[key][side, i]:
+                        self._last[key][side, i] = price
+                        options.add((side, i))
+            if options:
+                self._apply(key, options)
+                count += len(options)
+        return count
+
+    def refresh(self, now=None):
+        return self.apply_boards(self.fetch_boards(now))
+
+    async def on_connect(self, reconnected):
+        # KoreaInvestRealtime 의 connect callback 으로 사용. 재접속이면 끊긴 동안의 가격을 전광판 재조회로 반영한다.
+        # 조회는 thread 에서 하고, 그동안 들어온 실시간 메시지는 모아 두었다가 조회 결과를 반영한 뒤 순서대로 반영한다.
+        # (connect callback 은 task 로 실행되므로 조회하는 동안에도 수신은 계속된다)
+        if not reconnected or not self.chains:
+            return
+        self._pending = []
+        try:
+            chains = await asyncio.to_thread(self.fetch_boards)
+            logger.info(f"옵션 전광판 재조회: {self.apply_boards(chains)}개 반영")
+        finally:
+            pending, self._pending = self._pending, None
+            for message in pending:
+                self.on_message(message)
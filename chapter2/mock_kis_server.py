@@ -0,0 +1,124 @@
+import json
+import os
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 벤치마크용 로컬 HTTPS 서버 (한국투자증권 REST API 흉내)
+# 실제 서버에 요청하지 않고 커넥션 재사용, 주문 경로 등의 지연 시간을 측정하기 위해 사용한다.
+
+
+def make_self_signed_cert(cert_dir):
+    # 127.0.0.1 용 self-signed 인증서 생성 (openssl 필요)
+    cert_file = os.path.join(cert_dir, 'cert.pem')
+    key_file = os.path.join(cert_dir, 'key.pem')
+    subprocess.run(
+        [
+            'openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes',
+            '-keyout', key_file, '-out', cert_file, '-days', '1',
+            '-subj', '/CN=localhost', '-addext', 'subjectAltName=IP:127.0.0.1,DNS:localhost',
+        ],
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    return cert_file, key_file
+
+
+class MockKisHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive 지원
+    disable_nagle_algorithm = True  # 헤더와 본문을 나눠 보낼 때 Nagle 지연 방지
+    latency = 0.0  # 응답마다 추가할 서버 처리 지연 (초)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, body, headers=None):
+        if self.latency:
+            time.sleep(self.latency)
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=UTF-8')
+        self.send_header('Content-Length', str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._send_json({
+            'rt_cd': '0',
+            'msg_cd': 'MCA00000',
+            'msg1': '정상처리 되었습니다.',
+            'output': {'stck_prpr': '70000', 'prdy_vrss': '500', 'prdy_ctrt': '0.72', 'acml_vol': '1234567'},
+        }, headers={'tr_id': self.headers.get('tr_id', ''), 'tr_cont': ''})
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        if self.path.startswith('/uapi/hashkey'):
+            self._send_json({'HASH': '0' * 64})
+        elif self.path.startswith('/oauth2/tokenP'):
+            self._send_json({
+                'access_token': 'mock-token',
+                'token_type': 'Bearer',
+                'expires_in': 86400,
+                'access_token_token_expired': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(time.time() + 86400)),
+            })
+        elif self.path.startswith('/oauth2/Approval'):
+            self._send_json({'approval_key': 'mock-approval-key'})
+        else:
+            self._send_json({
+                'rt_cd': '0',
+                'msg_cd': 'APBK0013',
+                'msg1': '주문 전송 완료 되었습니다.',
+                'output': {'KRX_FWDG_ORD_ORGNO': '06010', 'ODNO': '0000123456', 'ORD_TMD': time.strftime('%H%M%S')},
+            }, headers={'tr_id': self.headers.get('tr_id', '')})
+
+
+def start_mock_server(latency=0.0):
+    # 백그라운드 스레드로 HTTPS mock 서버를 띄우고 (server, base_url, cert_file) 반환
+    cert_dir = tempfile.mkdtemp(prefix='mock_kis_')
+    cert_file, key_file = make_self_signed_cert(cert_dir)
+
+    handler = type('Handler', (MockKisHandler,), {'latency': latency})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+    server.daemon_threads = True
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_file, key_file)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = f'https://127.0.0.1:{server.server_address[1]}'
+    return server, base_url, cert_file
+
+
+def make_mock_config(base_url):
+    # mock 서버를 바라보는 KoreaInvestAPI 용 config
+    return {
+        'custtype': 'P',
+        'websocket_approval_key': 'mock-approval-key',
+        'account_num': '12345678',
+        'future_account_num': '12345678',
+        'is_paper_trading': False,
+        'htsid': 'mockid',
+        'using_url': base_url,
+        'using_websocket_url': base_url.replace('https://', 'ws://'),
+    }
+
+
+def make_mock_headers():
+    return {
+        "Content-Type": "application/json",
+        "Accept": "text/plain",
+        "charset": "UTF-8",
+        'User-Agent': 'mock-agent',
+        'authorization': 'Bearer mock-token',
+        'appkey': 'mock-app-key',
+        'appsecret': 'mock-app-secret',
+    }
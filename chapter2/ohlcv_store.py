@@ -0,0 +1,195 @@
+import datetime
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from bar_aggregator import DAILY
+from utils import DEFAULT_BULK_WORKERS
+
+
+# 종목/주기별 OHLCV 를 로컬 디스크에 쌓아 두는 저장소
+# - 일봉은 종목별 파일 하나, 1분봉은 종목별 월 단위 파일에 시간 순서로 append 만 한다
+# - 파일은 고정 크기 레코드 배열이라 np.memmap 으로 바로 열고, 기간 조회는 복사 없는 view 로 반환한다
+# - 업데이트할 때는 마지막 저장 시각 이후의 봉만 REST 로 받아 붙인다
+# - 일봉은 원주가로 저장한다. 수정주가는 액면분할/배당 뒤 과거 봉까지 바뀌므로, 이어 붙이면 저장된 봉과 기준이 섞인다
+#
+# 사용 예)
+#     store = OHLCVStore('~/.kis_ohlcv')
+#     store.update_many(korea_invest_api, codes, DAILY)   # 처음엔 전체, 이후엔 빠진 날짜만 조회
+#     bars = store.read('005930', DAILY, 20240101, 20241231)   # memmap view
+#     df = store.to_frame('005930', DAILY, 20240101)
+
+MINUTE = 1
+DEFAULT_OHLCV_STORE_PATH = '~/.kis_ohlcv'
+DEFAULT_HISTORY_START = '20150101'  # 일봉을 처음 받을 때의 시작일
+DEFAULT_MINUTE_HISTORY_DAYS = 365  # 분봉을 처음 받을 때 거슬러 올라갈 일수 (일별 분봉 조회가 보관하는 기간, 최대 1년)
+MARKET_CLOSE_HOUR = '1540'  # 이 시각 이후에는 당일 봉도 완성된 것으로 보고 저장
+
+# key: YYYYMMDDHHMM 정수 (일봉은 YYYYMMDD0000, bar_aggregator 와 같은 형식)
+OHLCV_DTYPE = np.dtype([
+    ('key', '<i8'), ('open', '<f8'), ('high', '<f8'), ('low', '<f8'), ('close', '<f8'), ('volume', '<f8'),
+])
+
+
+class OHLCVStore:
+    def __init__(self, path=DEFAULT_OHLCV_STORE_PATH):
+        self.path = os.path.expanduser(path)
+        self._maps = dict()  # 파일 경로 -> memmap (append 하면 다시 연다)
+        self._lock = threading.Lock()
+
+    def _interval_dir(self, interval):
+        return os.path.join(self.path, 'day' if interval == DAILY else 'minute')
+
+    def _partition_paths(self, code, interval):
+        # 종목의 파일 목록 (시간 순서)
+        if interval == DAILY:
+            path = os.path.join(self._interval_dir(interval), f'{code}.bin')
+            return [path] if os.path.exists(path) else []
+        code_dir = os.path.join(self._interval_dir(interval), code)
+        if not os.path.isdir(code_dir):
+            return []
+        return [os.path.join(code_dir, name) for name in sorted(os.listdir(code_dir)) if name.endswith('.bin')]
+
+    def _partition_path(self, code, interval, key):
+        if interval == DAILY:
+            return os.path.join(self._interval_dir(interval), f'{code}.bin')
+        return os.path.join(self._interval_dir(interval), code, f'{key // 100000000}.bin')  # YYYYMM
+
+    def _open(self, path):
+        # 파일 전체를 레코드 배열로 연다. (쓰다가 끊긴 마지막 불완전 레코드는 제외)
+        with self._lock:
+            records = self._maps.get(path)
+            if records is None:
+                count = os.path.getsize(path) // OHLCV_DTYPE.itemsize
+                if count == 0:
+                    records = np.zeros(0, dtype=OHLCV_DTYPE)
+                else:
+                    records = np.memmap(path, dtype=OHLCV_DTYPE, mode='r', shape=(count,))
+                self._maps[path] = records
+            return records
+
+    def last_key(self, code, interval=DAILY):
+        paths = self._partition_paths(code, interval)
+        for path in reversed(paths):
+            records = self._open(path)
+            if len(records):
+                return int(records['key'][-1])
+        return None
+
+    def append(self, code, interval, records):
+        # 시간 순서 레코드 배열(OHLCV_DTYPE) 을 파일 끝에 추가. 마지막 저장 시각 이전 레코드는 버린다.
+        last = self.last_key(code, interval)
+        if last is not None:
+            records = records[records['key'] > last]
+        if not len(records):
+            return 0
+        partitions = records['key'] // 100000000 if interval != DAILY else np.zeros(len(records), dtype=np.int64)
+        for partition in np.unique(partitions):
+            chunk = records[partitions == partition]
+            path = self._partition_path(code, interval, int(chunk['key'][0]))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with self._lock:
+                size = os.path.getsize(path) if os.path.exists(path) else 0
+                with open(path, 'r+b' if size else 'wb') as f:
+                    # 불완전한 마지막 레코드가 있으면 덮어쓴다
+                    f.seek(size - size % OHLCV_DTYPE.itemsize)
+                    f.write(chunk.tobytes())
+                    f.truncate()
+                self._maps.pop(path, None)
+        return len(records)
+
+    def read(self, code, interval=DAILY, start=None, end=None):
+        # start <= key <= end 인 레코드 (start, end 는 YYYYMMDD 또는 YYYYMMDDHHMM 정수)
+        # 파일 하나 안의 구간이면 memmap view (복사 없음), 여러 파일에 걸치면 이어붙인 배열
+        start_key = _to_key(start, False)
+        end_key = _to_key(end, True)
+        parts = []
+        for path in self._partition_paths(code, interval):
+            records = self._open(path)
+            if not len(records):
+                continue
+            keys = records['key']
+            if (end_key is not None and keys[0] > end_key) or (start_key is not None and keys[-1] < start_key):
+                continue
+            lo = 0 if start_key is None else int(keys.searchsorted(start_key, 'left'))
+            hi = len(records) if end_key is None else int(keys.searchsorted(end_key, 'right'))
+            parts.append(records[lo:hi])
+        if not parts:
+            return np.zeros(0, dtype=OHLCV_DTYPE)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def to_frame(self, code, interval=DAILY, start=None, end=None):
+        # get_stock_history_by_ohlcv 와 같은 열 이름의 DataFrame (오래된 날짜가 위)
+        records = self.read(code, interval, start, end)
+        index = pd.to_datetime(records['key'].astype(str), format="%Y%m%d%H%M")
+        return pd.DataFrame({
+            'Open': records['open'], 'High': records['high'], 'Low': records['low'],
+            'Close': records['close'], 'Volume': records['volume'],
+        }, index=pd.Index(index, name='Date'))
+
+    def load(self, codes, interval=DAILY, start=None, end=None):
+        # 여러 종목을 한 번에 열기 (시작할 때 warm-up) {code: 레코드 배열}
+        return {code: self.read(code, interval, start, end) for code in codes}
+
+    def update(self, korea_invest_api, code, interval=DAILY, start_date=None, now=None):
+        # 마지막 저장 시각 이후의 완성된 봉만 조회해서 추가. 추가한 봉 수 반환
+        # start_date: 저장된 봉이 없을 때의 시작일 (None 이면 일봉은 DEFAULT_HISTORY_START, 분봉은 DEFAULT_MINUTE_HISTORY_DAYS 일 전)
+        now = now or datetime.datetime.now()
+        end = now if now.strftime("%H%M") >= MARKET_CLOSE_HOUR else now - datetime.timedelta(days=1)
+        end_date = end.strftime("%Y%m%d")
+        if start_date is None:
+            start_date = DEFAULT_HISTORY_START if interval == DAILY else \
+                (end - datetime.timedelta(days=DEFAULT_MINUTE_HISTORY_DAYS)).strftime("%Y%m%d")
+        last = self.last_key(code, interval)
+        if last is not None:
+            last_date = datetime.datetime.strptime(str(last // 10000), "%Y%m%d")
+            # 일봉은 다음 날부터, 분봉은 같은 날의 남은 분봉부터
+            start_date = (last_date + datetime.timedelta(days=1 if interval == DAILY else 0)).strftime("%Y%m%d")
+        if start_date > end_date:
+            return 0
+
+        if interval == DAILY:
+            df = korea_invest_api.get_stock_history_range(code, start_date, end_date, adjusted=False)
+        else:
+            df = korea_invest_api.get_minute_history_range(code, start_date, end_date)
+        if df.empty:
+            return 0
+        return self.append(code, interval, frame_to_records(df.sort_index()))
+
+    def update_many(self, korea_invest_api, codes, interval=DAILY, start_date=None, max_workers=DEFAULT_BULK_WORKERS):
+        # 여러 종목 업데이트 (초당 호출 제한은 KoreaInvestAPI 의 RateLimiter 가 지킨다). {code: 추가한 봉 수}
+        def update(code):
+            try:
+                return code, self.update(korea_invest_api, code, interval, start_date)
+            except Exception as e:
+                logger.info(f"OHLCV 업데이트 실패 {code}: {e!r}")
+                return code, 0
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(executor.map(update, list(codes)))
+
+
+def _to_key(value, is_end):
+    # YYYYMMDD -> YYYYMMDD0000 (끝이면 YYYYMMDD2359), YYYYMMDDHHMM 은 그대로
+    if value is None:
+        return None
+    value = int(value)
+    if value < 100000000:
+        return value * 10000 + (2359 if is_end else 0)
+    return value
+
+
+def frame_to_records(df):
+    # OHLCV DataFrame (index 일시, 오름차순) -> OHLCV_DTYPE 레코드 배열
+    records = np.zeros(len(df), dtype=OHLCV_DTYPE)
+    records['key'] = df.index.strftime("%Y%m%d%H%M").astype(np.int64)
+    records['open'] = df['Open'].to_numpy(dtype=np.float64)
+    records['high'] = df['High'].to_numpy(dtype=np.float64)
+    records['low'] = df['Low'].to_numpy(dtype=np.float64)
+    records['close'] = df['Close'].to_numpy(dtype=np.float64)
+    records['volume'] = df['Volume'].to_numpy(dtype=np.float64)
+    return records
@@ -0,0 +1,333 @@
+import datetime
+
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from utils import DEFAULT_BULK_WORKERS, OPTION_BOARD_MONTHLY, OPTION_BOARD_WEEKLY_MON, OPTION_BOARD_WEEKLY_THU
+
+
+# 코스피200 옵션 전광판(display_options / display_weekly_options 응답)으로 만드는 옵션 체인
+# - 행사가별 콜/풋 가격을 (2, 행사가 수) 배열 하나로 두고 내재변동성과 greeks 를 전체 행사가에 대해 한 번에 계산한다
+# - 가격 모델은 Black-76 (기초자산은 선물가격 F). F 를 주지 않으면 put-call parity 로 추정한다
+# - 여러 만기를 동시에 조회해 만기별 ATM 변동성 (term structure) 을 만든다
+#
+# 사용 예)
+#     chains = fetch_option_chains(korea_invest_api, [('202411', OPTION_BOARD_MONTHLY), ('241102', OPTION_BOARD_WEEKLY_THU)])
+#     chain = chains[('202411', OPTION_BOARD_MONTHLY)]
+#     chain.to_frame()                 # 행사가별 가격, 내재변동성, delta/gamma/vega/theta
+#     chain.parity_violations()        # parity 에서 벗어난 행사가
+#     term_structure(chains)
+
+DEFAULT_RISK_FREE_RATE = 0.035  # 무위험 이자율 (연, CD 91일물 수준)
+EXPIRY_HOUR = (15, 20)  # 최종거래일 장 종료 시각
+DAYS_PER_YEAR = 365.0
+MIN_TIME_TO_EXPIRY = 1e-6  # 만기 당일 장 종료 후 등 남은 시간이 0 이하일 때 사용 (년)
+PARITY_TOLERANCE = 0.05  # parity 잔차 허용 범위 (포인트)
+PARITY_FORWARD_STRIKES = 3  # 선물가격 추정에 쓰는 콜/풋 가격 차이가 가장 작은 행사가 수
+IV_LOWER, IV_UPPER = 1e-4, 5.0  # 내재변동성 탐색 범위
+IV_TOLERANCE = 1e-6  # 가격 오차 (옵션 가격 대비 상대 오차)
+IV_SIGMA_TOLERANCE = 1e-8  # 탐색 범위(hi - lo)가 이보다 좁아지면 수렴으로 본다 (변동성)
+IV_MIN_VEGA = 1e-6  # vega (1.0 변동성 당, 포인트) 가 이보다 작으면 가격으로 변동성을 정할 수 없으므로 nan
+IV_MAX_ITER = 50
+
+CALL, PUT = 0, 1  # 배열의 행 위치
+_SIDES = ('call', 'put')
+
+
+def norm_pdf(x):
+    return np.exp(-0.5 * x * x) / np.sqrt(2 * np.pi)
+
+
+def norm_cdf(x):
+    # 표준정규분포 누적분포 (Abramowitz & Stegun 26.2.17, 오차 7.5e-8 이하)
+    a = np.abs(x)
+    t = 1.0 / (1.0 + 0.2316419 * a)
+    poly = t * (0.319381530 + t * (-0.356563782 + t * (1.781477937 + t * (-1.821255978 + t * 1.330274429))))
+    cdf = 1.0 - norm_pdf(a) * poly
+    return np.where(x >= 0, cdf, 1.0 - cdf)
+
+
+def black76(forward, strike, t, rate, sigma, is_call):
+    # Black-76 가격과 vega (1.0 변동성 당). 인자는 모두 broadcast 가능한 배열
+    sqrt_t = np.sqrt(t)
+    sig_sqrt_t = sigma * sqrt_t
+    d1 = (np.log(forward / strike) + 0.5 * sig_sqrt_t * sig_sqrt_t) / sig_sqrt_t
+    d2 = d1 - sig_sqrt_t
+    df = np.exp(-rate * t)
+    call = df * (forward * norm_cdf(d1) - strike * norm_cdf(d2))
+    price = np.where(is_call, call, call - df * (forward - strike))  # put 은 parity 로
+    vega = df * forward * norm_pdf(d1) * sqrt_t
+    return price, vega
+
+
+def implied_volatility(price, forward, strike, t, rate, is_call, tol=IV_TOLERANCE, max_iter=IV_MAX_ITER):
+    # 전체 옵션의 내재변동성을 한 번에 계산 (Newton, 범위를 벗어나면 이분법)
+    # 수렴한 옵션은 다음 반복에서 빼고 남은 옵션만 계산한다.
+    # 시간가치가 없거나(가격 오차 이내) 가격 상한을 넘는 등 풀 수 없는 옵션, 해에서 vega 가 거의 0 인 옵션은 nan
+    arrays = np.broadcast_arrays(np.asarray(price, dtype=np.float64), forward, strike, t, rate, is_call)
+    shape = arrays[0].shape
+    price, forward, strike, t, rate, is_call = (x.ravel() for x in arrays)
+    df = np.exp(-rate * t)
+    intrinsic = np.where(is_call, df * np.maximum(forward - strike, 0.0), df * np.maximum(strike - forward, 0.0))
+    upper = np.where(is_call, df * forward, df * strike)
+    result = np.full(price.shape, np.nan)
+    active = np.flatnonzero((price - intrinsic > tol * price) & (price < upper))
+
+    p, f, k, tt, r, c = price[active], forward[active], strike[active], t[active], rate[active], is_call[active]
+    # 초기값: ATM 근사 (Brenner-Subrahmanyam)
+    sigma = np.clip(np.sqrt(2 * np.pi / tt) * p / (df[active] * f), 0.05, 2.0)
+    lo = np.full(len(active), IV_LOWER)
+    hi = np.full(len(active), IV_UPPER)
+    for _ in range(max_iter):
+        model, vega = black76(f, k, tt, r, sigma, c)
+        diff = model - p
+        hi = np.where(diff > 0, sigma, hi)
+        lo = np.where(diff < 0, sigma, lo)
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            newton = sigma - diff / vega
+        sigma = np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+        pending = (np.abs(diff) > tol * p) & (hi - lo > IV_SIGMA_TOLERANCE)
+        if pending.all():
+            continue
+        result[active] = sigma
+        if not pending.any():
+            break
+        active, p, f, k, tt, r, c = active[pending], p[pending], f[pending], k[pending], tt[pending], r[pending], c[pending]
+        sigma, lo, hi = sigma[pending], lo[pending], hi[pending]
+    else:
+        result[active] = sigma
+    solved = np.flatnonzero(~np.isnan(result))
+    # 탐색 범위 안에 해가 없어 경계에 멈춘 옵션(가격 오차가 남음)과 vega 가 거의 0 인 옵션은 nan
+    model, vega = black76(forward[solved], strike[solved], t[solved], rate[solved], result[solved], is_call[solved])
+    unsolved = ~(np.abs(model - price[solved]) <= tol * price[solved] + vega * IV_SIGMA_TOLERANCE) | ~(vega >= IV_MIN_VEGA)
+    result[solved[unsolved]] = np.nan
+    return result.reshape(shape)
+
+
+def option_greeks(price, forward, strike, t, rate, is_call):
+    # 내재변동성과 delta, gamma, vega (변동성 1%p 당), theta (1일 당). 인자는 모두 broadcast 가능한 배열
+    iv = implied_volatility(price, forward, strike, t, rate, is_call)
+    sqrt_t = np.sqrt(t)
+    sig_sqrt_t = iv * sqrt_t
+    d1 = (np.log(forward / strike) + 0.5 * sig_sqrt_t * sig_sqrt_t) / sig_sqrt_t
+    df = np.exp(-rate * t)
+    n_d1 = norm_pdf(d1)
+    cdf_d1 = norm_cdf(d1)
+    delta = np.where(is_call, df * cdf_d1, -df * (1.0 - cdf_d1))
+    gamma = df * n_d1 / (forward * sig_sqrt_t)
+    vega = df * forward * n_d1 * sqrt_t / 100
+    theta = (-df * forward * n_d1 * iv / (2 * sqrt_t) + rate * price) / DAYS_PER_YEAR
+    return iv, delta, gamma, vega, theta
+
+
+def option_expiry(target_date, market_cls_code=OPTION_BOARD_MONTHLY):
+    # 전광판 target_date 의 최종거래일 장 종료 시각 (휴장일은 반영하지 않음)
+    # 월물 YYYYMM: 둘째 목요일, 위클리 YYMMWW: 그 달의 WW 번째 목요일 (월요일물은 월요일)
+    if market_cls_code in (OPTION_BOARD_WEEKLY_THU, OPTION_BOARD_WEEKLY_MON):
+        year, month, nth = 2000 + int(target_date[:2]), int(target_date[2:4]), int(target_date[4:6])
+        weekday = 0 if market_cls_code == OPTION_BOARD_WEEKLY_MON else 3
+    else:
+        year, month, nth = int(target_date[:4]), int(target_date[4:6]), 2
+        weekday = 3
+    first = datetime.date(year, month, 1)
+    day = first + datetime.timedelta(days=(weekday - first.weekday()) % 7 + 7 * (nth - 1))
+    return datetime.datetime(day.year, day.month, day.day, *EXPIRY_HOUR)
+
+
+def time_to_expiry(expiry, now=None):
+    now = now or datetime.datetime.now()
+    return max((expiry - now).total_seconds() / (DAYS_PER_YEAR * 24 * 3600), MIN_TIME_TO_EXPIRY)
+
+
+class OptionChain:
+    def __init__(self, strikes, call_prices, put_prices, expiry, call_codes=None, put_codes=None,
+                 forward=None, rate=DEFAULT_RISK_FREE_RATE, now=None, compute=True):
+        order = np.argsort(strikes)
+        self.strikes = np.asarray(strikes, dtype=np.float64)[order]
+        n = len(self.strikes)
+        # [CALL, PUT] x 행사가
+        self.prices = np.vstack([np.asarray(call_prices, dtype=np.float64)[order], np.asarray(put_prices, dtype=np.float64)[order]])
+        self.codes = np.vstack([
+            np.asarray(call_codes if call_codes is not None else [''] * n, dtype=object)[order],
+            np.asarray(put_codes if put_codes is not None else [''] * n, dtype=object)[order],
+        ])
+        self._is_call = np.array([[True], [False]])
+        self._strike_index = {code: i for row in self.codes for i, code in enumerate(row) if code}
+        self.expiry = expiry
+        self.rate = rate
+        self.t = time_to_expiry(expiry, now)
+        self.iv = np.full((2, n), np.nan)
+        self.delta = np.full((2, n), np.nan)
+        self.gamma = np.full((2, n), np.nan)
+        self.vega = np.full((2, n), np.nan)
+        self.theta = np.full((2, n), np.nan)
+        self._fixed_forward = forward is not None
+        self.forward = float(forward) if forward is not None else self.implied_forward()
+        if compute:
+            self.compute()
+
+    @classmethod
+    def from_board(cls, output1, output2, expiry, **kwargs):
+        # 전광판 응답 (콜 output1, 풋 output2) 으로 생성. 양쪽에 모두 있는 행사가만 사용
+        calls = {float(row['acpr']): row for row in output1}
+        puts = {float(row['acpr']): row for row in output2}
+        strikes = [k for k in calls if k in puts]
+        return cls(
+            strikes,
+            [_to_price(calls[k]['optn_prpr']) for k in strikes],
+            [_to_price(puts[k]['optn_prpr']) for k in strikes],
+            expiry,
+            call_codes=[calls[k]['optn_shrn_iscd'] for k in strikes],
+            put_codes=[puts[k]['optn_shrn_iscd'] for k in strikes],
+            **kwargs,
+        )
+
+    def __len__(self):
+        return len(self.strikes)
+
+    def discount(self):
+        return np.exp(-self.rate * self.t)
+
+    def locate(self, code):
+        # 종목코드 -> (CALL/PUT, 행사가 위치), 없으면 None
+        i = self._strike_index.get(code)
+        if i is None:
+            return None
+        return (CALL if self.codes[CALL, i] == code else PUT), i
+
+    def implied_forward(self):
+        # 콜/풋 가격 차이가 가장 작은 행사가들에서 F = K + (C - P) / DF 의 중앙값
+        c, p = self.prices
+        ok = np.flatnonzero((c > 0) & (p > 0))
+        if not len(ok):
+            return np.nan
+        nearest = ok[np.argsort(np.abs(c[ok] - p[ok]))[:PARITY_FORWARD_STRIKES]]
+        return float(np.median(self.strikes[nearest] + (c[nearest] - p[nearest]) / self.discount()))
+
+    def set_forward(self, forward):
+        # 기초자산 선물가격 변경 (None 이면 parity 추정값 사용). 전체 재계산은 compute() 로
+        self._fixed_forward = forward is not None
+        self.forward = float(forward) if forward is not None else self.implied_forward()
+
+    def compute(self, index=None, now=None):
+        # index (행사가 위치 배열) 의 내재변동성과 greeks 계산. None 이면 전체
+        if now is not None:
+            self.t = time_to_expiry(self.expiry, now)
+        if index is None:
+            index = slice(None)
+        self._set_greeks(index, option_greeks(self.prices[:, index], self.forward, self.strikes[index], self.t, self.rate, self._is_call))
+
+    def _set_greeks(self, index, greeks):
+        self.iv[:, index], self.delta[:, index], self.gamma[:, index], self.vega[:, index], self.theta[:, index] = greeks
+
+    def update_prices(self, index, call_prices=None, put_prices=None, forward_tolerance=0.0):
+        # 일부 행사가 가격 변경 후 그 행사가만 재계산 (선물가격을 주지 않았으면 parity 추정값도 갱신)
+        # 추정 선물가격이 forward_tolerance 보다 크게 바뀌면 전체를 재계산하고 True 반환
+        if call_prices is not None:
+            self.prices[CALL, index] = call_prices
+        if put_prices is not None:
+            self.prices[PUT, index] = put_prices
+        if not self._fixed_forward:
+            forward = self.implied_forward()
+            if abs(forward - self.forward) > forward_tolerance or (np.isnan(self.forward) and not np.isnan(forward)):
+                self.forward = forward
+                self.compute()
+                return True
+        self.compute(index)
+        return False
+
+    def parity_residual(self):
+        # C - P - DF * (F - K), 0 에서 멀수록 parity 에서 벗어남 (가격이 없는 행사가는 nan)
+        c, p = self.prices
+        residual = c - p - self.discount() * (self.forward - self.strikes)
+        return np.where((c > 0) & (p > 0), residual, np.nan)
+
+    def parity_violations(self, tolerance=PARITY_TOLERANCE):
+        df = self.to_frame()
+        return df[df['parity_residual'].abs() > tolerance]
+
+    def atm_index(self):
+        return int(np.argmin(np.abs(self.strikes - self.forward)))
+
+    def atm_iv(self):
+        # ATM 행사가의 콜/풋 내재변동성 평균
+        i = self.atm_index()
+        return float(np.nanmean(self.iv[:, i])) if not np.all(np.isnan(self.iv[:, i])) else np.nan
+
+    def to_frame(self):
+        data = dict()
+        for side, row in zip(_SIDES, (CALL, PUT)):
+            data[f'{side}_code'] = self.codes[row]
+            data[f'{side}_price'] = self.prices[row]
+            data[f'{side}_iv'] = self.iv[row]
+            data[f'{side}_delta'] = self.delta[row]
+            data[f'{side}_gamma'] = self.gamma[row]
+            data[f'{side}_vega'] = self.vega[row]
+            data[f'{side}_theta'] = self.theta[row]
+        data['parity_residual'] = self.parity_residual()
+        return pd.DataFrame(data, index=pd.Index(self.strikes, name='strike'))
+
+
+def _to_price(text):
+    # 체결이 없는 옵션은 0 -> nan
+    value = float(text or 0)
+    return value if value > 0 else np.nan
+
+
+def fetch_option_chains(korea_invest_api, expiries, forward=None, rate=DEFAULT_RISK_FREE_RATE, now=None, max_workers=DEFAULT_BULK_WORKERS):
+    # 여러 만기의 전광판을 동시에 조회해서 {(target_date, market_cls_code): OptionChain} 반환
+    # expiries: [(target_date, market_cls_code)], forward: 선물가격 (숫자 또는 {만기 key: 숫자}, None 이면 parity 추정)
+    expiries = [tuple(expiry) for expiry in expiries]
+    requests_by_key = {key: korea_invest_api._option_board_request(*key) for key in expiries}
+    outputs, errors = korea_invest_api._fetch_many(requests_by_key, ('output1', 'output2'), max_workers=max_workers)
+    for key, error in errors.items():
+        logger.info(f"옵션 전광판 조회 실패 {key}: {error}")
+
+    chains = dict()
+    for key in expiries:
+        if key not in outputs:
+            continue
+        output1, output2 = outputs[key]
+        key_forward = forward.get(key) if isinstance(forward, dict) else forward
+        chains[key] = OptionChain.from_board(
+            output1, output2, option_expiry(*key), forward=key_forward, rate=rate, now=now, compute=False,
+        )
+    compute_chains(chains)
+    return chains
+
+
+def compute_chains(chains, now=None):
+    # 여러 OptionChain 을 배열 하나로 합쳐 한 번에 재계산 (만기별로 compute() 를 부르는 것보다 빠름)
+    chains = list(chains.values()) if isinstance(chains, dict) else list(chains)
+    if not chains:
+        return
+    for chain in chains:
+        if now is not None:
+            chain.t = time_to_expiry(chain.expiry, now)
+    sizes = [len(chain) for chain in chains]
+    greeks = option_greeks(
+        np.hstack([chain.prices for chain in chains]),
+        np.repeat([chain.forward for chain in chains], sizes),
+        np.concatenate([chain.strikes for chain in chains]),
+        np.repeat([chain.t for chain in chains], sizes),
+        np.repeat([chain.rate for chain in chains], sizes),
+        chains[0]._is_call,
+    )
+    offsets = np.cumsum([0] + sizes)
+    for chain, start, end in zip(chains, offsets[:-1], offsets[1:]):
+        chain._set_greeks(slice(None), [values[:, start:end] for values in greeks])
+
+
+def term_structure(chains):
+    # 만기별 선물가격, ATM 내재변동성 (만기 순서)
+    rows = []
+    for key, chain in chains.items():
+        rows.append({
+            'target_date': key[0], 'market_cls_code': key[1], 'expiry': chain.expiry, 't': chain.t,
+            'forward': chain.forward, 'atm_strike': chain.strikes[chain.atm_index()] if len(chain) else np.nan,
+            'atm_iv': chain.atm_iv() if len(chain) else np.nan, 'strikes': len(chain),
+        })
+    if not rows:
+        return pd.DataFrame()
+    return pd.DataFrame(rows).sort_values('expiry').set_index(['target_date', 'market_cls_code'])
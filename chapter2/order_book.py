@@ -0,0 +1,146 @@
+import numpy as np
+import pandas as pd
+from loguru import logger
+
+from tick_parser import to_float
+
+
+# 종목별 10단계 호가창을 메모리에 유지 (get_hoga_info 반복 호출 대신 실시간 호가 H0UNASP0 사용)
+# 시작할 때 get_hoga_info 결과로 채우고, 이후 실시간 호가가 올 때마다 같은 배열을 덮어쓴다.
+# 최우선 호가, 스프레드, 잔량 불균형, 수량별 평균 체결가를 새 배열을 만들지 않고 계산한다.
+#
+# 사용 예)
+#     books = OrderBookManager()
+#     books.seed(korea_invest_api, ['005930', '000660'])
+#     realtime.add_callback('H0UNASP0', books.on_message)
+#     await realtime.subscribe_many('H0UNASP0', ['005930', '000660'])
+#     book = books.get_book('005930')
+#     book.spread(), book.imbalance(), book.vwap(1000)
+
+BOOK_LEVELS = 10
+ASKING_PRICE_TR_ID = 'H0UNASP0'
+_BOOK_FIELD_START = 3  # H0UNASP0 레코드에서 매도호가1 위치 (매도호가, 매수호가, 매도잔량, 매수잔량 각 10개, 총매도잔량, 총매수잔량)
+_BOOK_FIELD_END = _BOOK_FIELD_START + BOOK_LEVELS * 4 + 2
+
+
+class OrderBook:
+    def __init__(self, code):
+        self.code = code
+        # [매도호가 10, 매수호가 10, 매도잔량 10, 매수잔량 10, 총매도잔량, 총매수잔량] 를 배열 하나에 두고 view 로 나눠 쓴다
+        self._data = np.zeros(BOOK_LEVELS * 4 + 2)
+        self.ask_price = self._data[0:BOOK_LEVELS]
+        self.bid_price = self._data[BOOK_LEVELS:BOOK_LEVELS * 2]
+        self.ask_qty = self._data[BOOK_LEVELS * 2:BOOK_LEVELS * 3]
+        self.bid_qty = self._data[BOOK_LEVELS * 3:BOOK_LEVELS * 4]
+        self._totals = self._data[BOOK_LEVELS * 4:]
+        self._cum_qty = np.empty(BOOK_LEVELS)  # vwap 계산용 작업 공간
+        self.time = ''  # 호가 시간 HHMMSS
+        self.update_count = 0  # 실시간 호가 반영 횟수
+
+    def seed(self, output1):
+        # get_hoga_info 결과(output1)로 초기화. 이미 실시간 호가를 받았으면 그게 더 최신이므로 건너뛴다.
+        if self.update_count or not output1:
+            return False
+        for i in range(BOOK_LEVELS):
+            self.ask_price[i] = float(output1[f'askp{i + 1}'])
+            self.bid_price[i] = float(output1[f'bidp{i + 1}'])
+            self.ask_qty[i] = float(output1[f'askp_rsqn{i + 1}'])
+            self.bid_qty[i] = float(output1[f'bidp_rsqn{i + 1}'])
+        self._totals[0] = float(output1['total_askp_rsqn'])
+        self._totals[1] = float(output1['total_bidp_rsqn'])
+        self.time = output1.get('aspr_acpt_hour', '')
+        return True
+
+    def update_fields(self, fields, base=0):
+        # H0UNASP0 레코드 하나 반영 (fields[base] 가 종목코드)
+        values = fields[base + _BOOK_FIELD_START:base + _BOOK_FIELD_END]
+        try:
+            self._data[:] = values
+        except ValueError:
+            self._data[:] = [to_float(x) for x in values]
+        self.time = fields[base + 1]
+        self.update_count += 1
+
+    def best_ask(self):
+        return self.ask_price[0]
+
+    def best_bid(self):
+        return self.bid_price[0]
+
+    def spread(self):
+        return self.ask_price[0] - self.bid_price[0]
+
+    def mid_price(self):
+        return (self.ask_price[0] + self.bid_price[0]) / 2
+
+    @property
+    def total_ask_qty(self):
+        return self._totals[0]
+
+    @property
+    def total_bid_qty(self):
+        return self._totals[1]
+
+    def imbalance(self, levels=None):
+        # 잔량 불균형 (매수잔량 - 매도잔량) / (매수잔량 + 매도잔량), -1 ~ 1
+        # levels 를 주지 않으면 총잔량 기준 (O(1)), 주면 1~levels 호가 기준
+        if levels is None:
+            bid, ask = self._totals[1], self._totals[0]
+        else:
+            bid, ask = self.bid_qty[:levels].sum(), self.ask_qty[:levels].sum()
+        total = bid + ask
+        return (bid - ask) / total if total else 0.0
+
+    def vwap(self, qty, is_buy=True):
+        # qty 만큼 시장가로 체결한다고 할 때의 평균 체결가 (매수는 매도호가, 매도는 매수호가를 소진)
+        # 10단계 잔량으로 부족하면 nan
+        prices, qtys = (self.ask_price, self.ask_qty) if is_buy else (self.bid_price, self.bid_qty)
+        if qty <= 0:
+            return prices[0]
+        cum_qty = np.cumsum(qtys, out=self._cum_qty)
+        level = int(cum_qty.searchsorted(qty))
+        if level >= BOOK_LEVELS:
+            return np.nan
+        filled = cum_qty[level - 1] if level else 0.0
+        cost = prices[:level].dot(qtys[:level]) + (qty - filled) * prices[level]
+        return cost / qty
+
+    def to_frame(self):
+        # 확인용 DataFrame (새로 만들어 반환)
+        return pd.DataFrame({
+            '매도잔량': self.ask_qty, '매도호가': self.ask_price, '매수호가': self.bid_price, '매수잔량': self.bid_qty,
+        }, index=range(1, BOOK_LEVELS + 1))
+
+
+class OrderBookManager:
+    def __init__(self):
+        self._books = dict()
+
+    def get_book(self, code):
+        book = self._books.get(code)
+        if book is None:
+            book = OrderBook(code)
+            self._books[code] = book
+        return book
+
+    def codes(self):
+        return list(self._books)
+
+    def seed(self, korea_invest_api, codes):
+        # 여러 종목의 호가를 REST 로 동시에 조회해서 초기값으로 사용. 실패한 종목 {code: 오류 메시지} 반환
+        requests_by_key = {code: korea_invest_api._hoga_info_request(code) for code in codes}
+        outputs, errors = korea_invest_api._fetch_many(requests_by_key, 'output1')
+        for code, output1 in outputs.items():
+            self.get_book(code).seed(output1)
+        for code, error in errors.items():
+            logger.info(f"호가 초기화 실패 {code}: {error}")
+        return errors
+
+    def on_message(self, message):
+        # KoreaInvestRealtime 의 callback 으로 사용 (RealtimeMessage)
+        if message.tr_id != ASKING_PRICE_TR_ID:
+            return
+        fields = message.data.split('^')
+        n = len(fields) // message.count
+        for base in range(0, n * message.count, n):
+            self.get_book(fields[base]).update_fields(fields, base)
@@ -0,0 +1,453 @@
+import asyncio
+import datetime
+import threading
+
+import pandas as pd
+from loguru import logger
+
+from realtime import FILL_NOTICE_FIELDS, parse_fill_message
+
+
+# 주문번호(odno) 별 주문 상태를 메모리에 유지
+# - do_order / overseas_do_order / future_options_do_order 의 접수 응답으로 주문을 등록하고
+#   실시간 체결통보(H0STCNI0 / H0GSCNI0 / H0IFCNI0)로 접수/체결/정정/취소/거부 상태를 갱신한다
+# - 체결 여부 확인에 get_orders / get_my_complete 등 REST 목록 조회를 반복하지 않는다 (상태 조회는 dict 조회 한 번)
+# - 재접속했을 때와 느린 주기 타이머에서만 REST 로 당일 주문을 조회해서 빠진 통보를 맞춘다
+#
+# 사용 예)
+#     orders = OrderManager(korea_invest_api)
+#     for tr_id in ('H0STCNI0', 'H0GSCNI0', 'H0IFCNI0'):
+#         realtime.add_callback(tr_id, orders.on_message)
+#     realtime.add_connect_callback(orders.on_connect)
+#     asyncio.create_task(orders.run_reconcile_timer())
+#     order = orders.do_order('005930', 10, 70000)
+#     orders.status(order.odno), orders.open_orders('005930')
+
+ORDER_ACKED = 'acked'  # 접수 응답 받음 (체결통보 전)
+ORDER_ACCEPTED = 'accepted'  # 체결통보로 접수 확인
+ORDER_PARTIAL = 'partial'  # 일부 체결
+ORDER_FILLED = 'filled'  # 전량 체결
+ORDER_CANCELLED = 'cancelled'  # 취소 (일부 체결 후 잔량 취소 포함)
+ORDER_REJECTED = 'rejected'  # 거부
+ORDER_REPLACED = 'replaced'  # 정정되어 잔량이 새 주문번호로 옮겨감
+FINAL_ORDER_STATUSES = frozenset((ORDER_FILLED, ORDER_CANCELLED, ORDER_REJECTED, ORDER_REPLACED))
+
+DOMESTIC = 'domestic'
+OVERSEAS = 'overseas'
+FUTURE_OPTION = 'future_option'
+FILL_NOTICE_MARKETS = {
+    'H0STCNI0': DOMESTIC, 'H0STCNI9': DOMESTIC,
+    'H0GSCNI0': OVERSEAS, 'H0GSCNI9': OVERSEAS,
+    'H0IFCNI0': FUTURE_OPTION, 'H0IFCNI9': FUTURE_OPTION,
+}
+DEFAULT_RECONCILE_INTERVAL = 60.0  # REST 대사 주기 (초). 체결통보가 기본이므로 길게 잡는다
+DEFAULT_OVERSEAS_EXCHANGES = ('NASD', 'NYSE', 'AMEX')  # 해외주식 대사 때 항상 조회하는 거래소 (주문한 거래소는 추가된다)
+
+
+def order_key(order_no):
+    # REST 응답과 체결통보의 주문번호 자릿수(앞의 0)가 달라도 같은 key 가 되도록
+    return order_no.lstrip('0') or '0'
+
+
+class OrderState:
+    __slots__ = (
+        'odno', 'orig_odno', 'market', 'code', 'is_buy', 'order_qty', 'order_price',
+        'filled_qty', 'filled_amount', 'status', 'order_time', 'created', 'updated',
+    )
+
+    def __init__(self, odno, market, code='', is_buy=None, order_qty=0, order_price=0.0, orig_odno='', order_time=''):
+        self.odno = odno
+        self.orig_odno = orig_odno  # 정정/취소 주문이면 원주문번호
+        self.market = market
+        self.code = code
+        self.is_buy = is_buy
+        self.order_qty = order_qty
+        self.order_price = order_price
+        self.filled_qty = 0
+        self.filled_amount = 0.0
+        self.status = ORDER_ACKED
+        self.order_time = order_time
+        self.created = datetime.datetime.now()  # 대사 조회 시작일
+        self.updated = self.created
+
+    @property
+    def remaining_qty(self):
+        if self.status in FINAL_ORDER_STATUSES:
+            return 0
+        return max(self.order_qty - self.filled_qty, 0)
+
+    @property
+    def avg_price(self):
+        return self.filled_amount / self.filled_qty if self.filled_qty else 0.0
+
+    @property
+    def is_open(self):
+        return self.status not in FINAL_ORDER_STATUSES
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__} | {'avg_price': self.avg_price}
+
+    def __repr__(self):
+        return f"OrderState({self.odno}, {self.code}, {self.status}, {self.filled_qty}/{self.order_qty} @ {self.avg_price:g})"
+
+
+class OrderManager:
+    def __init__(self, korea_invest_api=None):
+        self.api = korea_invest_api  # 주문 전송과 REST 대사용 (없으면 체결통보만 반영)
+        self._orders = dict()  # order_key -> OrderState
+        self._open = dict()  # 종목코드 -> {order_key: OrderState}, 미체결 주문만
+        self._lock = threading.RLock()  # 접수 응답은 주문 thread, 체결통보는 event loop 에서 온다
+        self._listeners = []
+        self._pending = None  # 대사하는 동안 받은 체결통보
+        self._exchanges = set(DEFAULT_OVERSEAS_EXCHANGES)  # 해외주식 대사 때 조회할 거래소
+
+    def add_listener(self, callback):
+        # callback(OrderState): 주문 상태나 체결 수량이 바뀔 때 호출
+        self._listeners.append(callback)
+
+    def _emit(self, order):
+        for callback in self._listeners:
+            try:
+                callback(order)
+            except Exception as e:
+                logger.exception(f"order listener exception: {e!r}")
+
+    # 상태 조회 (O(1))
+    def get(self, order_no):
+        return self._orders.get(order_key(order_no))
+
+    def status(self, order_no):
+        order = self._orders.get(order_key(order_no))
+        return None if order is None else order.status
+
+    def is_filled(self, order_no):
+        return self.status(order_no) == ORDER_FILLED
+
+    def open_orders(self, code=None):
+        # 미체결 주문 목록 (code 를 주면 그 종목만)
+        with self._lock:
+            if code is not None:
+                return list(self._open.get(code, dict()).values())
+            return [order for orders in self._open.values() for order in orders.values()]
+
+    def __len__(self):
+        return len(self._orders)
+
+    def to_frame(self):
+        # 확인용 DataFrame (주문번호 index)
+        with self._lock:
+            rows = [order.to_dict() for order in self._orders.values()]
+        if not rows:
+            return pd.DataFrame(columns=list(OrderState.__slots__) + ['avg_price']).set_index('odno')
+        return pd.DataFrame(rows).set_index('odno')
+
+    def _set_status(self, order, status):
+        order.status = status
+        order.updated = datetime.datetime.now()
+        key = order_key(order.odno)
+        if status in FINAL_ORDER_STATUSES:
+            orders = self._open.get(order.code)
+            if orders is not None:
+                orders.pop(key, None)
+                if not orders:
+                    del self._open[order.code]
+        else:
+            self._open.setdefault(order.code, dict())[key] = order
+
+    def _cancel_qty(self, order, cancel_qty):
+        # 미체결 주문의 잔량 중 cancel_qty 가 취소됨. 잔량이 모두 취소되면 취소 상태로, 일부면 주문수량을 줄인다
+        if cancel_qty >= order.remaining_qty:
+            self._set_status(order, ORDER_CANCELLED)
+        else:
+            order.order_qty -= cancel_qty
+            order.updated = datetime.datetime.now()
+
+    def _get_or_create(self, order_no, market, code, is_buy, order_qty, order_price, orig_order_no='', order_time=''):
+        # 접수 응답과 체결통보 중 먼저 온 쪽이 주문을 만들고, 나중에 온 쪽은 비어 있는 값만 채운다
+        key = order_key(order_no)
+        order = self._orders.get(key)
+        if order is None:
+            order = OrderState(order_no, market, code, is_buy, order_qty, order_price, orig_order_no, order_time)
+            self._orders[key] = order
+            self._set_status(order, ORDER_ACKED)
+            return order, True
+        order.market = order.market or market
+        if not order.code and code:
+            # 종목코드 없이 미체결 목록에 들어갔으면 종목코드 아래로 옮긴다
+            orders = self._open.get(order.code)
+            if orders is not None and orders.pop(key, None) is not None:
+                if not orders:
+                    del self._open[order.code]
+                self._open.setdefault(code, dict())[key] = order
+            order.code = code
+        if order.is_buy is None:
+            order.is_buy = is_buy
+        order.order_qty = order.order_qty or order_qty
+        order.order_price = order.order_price or order_price
+        order.orig_odno = order.orig_odno or orig_order_no
+        order.order_time = order.order_time or order_time
+        return order, False
+
+    # 주문 접수 응답
+    def record_ack(self, t1, market, code, order_qty, order_price, is_buy):
+        # 주문 응답(APIResponse, 실패는 None) 으로 주문 등록. 등록한 OrderState 반환 (실패하면 None)
+        if t1 is None or not t1.is_ok():
+            return None
+        output = t1.get_body().output
+        with self._lock:
+            order, created = self._get_or_create(
+                output['ODNO'], market, code, is_buy, int(order_qty), float(order_price or 0), order_time=output.get('ORD_TMD', ''),
+            )
+        if created:
+            self._emit(order)
+        return order
+
+    def do_order(self, stock_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00", exchange="KRX"):
+        t1 = self.api.do_order(stock_code, order_qty, order_price, prd_code, buy_flag, order_type, exchange)
+        return self.record_ack(t1, DOMESTIC, stock_code, order_qty, order_price, buy_flag)
+
+    def overseas_do_order(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00"):
+        self._exchanges.add(exchange_code)
+        t1 = self.api.overseas_do_order(stock_code, exchange_code, order_qty, order_price, prd_code, buy_flag, order_type)
+        return self.record_ack(t1, OVERSEAS, stock_code, order_qty, order_price, buy_flag)
+
+    def future_options_do_order(self, product_code, order_qty, order_price=0, is_buy_order=True, prd_code="03", order_type="04"):
+        t1 = self.api.future_options_do_order(product_code, order_qty, order_price, is_buy_order, prd_code, order_type)
+        return self.record_ack(t1, FUTURE_OPTION, product_code, order_qty, order_price, is_buy_order)
+
+    # 체결통보
+    def on_message(self, message):
+        # KoreaInvestRealtime 의 callback 으로 사용 (복호화된 체결통보 RealtimeMessage)
+        if message.tr_id not in FILL_NOTICE_FIELDS:
+            return
+        if self._pending is not None:
+            self._pending.append(message)
+            return
+        for record in parse_fill_message(message):
+            self.on_fill(record)
+
+    def on_fill(self, record):
+        # FillRecord 하나 반영. 바뀐 주문 목록 반환
+        market = FILL_NOTICE_MARKETS.get(record.tr_id, '')
+        changed = []
+        with self._lock:
+            if record.rejected:
+                order, _ = self._get_or_create(
+                    record.order_no, market, record.code, record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                )
+                self._set_status(order, ORDER_REJECTED)
+                changed.append(order)
+            elif record.filled:
+                order, _ = self._get_or_create(
+                    record.order_no, market, record.code, record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                )
+                order.filled_qty += record.fill_qty
+                order.filled_amount += record.fill_qty * record.fill_price
+                if order.order_qty and order.filled_qty >= order.order_qty and (order.is_open or order.status == ORDER_CANCELLED):
+                    # 취소 확인보다 늦게 온 체결로 전량 체결된 경우도 체결로 바꾼다
+                    self._set_status(order, ORDER_FILLED)
+                elif order.is_open:
+                    self._set_status(order, ORDER_PARTIAL)
+                changed.append(order)
+            elif record.accept_type == '3':
+                # IOC/FOK 잔량 취소: 그 주문의 남은 수량이 모두 취소된다
+                order, _ = self._get_or_create(
+                    record.order_no, market, record.code, record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                )
+                if order.is_open:
+                    self._cancel_qty(order, order.remaining_qty)
+                changed.append(order)
+            elif record.revise_type == '2':
+                # 취소: 접수 단계(ACPT_YN 1)에서는 아직 체결될 수 있으므로 확인(ACPT_YN 2) 통보에서만 원주문 수량을 줄인다
+                # 일부 수량 취소면 원주문은 남은 수량으로 계속 미체결
+                if record.accept_type == '2':
+                    target = self._orders.get(order_key(record.orig_order_no))
+                    if target is None:
+                        target, _ = self._get_or_create(
+                            record.order_no, market, record.code, record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                        )
+                        cancel_qty = target.order_qty
+                    else:
+                        cancel_qty = record.order_qty or target.remaining_qty
+                    if target.is_open:
+                        self._cancel_qty(target, cancel_qty)
+                    changed.append(target)
+            elif record.revise_type == '1':
+                # 정정 접수: 원주문 잔량이 새 주문번호로 옮겨간다
+                original = self._orders.get(order_key(record.orig_order_no))
+                if original is not None and original.is_open:
+                    self._set_status(original, ORDER_REPLACED)
+                    changed.append(original)
+                order, _ = self._get_or_create(
+                    record.order_no, market, record.code or (original.code if original else ''),
+                    record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                )
+                if order.status == ORDER_ACKED:
+                    self._set_status(order, ORDER_ACCEPTED)
+                changed.append(order)
+            else:
+                # 신규 접수 확인 (다른 경로로 낸 주문도 여기서 등록된다)
+                order, _ = self._get_or_create(
+                    record.order_no, market, record.code, record.is_buy, record.order_qty, record.order_price, record.orig_order_no,
+                )
+                if order.status == ORDER_ACKED:
+                    self._set_status(order, ORDER_ACCEPTED)
+                changed.append(order)
+        for order in changed:
+            self._emit(order)
+        return changed
+
+    # REST 대사
+    def _apply_snapshot(self, order_no, market, code, is_buy, order_qty, order_price, filled_qty, avg_price, cancelled, orig_order_no=''):
+        # REST 조회 결과 한 건으로 빠진 체결통보를 채운다. 바뀌었으면 OrderState, 아니면 None
+        # 조회하는 동안에도 체결통보가 반영되므로 체결 수량은 늘리기만 하고, 끝난 주문의 상태는 바꾸지 않는다
+        order, created = self._get_or_create(order_no, market, code, is_buy, order_qty, order_price, orig_order_no)
+        if not order.is_open:
+            return order if created else None
+        if order_qty:
+            order.order_qty = order_qty
+        before = (order.status, order.filled_qty)
+        if filled_qty > order.filled_qty:
+            if avg_price:
+                order.filled_amount = filled_qty * avg_price
+            else:
+                order.filled_amount += (filled_qty - order.filled_qty) * order.order_price
+            order.filled_qty = filled_qty
+        filled_qty = order.filled_qty
+        if cancelled:
+            status = ORDER_CANCELLED
+        elif order.order_qty and filled_qty >= order.order_qty:
+            status = ORDER_FILLED
+        elif filled_qty:
+            status = ORDER_PARTIAL
+        else:
+            status = order.status if order.status != ORDER_ACKED else ORDER_ACCEPTED
+        if status != order.status:
+            self._set_status(order, status)
+        return order if created or (order.status, order.filled_qty) != before else None
+
+    # 대사 조회: since(YYYYMMDD) 부터 오늘까지의 전체 주문 (체결/미체결/취소). row 는 _apply_snapshot 인자 순서
+    # 중간 페이지 실패 등으로 목록이 빠짐없지 않으면 None (그 시장은 대사하지 않는다)
+    def _fetch_domestic(self, since):
+        # 국내주식 주문 체결 내역 (get_my_complete 와 같은 조회, DataFrame 으로 바꾸지 않고 row 를 그대로 사용)
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        url, tr_id, params = self.api._my_complete_request(since, today, '01')
+        t1 = self.api._url_fetch_complete(url, tr_id, params, ('output1',))
+        if t1 is None or not t1.is_ok():
+            return None
+        return [
+            (row['odno'], DOMESTIC, row['pdno'], row['sll_buy_dvsn_cd'] == '02', int(row['ord_qty'] or 0),
+             float(row['ord_unpr'] or 0), int(row['tot_ccld_qty'] or 0), float(row['avg_prvs'] or 0),
+             row['cncl_yn'] == 'Y', row['orgn_odno'])
+            for row in (t1.get_body().output1 or [])
+        ]
+
+    def _fetch_overseas(self, since):
+        # 거래소별 해외주식 주문체결내역 (CCLD_NCCS_DVSN 00: 체결/미체결 전체)
+        # 정정/취소 주문은 따로 주문번호를 받으므로, 그 원주문과 거부된 주문은 잔량이 없는 취소로 본다
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        rows = dict()
+        for exchange_code in sorted(self._exchanges):
+            url, tr_id, params = self.api._overseas_order_history_request(since, today, exchange_code, '00')
+            t1 = self.api._url_fetch_complete(url, tr_id, params)
+            if t1 is None or not t1.is_ok():
+                return None
+            for row in (t1.get_body().output or []):
+                rows[row['odno']] = row
+        closed = {
+            order_key(row['orgn_odno']) for row in rows.values()
+            if row.get('rvse_cncl_dvsn') in ('01', '02') and row.get('orgn_odno') and not row.get('rjct_rson')
+        }
+        return [
+            (row['odno'], OVERSEAS, row['pdno'], row['sll_buy_dvsn_cd'] == '02', int(float(row['ft_ord_qty'] or 0)),
+             float(row['ft_ord_unpr3'] or 0), int(float(row['ft_ccld_qty'] or 0)), float(row['ft_ccld_unpr3'] or 0),
+             order_key(row['odno']) in closed or bool(row.get('rjct_rson')), row.get('orgn_odno', ''))
+            for row in rows.values() if row.get('rvse_cncl_dvsn') != '02'
+        ]
+
+    def _fetch_future_option(self, since):
+        # 선물옵션 주문체결내역 (CCLD_NCCS_DVSN 00: 체결/미체결 전체)
+        # 잔량(qty)이 0 인데 전량 체결되지 않은 주문은 취소(정정/거부 포함)로 본다. 취소 주문 row 는 원주문에 반영되어 있으므로 뺀다
+        today = datetime.datetime.now().strftime('%Y%m%d')
+        url, tr_id, params = self.api._future_option_orders_request(since, today, '00')
+        t1 = self.api._url_fetch_complete(url, tr_id, params, ('output1',))
+        if t1 is None or not t1.is_ok():
+            return None
+        snapshots = []
+        for row in (t1.get_body().output1 or []):
+            side = row.get('trad_dvsn_name') or ''
+            if not side.startswith(('매수', '매도')) or '취소' in (row.get('rvse_cncl_dvsn_name') or ''):
+                continue
+            qty, filled = int(float(row['ord_qty'] or 0)), int(float(row.get('tot_ccld_qty') or 0))
+            remaining = int(float(row.get('qty') or 0))
+            snapshots.append((
+                row['odno'], FUTURE_OPTION, row['pdno'], side.startswith('매수'), qty, float(row.get('ord_idx4') or 0),
+                filled, float(row.get('avg_idx') or 0), remaining == 0 and filled < qty, row.get('orgn_odno', ''),
+            ))
+        return snapshots
+
+    def reconcile(self, markets=None):
+        # REST 로 주문을 조회해서 상태를 맞춘다. 바뀐 주문 개수 반환
+        # markets 를 주지 않으면 미체결 주문이 있는 시장만, 가장 오래된 미체결 주문의 날짜부터 조회한다
+        # 전체 주문 조회에도 없는 미체결 주문은 (조회 시작 전에 만든 것만) 끝난 것으로 보고 취소 처리한다
+        if self.api is None:
+            return 0
+        open_orders = self.open_orders()
+        if markets is None:
+            markets = {order.market for order in open_orders}
+        fetchers = {DOMESTIC: self._fetch_domestic, OVERSEAS: self._fetch_overseas, FUTURE_OPTION: self._fetch_future_option}
+        started = datetime.datetime.now()
+        snapshots = []
+        fetched = dict()  # market -> 조회된 order_key
+        for market in markets:
+            if market not in fetchers:
+                continue
+            since = min((order.created for order in open_orders if order.market == market), default=started)
+            rows = fetchers[market](since.strftime('%Y%m%d'))
+            if rows is None:
+                logger.info(f"주문 대사 조회 실패: {market}")
+                continue
+            snapshots.extend(rows)
+            fetched[market] = {order_key(row[0]) for row in rows}
+        changed = []
+        with self._lock:
+            for row in snapshots:
+                order = self._apply_snapshot(*row)
+                if order is not None:
+                    changed.append(order)
+            for order in self.open_orders():
+                keys = fetched.get(order.market)
+                if keys is not None and order_key(order.odno) not in keys and order.created < started:
+                    self._set_status(order, ORDER_CANCELLED)
+                    changed.append(order)
+        for order in changed:
+            self._emit(order)
+        return len(changed)
+
+    async def on_connect(self, reconnected):
+        # KoreaInvestRealtime 의 connect callback 으로 사용. 재접속이면 끊긴 동안 놓친 체결통보를 REST 로 맞춘다.
+        # 조회는 thread 에서 하고, 그동안 들어온 체결통보는 모아 두었다가 대사 후 순서대로 반영한다.
+        # (connect callback 은 task 로 실행되므로 조회하는 동안에도 수신은 계속된다)
+        if not reconnected or self.api is None or not self._orders:
+            return
+        self._pending = []
+        try:
+            count = await asyncio.to_thread(self.reconcile, {order.market for order in self._orders.values()})
+            logger.info(f"주문 대사: {count}건 변경")
+        finally:
+            pending, self._pending = self._pending, None
+            for message in pending:
+                self.on_message(message)
+
+    async def run_reconcile_timer(self, interval=DEFAULT_RECONCILE_INTERVAL):
+        # interval 초마다 미체결 주문이 있을 때만 REST 대사 (task 를 cancel 할 때까지)
+        while True:
+            await asyncio.sleep(interval)
+            if not self._open or self._pending is not None:
+                continue
+            try:
+                count = await asyncio.to_thread(self.reconcile)
+                if count:
+                    logger.info(f"주문 대사: {count}건 변경")
+            except Exception as e:
+                logger.exception(f"order reconcile exception: {e!r}")
@@ -0,0 +1,280 @@
+import asyncio
+import inspect
+from collections import namedtuple
+
+import websockets
+from loguru import logger
+
+from utils import AESCBCDecryptor, SubscriptionRegistry, json_loads
+
+
+# 실시간(웹소켓) 시세/체결통보 수신 클라이언트
+# - (tr_id, tr_key) 별 등록 상태를 보관하고, 세션당 등록 개수 제한을 넘지 않게 한다
+# - PINGPONG 에 응답한다
+# - 연결이 끊어지면 다시 접속해서 등록했던 항목을 모두 다시 등록한다
+# - 수신한 데이터는 tr_id 별로 등록한 callback 에 전달한다
+#
+# 사용 예)
+#     realtime = KoreaInvestRealtime(env.get_full_config())
+#     realtime.add_callback('H0UNCNT0', lambda msg: print(msg.tr_id, split_records(msg)))
+#     await realtime.subscribe('H0UNCNT0', '005930')
+#     await realtime.run()
+
+WS_MAX_SUBSCRIPTIONS = 41  # 세션(접속키)당 실시간 등록 가능 개수
+WS_RECONNECT_DELAY = 1.0  # 재접속 대기 시작값 (초), 실패할 때마다 2배
+WS_MAX_RECONNECT_DELAY = 30.0
+
+# 실시간 데이터 한 건. data 는 '^' 로 구분된 필드 문자열 (count 건의 레코드가 이어져 있음)
+RealtimeMessage = namedtuple('RealtimeMessage', ['tr_id', 'count', 'data'])
+
+# 체결통보 한 건 (접수/정정/취소/거부 통보와 체결 통보)
+# is_buy: 매수 여부, revise_type: 정정구분 ('0' 정상, '1' 정정, '2' 취소), filled: 체결 통보 여부
+# rejected: 거부 여부, accept_type: 접수구분 ('1' 주문접수, '2' 확인, '3' 취소(IOC/FOK))
+FillRecord = namedtuple('FillRecord', [
+    'tr_id', 'order_no', 'orig_order_no', 'is_buy', 'revise_type', 'code', 'fill_qty', 'fill_price',
+    'fill_time', 'rejected', 'filled', 'accept_type', 'order_qty', 'order_price',
+])
+
+# 체결통보 tr_id 별 필드 위치: (주문번호, 원주문번호, 매도매수구분, 정정구분, 종목코드, 체결수량, 체결단가,
+#                              체결시간, 거부여부, 체결여부, 접수여부, 주문수량, 주문가격)  위치가 None 이면 제공 안 됨
+_DOMESTIC_FILL_FIELDS = (2, 3, 4, 5, 8, 9, 10, 11, 12, 13, 14, 16, 22)
+_OVERSEAS_FILL_FIELDS = (2, 3, 4, 5, 7, 8, 9, 10, 11, 12, 13, 15, None)
+_FUTURE_OPTION_FILL_FIELDS = (2, 3, 4, 5, 7, 8, 9, 10, 11, 12, 13, 15, 21)
+FILL_NOTICE_FIELDS = {
+    'H0STCNI0': _DOMESTIC_FILL_FIELDS,  # 국내주식
+    'H0STCNI9': _DOMESTIC_FILL_FIELDS,  # 국내주식 (모의)
+    'H0GSCNI0': _OVERSEAS_FILL_FIELDS,  # 해외주식
+    'H0GSCNI9': _OVERSEAS_FILL_FIELDS,  # 해외주식 (모의)
+    'H0IFCNI0': _FUTURE_OPTION_FILL_FIELDS,  # 선물옵션
+    'H0IFCNI9': _FUTURE_OPTION_FILL_FIELDS,  # 선물옵션 (모의)
+}
+
+
+def split_records(message):
+    # '^' 구분 필드를 레코드 단위 리스트로 나눔 (레코드당 필드 수 = 전체 필드 수 / count)
+    fields = message.data.split('^')
+    if message.count <= 1:
+        return [fields]
+    n = len(fields) // message.count
+    return [fields[i * n:(i + 1) * n] for i in range(message.count)]
+
+
+def _to_int(text):
+    return int(text) if text else 0
+
+
+def _to_float(text):
+    return float(text) if text else 0.0
+
+
+def parse_fill_records(tr_id, data, count=1):
+    # 복호화된 체결통보 평문을 FillRecord 리스트로 변환
+    fields = data.split('^')
+    n = len(fields) // count
+    order_no, orig_order_no, side, revise, code, qty, price, hour, refuse, fill, accept, order_qty, order_price = FILL_NOTICE_FIELDS[tr_id]
+    records = []
+    for base in range(0, n * count, n):
+        f = fields[base:base + n]
+        records.append(FillRecord(
+            tr_id, f[order_no], f[orig_order_no], f[side] == '02', f[revise], f[code],
+            _to_int(f[qty]), _to_float(f[price]), f[hour], f[refuse] == '1', f[fill] == '2', f[accept],
+            _to_int(f[order_qty]), _to_float(f[order_price]) if order_price is not None and order_price < n else 0.0,
+        ))
+    return records
+
+
+def parse_fill_message(message):
+    # RealtimeMessage(체결통보) -> FillRecord 리스트
+    return parse_fill_records(message.tr_id, message.data, message.count)
+
+
+class KoreaInvestRealtime:
+    def __init__(self, cfg, max_subscriptions=WS_MAX_SUBSCRIPTIONS):
+        self.htsid = cfg['htsid']
+        self.registry = SubscriptionRegistry(cfg['websocket_approval_key'], cfg['custtype'], self.htsid)
+        self.websocket_url = cfg['using_websocket_url']
+        self.max_subscriptions = max_subscriptions
+        self._subscriptions = dict()  # (tr_id, tr_key) -> None, 등록 순서대로 재등록
+        self._callbacks = dict()  # tr_id -> [callback]
+        self._connect_callbacks = []
+        self._connect_tasks = []  # 실행 중인 connect callback task
+        self._decryptors = dict()  # 체결통보 tr_id -> AESCBCDecryptor
+        self._ws = None
+        self._closed = False
+
+    @property
+    def subscriptions(self):
+        return list(self._subscriptions)
+
+    def is_connected(self):
+        return self._ws is not None
+
+    def add_callback(self, tr_id, callback):
+        # callback(RealtimeMessage). 일반 함수, 코루틴 함수 모두 가능
+        self._callbacks.setdefault(tr_id, []).append(callback)
+
+    def remove_callback(self, tr_id, callback):
+        callbacks = self._callbacks.get(tr_id, [])
+        if callback in callbacks:
+            callbacks.remove(callback)
+
+    def add_connect_callback(self, callback):
+        # callback(reconnected). 접속(재접속)해서 등록을 마친 뒤 호출. 끊긴 동안의 데이터 보충 등에 사용
+        # 수신(PINGPONG 응답 포함)을 막지 않도록 task 로 실행하며, 첫 await 전까지는 수신보다 먼저 실행된다.
+        # 앞 접속의 callback 이 아직 끝나지 않았으면 취소하고 새로 실행한다.
+        self._connect_callbacks.append(callback)
+
+    async def subscribe(self, tr_id, tr_key=None):
+        # 등록 성공(또는 이미 등록) 시 True, 등록 개수 제한에 걸리면 False
+        # 체결통보는 tr_key 가 HTS ID 이므로 생략 가능
+        return await self.subscribe_many(tr_id, [tr_key]) == 1
+
+    async def unsubscribe(self, tr_id, tr_key=None):
+        await self.unsubscribe_many(tr_id, [tr_key])
+
+    async def subscribe_many(self, tr_id, tr_keys):
+        # 여러 종목 등록. 등록된(이미 등록 포함) 개수 반환 (개수 제한을 넘는 종목은 등록하지 않음)
+        keys = []
+        count = 0
+        for tr_key in tr_keys:
+            key = (tr_id, tr_key or self.htsid)
+            if key in self._subscriptions:
+                count += 1
+                continue
+            if len(self._subscriptions) >= self.max_subscriptions:
+                logger.info(f"실시간 등록 개수 제한({self.max_subscriptions}) 초과: {key}")
+                break
+            self._subscriptions[key] = None
+            keys.append(key[1])
+            count += 1
+        await self._send_requests(tr_id, keys, '1')
+        return count
+
+    async def unsubscribe_many(self, tr_id, tr_keys):
+        keys = []
+        for tr_key in tr_keys:
+            key = (tr_id, tr_key or self.htsid)
+            if key in self._subscriptions:
+                del self._subscriptions[key]
+                keys.append(key[1])
+        await self._send_requests(tr_id, keys, '2')
+
+    async def rotate(self, tr_id, tr_keys):
+        # tr_id 의 등록 종목을 tr_keys 로 교체 (빠지는 종목을 먼저 해제해서 자리를 만든다)
+        tr_keys = list(tr_keys)
+        wanted = set(tr_keys)
+        await self.unsubscribe_many(tr_id, [key for t, key in self._subscriptions if t == tr_id and key not in wanted])
+        return await self.subscribe_many(tr_id, tr_keys)
+
+    async def _send_requests(self, tr_id, tr_keys, tr_type):
+        # 연결이 없으면 보내지 않는다. (접속 후 _resubscribe 에서 등록)
+        ws = self._ws
+        if ws is None or not tr_keys:
+            return
+        try:
+            for frame in self.registry.frames_bytes(tr_id, tr_keys, tr_type):
+                await ws.send(frame, text=True)
+        except websockets.ConnectionClosed:
+            pass
+
+    async def _resubscribe(self):
+        keys_by_tr_id = dict()
+        for tr_id, tr_key in self._subscriptions:
+            keys_by_tr_id.setdefault(tr_id, []).append(tr_key)
+        for tr_id, tr_keys in keys_by_tr_id.items():
+            await self._send_requests(tr_id, tr_keys, '1')
+
+    async def _call(self, callback, *args):
+        try:
+            result = callback(*args)
+            if inspect.isawaitable(result):
+                await result
+        except Exception as e:
+            logger.exception(f"callback exception: {e!r}")
+
+    async def _on_message(self, raw):
+        # 실시간 데이터: '0|H0UNCNT0|001|필드^필드^...' (첫 자리 1 이면 암호화된 데이터)
+        # 그 외는 JSON (PINGPONG, 등록/해제 응답)
+        if raw[0] in ('0', '1'):
+            encrypted, tr_id, count, data = raw.split('|', 3)
+            if encrypted == '1':
+                decryptor = self._decryptors.get(tr_id)
+                if decryptor is None:
+                    logger.info(f"복호화 키 없음: {tr_id}")
+                    return
+                data = decryptor.decrypt(data)
+            message = RealtimeMessage(tr_id, int(count), data)
+            for callback in self._callbacks.get(tr_id, ()):
+                await self._call(callback, message)
+            return
+
+        response = json_loads(raw)
+        header = response['header']
+        tr_id = header['tr_id']
+        if tr_id == 'PINGPONG':
+            await self._ws.send(raw)
+            return
+
+        body = response.get('body', {})
+        if body.get('rt_cd') == '0':
+            output = body.get('output')
+            if output and output.get('key'):
+                # 체결통보 등록 응답에 복호화 key, iv 가 온다
+                self._decryptors[tr_id] = AESCBCDecryptor(output['key'], output['iv'])
+            logger.debug(f"[{tr_id}] {header.get('tr_key')} {body.get('msg1')}")
+        else:
+            logger.info(f"[{tr_id}] {header.get('tr_key')} {body.get('msg_cd')} {body.get('msg1')}")
+            # 이미 등록된 경우가 아니면 등록 실패이므로 상태에서 뺀다
+            if 'ALREADY' not in body.get('msg1', ''):
+                self._subscriptions.pop((tr_id, header.get('tr_key')), None)
+
+    async def run(self):
+        # close() 를 호출할 때까지 접속을 유지한다
+        delay = WS_RECONNECT_DELAY
+        connected_before = False
+        while not self._closed:
+            try:
+                async with websockets.connect(self.websocket_url, ping_interval=None) as ws:
+                    self._ws = ws
+                    delay = WS_RECONNECT_DELAY
+                    logger.info(f"웹소켓 접속: {self.websocket_url}")
+                    await self._resubscribe()
+                    await self._start_connect_callbacks(connected_before)
+                    connected_before = True
+                    async for raw in ws:
+                        try:
+                            await self._on_message(raw)
+                        except websockets.WebSocketException:
+                            raise
+                        except Exception as e:
+                            # 잘못된 frame 하나 때문에 수신을 멈추지 않는다
+                            logger.exception(f"message exception: {e!r} | {raw[:200]!r}")
+            except (websockets.WebSocketException, OSError) as e:
+                logger.info(f"웹소켓 연결 끊김: {e!r}")
+            finally:
+                self._ws = None
+            if self._closed:
+                break
+            logger.info(f"{delay:.0f}초 후 재접속")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WS_MAX_RECONNECT_DELAY)
+
+    async def _cancel_connect_callbacks(self):
+        tasks, self._connect_tasks = self._connect_tasks, []
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)  # 취소된 callback 의 정리(finally)가 끝날 때까지
+
+    async def _start_connect_callbacks(self, reconnected):
+        await self._cancel_connect_callbacks()
+        self._connect_tasks = [asyncio.create_task(self._call(callback, reconnected)) for callback in self._connect_callbacks]
+        # 각 callback 이 첫 await 까지 (수신 데이터 버퍼 준비 등) 실행된 뒤 수신을 시작한다
+        await asyncio.sleep(0)
+
+    async def close(self):
+        self._closed = True
+        await self._cancel_connect_callbacks()
+        ws = self._ws
+        if ws is not None:
+            await ws.close()
@@ -0,0 +1,188 @@
+import numpy as np
+
+
+# 실시간 체결/호가 데이터를 종목별 NumPy ring buffer 에 바로 기록하는 parser
+# 실시간 데이터 한 건('0|H0UNCNT0|003|...')에는 '^' 로 구분된 레코드가 여러 개 이어져 있을 수 있다.
+# 필요한 필드만 전체 레코드에서 한 번에 골라 float64 배열 하나로 변환하고, 종목별 buffer 에 행 단위로 복사한다.
+# 틱마다 dict 나 DataFrame 을 만들지 않는다.
+#
+# 사용 예)
+#     parser = TickParser()
+#     realtime.add_callback('H0UNCNT0', parser.on_message)
+#     ...
+#     prices = parser.get_buffer('H0UNCNT0', '005930').column('price', 100)  # 최근 100 건 (view)
+
+DEFAULT_TICK_CAPACITY = 4096  # 종목별 보관 건수
+
+# tr_id 별 (열 이름, 필드 위치)
+# 시간(HHMMSS)과 수량도 float64 로 저장한다. (2^53 이하 정수는 그대로 표현됨)
+TICK_LAYOUTS = {
+    # 국내주식 실시간체결가 (통합)
+    'H0UNCNT0': (
+        ('time', 1), ('price', 2), ('change', 4), ('open', 7), ('high', 8), ('low', 9),
+        ('ask', 10), ('bid', 11), ('volume', 12), ('cum_volume', 13),
+    ),
+    # 국내주식 실시간호가 (통합): 매도호가 1~10, 매수호가 1~10, 매도잔량 1~10, 매수잔량 1~10
+    # 필드 위치가 연속이면 레코드별 slice 로 변환하므로 시간구분코드(2)도 포함
+    'H0UNASP0': (
+        (('time', 1), ('hour_cls_code', 2))
+        + tuple((f'ask{i}', 2 + i) for i in range(1, 11))
+        + tuple((f'bid{i}', 12 + i) for i in range(1, 11))
+        + tuple((f'ask_qty{i}', 22 + i) for i in range(1, 11))
+        + tuple((f'bid_qty{i}', 32 + i) for i in range(1, 11))
+        + (('total_ask_qty', 43), ('total_bid_qty', 44))
+    ),
+    # 지수선물 실시간체결가
+    'H0IFCNT0': (
+        ('time', 1), ('price', 5), ('open', 6), ('high', 7), ('low', 8), ('volume', 9), ('cum_volume', 10),
+        ('open_interest', 18), ('ask', 34), ('bid', 35), ('ask_qty', 36), ('bid_qty', 37),
+    ),
+    # 지수옵션 실시간체결가
+    'H0IOCNT0': (
+        ('time', 1), ('price', 2), ('open', 6), ('high', 7), ('low', 8), ('volume', 9), ('cum_volume', 10),
+        ('open_interest', 13), ('delta', 28), ('gamma', 29), ('vega', 30), ('theta', 31), ('rho', 32),
+        ('iv', 33), ('ask', 41), ('bid', 42), ('ask_qty', 43), ('bid_qty', 44),
+    ),
+}
+
+
+class TickRingBuffer:
+    # 종목 하나의 최근 capacity 건을 (건수, 열) float64 배열로 보관
+    # 같은 행을 [i] 와 [i + capacity] 두 곳에 써 두므로 최근 n 건은 항상 연속된 구간이 되어 복사 없이 view 로 읽을 수 있다.
+    # view 는 이후 기록으로 내용이 바뀌므로 보관하려면 copy() 해서 사용한다.
+    def __init__(self, columns, capacity=DEFAULT_TICK_CAPACITY):
+        self.columns = tuple(columns)
+        self.capacity = capacity
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        self._data = np.full((capacity * 2, len(self.columns)), np.nan)
+        self._count = 0  # 지금까지 기록한 전체 건수
+
+    def __len__(self):
+        return min(self._count, self.capacity)
+
+    @property
+    def total_count(self):
+        return self._count
+
+    def append_rows(self, rows):
+        # rows: (k, 열 개수) 배열
+        cap = self.capacity
+        k = len(rows)
+        if k > cap:
+            self._count += k - cap
+            rows = rows[-cap:]
+            k = cap
+        pos = self._count % cap
+        first = min(k, cap - pos)
+        data = self._data
+        data[pos:pos + first] = rows[:first]
+        data[pos + cap:pos + cap + first] = rows[:first]
+        rest = k - first
+        if rest:
+            data[:rest] = rows[first:]
+            data[cap:cap + rest] = rows[first:]
+        self._count += k
+
+    def view(self, n=None):
+        # 최근 n 건 (오래된 것부터), shape (n, 열 개수)
+        size = len(self)
+        n = size if n is None else min(n, size)
+        end = self._count % self.capacity + self.capacity
+        return self._data[end - n:end]
+
+    def column(self, name, n=None):
+        # 열 하나의 최근 n 건 (view)
+        return self.view(n)[:, self._column_index[name]]
+
+    def last(self, name=None):
+        # 마지막 한 건. name 을 주면 그 열 값만
+        if self._count == 0:
+            return None
+        row = self.view(1)[0]
+        return row if name is None else row[self._column_index[name]]
+
+
+class TickParser:
+    def __init__(self, capacity=DEFAULT_TICK_CAPACITY, layouts=TICK_LAYOUTS):
+        self.capacity = capacity
+        self._columns = dict()  # tr_id -> 열 이름
+        self._field_index = dict()  # tr_id -> 필드 위치
+        self._field_span = dict()  # 필드 위치가 연속인 tr_id -> (시작, 끝)
+        for tr_id, layout in layouts.items():
+            index = tuple(i for _, i in layout)
+            self._columns[tr_id] = tuple(name for name, _ in layout)
+            self._field_index[tr_id] = index
+            if index == tuple(range(index[0], index[0] + len(index))):
+                self._field_span[tr_id] = (index[0], index[0] + len(index))
+        self._offsets = dict()  # (tr_id, 레코드 수, 레코드당 필드 수) -> 골라낼 필드 위치 전체
+        self._buffers = dict()  # (tr_id, 종목코드) -> TickRingBuffer
+
+    def get_buffer(self, tr_id, code):
+        buffer = self._buffers.get((tr_id, code))
+        if buffer is None:
+            buffer = TickRingBuffer(self._columns[tr_id], self.capacity)
+            self._buffers[(tr_id, code)] = buffer
+        return buffer
+
+    def codes(self, tr_id):
+        return [code for t, code in self._buffers if t == tr_id]
+
+    def _get_offsets(self, tr_id, count, n):
+        key = (tr_id, count, n)
+        offsets = self._offsets.get(key)
+        if offsets is None:
+            offsets = [base + i for base in range(0, count * n, n) for i in self._field_index[tr_id]]
+            self._offsets[key] = offsets
+        return offsets
+
+    def parse(self, raw):
+        # 웹소켓에서 받은 문자열을 그대로 처리. 처리한 tr_id 반환 (대상이 아니면 None)
+        if raw[0] != '0':
+            return None
+        _, tr_id, count, data = raw.split('|', 3)
+        if tr_id not in self._field_index:
+            return None
+        self.parse_records(tr_id, int(count), data)
+        return tr_id
+
+    def on_message(self, message):
+        # KoreaInvestRealtime 의 callback 으로 사용 (RealtimeMessage)
+        if message.tr_id in self._field_index:
+            self.parse_records(message.tr_id, message.count, message.data)
+
+    def parse_records(self, tr_id, count, data):
+        fields = data.split('^')
+        n = len(fields) // count
+        span = self._field_span.get(tr_id)
+        if span is not None:
+            # 레코드별 slice 를 (count, 열 개수) 배열로 바로 변환
+            selected = [fields[base + span[0]:base + span[1]] for base in range(0, count * n, n)]
+            try:
+                rows = np.array(selected, dtype=np.float64)
+            except ValueError:
+                # 빈 값 등 숫자가 아닌 필드는 nan
+                rows = np.array([[to_float(x) for x in record] for record in selected], dtype=np.float64)
+        else:
+            offsets = self._get_offsets(tr_id, count, n)
+            try:
+                values = np.array([fields[i] for i in offsets], dtype=np.float64)
+            except ValueError:
+                values = np.array([to_float(fields[i]) for i in offsets], dtype=np.float64)
+            rows = values.reshape(count, len(offsets) // count)
+
+        if count == 1:
+            self.get_buffer(tr_id, fields[0]).append_rows(rows)
+            return
+        codes = fields[0::n][:count]
+        if codes.count(codes[0]) == count:
+            self.get_buffer(tr_id, codes[0]).append_rows(rows)
+            return
+        for code in dict.fromkeys(codes):
+            self.get_buffer(tr_id, code).append_rows(rows[[i for i, c in enumerate(codes) if c == code]])
+
+
+def to_float(text):
+    try:
+        return float(text)
+    except ValueError:
+        return np.nan
@@ -1,22 +1,550 @@
-from collections import namedtuple
+import asyncio
+import bisect
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from operator import itemgetter
 import datetime
+import hashlib
+import os
+import threading
 import time
 from loguru import logger
 import json
 import requests
+from requests.adapters import HTTPAdapter
 import copy
 import yaml
 
 from Crypto.Cipher import AES
 from Crypto.Util.Padding import unpad
 from base64 import b64decode
+import numpy as np
 import pandas as pd
 
+try:
+    import orjson  # 설치되어 있으면 더 빠른 JSON 구현 사용
+except ImportError:
+    orjson = None
+
+
+# JSON 코덱
+# REST 요청/응답 본문과 웹소켓 전송 데이터를 모두 이 함수들로 직렬화/역직렬화한다.
+# orjson 이 있으면 사용하고 없으면 표준 json 으로 동작한다. bytes 를 그대로 주고받아 str <-> bytes 변환을 줄인다.
+if orjson is not None:
+    JSON_BACKEND = 'orjson'
+
+    def json_dumps_bytes(obj):
+        return orjson.dumps(obj)
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode('utf-8')
+
+    def json_loads(data):
+        # str, bytes 모두 입력 가능
+        return orjson.loads(data)
+else:
+    JSON_BACKEND = 'json'
+
+    def json_dumps_bytes(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+    def json_dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+    def json_loads(data):
+        return json.loads(data)
+
+
+def make_ws_send_data(approval_key, custtype, tr_type, tr_id, tr_key):
+    # 실시간 등록/해제 요청 데이터 (tr_type 1: 등록, 2: 해제)
+    return json_dumps({
+        "header": {"approval_key": approval_key, "custtype": custtype, "tr_type": tr_type, "content-type": "utf-8"},
+        "body": {"input": {"tr_id": tr_id, "tr_key": tr_key}},
+    })
+
+
+# 실시간 등록/해제 요청 정의: 구분 -> {cmd: (tr_id, tr_type)}  (tr_type 1: 등록, 2: 해제)
+REALTIME_REQUESTS = {
+    # 1.주식호가, 2.주식호가해제, 3.주식체결, 4.주식체결해제, 5.주식체결통보(고객), 6.주식체결통보해제(고객), 7.주식체결통보(모의), 8.주식체결통보해제(모의)
+    'domestic': {
+        1: ('H0UNASP0', '1'), 2: ('H0UNASP0', '2'), 3: ('H0UNCNT0', '1'), 4: ('H0UNCNT0', '2'),
+        5: ('H0STCNI0', '1'), 6: ('H0STCNI0', '2'), 7: ('H0STCNI9', '1'), 8: ('H0STCNI9', '2'),
+    },
+    'overseas': {
+        1: ('HDFSASP0', '1'), 2: ('HDFSASP0', '2'), 3: ('HDFSCNT0', '1'), 4: ('HDFSCNT0', '2'),
+        5: ('H0GSCNI0', '1'), 6: ('H0GSCNI0', '2'), 7: ('H0GSCNI9', '1'), 8: ('H0GSCNI9', '2'),
+    },
+    # 0.지수옵션체결해제, 1.지수옵션체결, 2.지수옵션호가, 3.지수선물체결, 4.지수옵션호가해제, 5.체결통보(고객), 6.체결통보해제(고객), 7.체결통보(모의), 8.체결통보해제(모의)
+    'future_options': {
+        0: ('H0IOCNT0', '2'), 1: ('H0IOCNT0', '1'), 2: ('H0IOASP0', '1'), 3: ('H0IFCNT0', '1'), 4: ('H0IOASP0', '2'),
+        5: ('H0IFCNI0', '1'), 6: ('H0IFCNI0', '2'), 7: ('H0IFCNI9', '1'), 8: ('H0IFCNI9', '2'),
+    },
+}
+# 체결통보는 tr_key 가 종목코드가 아니라 HTS ID
+REALTIME_NOTICE_TR_IDS = frozenset(['H0STCNI0', 'H0STCNI9', 'H0GSCNI0', 'H0GSCNI9', 'H0IFCNI0', 'H0IFCNI9'])
+
+
+class SubscriptionRegistry:
+    # 실시간 등록/해제 요청 데이터를 (tr_id, tr_type) 별 bytes 템플릿으로 미리 만들어 두고 tr_key 만 채운다.
+    # 웹소켓에는 bytes 그대로 text frame 으로 보낼 수 있다. (websocket.send(data, text=True))
+    def __init__(self, approval_key, custtype, htsid):
+        self.custtype = custtype
+        self.htsid = htsid
+        self.set_approval_key(approval_key)
+
+    def set_approval_key(self, approval_key):
+        # 접속키가 바뀌면 템플릿을 다시 만든다
+        self.approval_key = approval_key
+        self._templates = dict()  # (tr_id, tr_type) -> tr_key 앞부분 bytes
+
+    def _template(self, tr_id, tr_type):
+        template = self._templates.get((tr_id, tr_type))
+        if template is None:
+            frame = make_ws_send_data(self.approval_key, self.custtype, tr_type, tr_id, '')
+            template = frame[:-len('""}}}')].encode('utf-8')
+            self._templates[(tr_id, tr_type)] = template
+        return template
+
+    def frame_bytes(self, tr_id, tr_type, tr_key=None):
+        if tr_id in REALTIME_NOTICE_TR_IDS or tr_key is None:
+            tr_key = self.htsid
+        if tr_key.isascii() and tr_key.isalnum():
+            return self._template(tr_id, tr_type) + b'"' + tr_key.encode('ascii') + b'"}}}'
+        return self._template(tr_id, tr_type) + json_dumps_bytes(tr_key) + b'}}}'
+
+    def frame(self, tr_id, tr_type, tr_key=None):
+        return self.frame_bytes(tr_id, tr_type, tr_key).decode('utf-8')
+
+    def frames_bytes(self, tr_id, tr_keys, tr_type='1'):
+        # 여러 종목 등록(tr_type '1') / 해제('2') 요청
+        return [self.frame_bytes(tr_id, tr_type, tr_key) for tr_key in tr_keys]
+
+    def send_data(self, market, cmd, stockcode=None):
+        # get_send_data 류 함수의 cmd 번호로 요청 데이터 생성 (market: domestic, overseas, future_options)
+        requests_by_cmd = REALTIME_REQUESTS[market]
+        assert cmd in requests_by_cmd, f"Wrong Input Data: {cmd}"
+        tr_id, tr_type = requests_by_cmd[cmd]
+        return self.frame(tr_id, tr_type, stockcode)
+
+
+DEFAULT_HTTP_POOL_SIZE = 10
+DEFAULT_HTTP_TIMEOUT = (3.05, 10.0)  # (connect, read) 초
+
+
+def create_http_session(pool_size=DEFAULT_HTTP_POOL_SIZE):
+    # 커넥션 풀을 가진 keep-alive 세션 생성
+    # 같은 호스트로의 TCP 연결과 TLS 세션을 재사용하므로 요청마다 handshake 를 하지 않는다.
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_http_timeout(cfg):
+    # config 의 http_timeout 값을 requests 의 timeout 인자 형태로 변환
+    # 숫자 하나면 connect/read 공통, [connect, read] 리스트면 각각 적용
+    timeout = cfg.get('http_timeout')
+    if timeout is None:
+        return DEFAULT_HTTP_TIMEOUT
+    if isinstance(timeout, (list, tuple)):
+        return tuple(float(x) for x in timeout)
+    return float(timeout)
+
+
+DEFAULT_CREDENTIAL_CACHE_PATH = '~/.kis_credential_cache.json'
+APPROVAL_KEY_LIFETIME = 24 * 60 * 60  # 웹소켓 접속키 유효기간 (24시간)
+ACCESS_TOKEN_LIFETIME = 24 * 60 * 60  # 접근 토큰 유효기간 (응답에 expires_in 이 없을 때 사용)
+TOKEN_REFRESH_MARGIN = 60 * 60  # 만료 1시간 전부터는 새로 발급
+TOKEN_MIN_REFRESH_INTERVAL = 10  # 발급받은 토큰의 유효기간이 refresh_margin 보다 짧을 때 재발급 최소 간격 (초)
+# 서버가 토큰을 거부할 때 오류 코드 (EGW00121 유효하지 않은 token, EGW00123 기간이 만료된 token)
+TOKEN_ERROR_CODES = ('EGW00121', 'EGW00123')
+
+
+if os.name == 'nt':
+    import msvcrt
+
+    def _lock_file(f):
+        f.seek(0)
+        while True:
+            try:
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:  # LK_LOCK 은 10초 후 포기하므로 다시 시도
+                continue
+
+    def _unlock_file(f):
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+else:
+    import fcntl
+
+    def _lock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+
+    def _unlock_file(f):
+        fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class CredentialCache:
+    # 접근 토큰과 웹소켓 접속키를 (using_url, api_key) 별로 파일에 저장해 프로세스 간 재사용
+    # 토큰 발급(/oauth2/tokenP)은 호출 횟수 제한이 있으므로 재시작할 때마다 새로 받지 않는다.
+    # 여러 프로세스가 동시에 시작해도 lock 파일로 한 프로세스만 발급하도록 한다.
+    def __init__(self, path=DEFAULT_CREDENTIAL_CACHE_PATH, refresh_margin=TOKEN_REFRESH_MARGIN):
+        self.path = os.path.expanduser(path)
+        self.lock_path = self.path + '.lock'
+        self.refresh_margin = refresh_margin
+
+    @staticmethod
+    def make_key(using_url, api_key):
+        # api key 원문은 파일에 남기지 않는다
+        return f"{using_url}|{hashlib.sha256(api_key.encode('utf-8')).hexdigest()[:16]}"
+
+    @contextmanager
+    def _locked(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.lock_path, 'a+') as f:
+            _lock_file(f)
+            try:
+                yield
+            finally:
+                _unlock_file(f)
+
+    def _read(self):
+        try:
+            with open(self.path, encoding='UTF-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return dict()
+
+    def _write(self, data):
+        # 임시 파일에 쓰고 교체하므로 읽는 쪽은 항상 완성된 파일만 본다
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w', encoding='UTF-8') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
+
+    def get_or_issue(self, using_url, api_key, name, issue_func, refresh_margin=None):
+        # 만료까지 refresh_margin 이상 남은 값이 있으면 그대로 사용하고,
+        # 없으면 issue_func() 로 (값, 만료시각 epoch) 을 새로 받아 저장한다.
+        if refresh_margin is None:
+            refresh_margin = self.refresh_margin
+        key = self.make_key(using_url, api_key)
+        with self._locked():
+            data = self._read()
+            entry = data.get(key, dict()).get(name)
+            if entry and entry['expires_at'] - refresh_margin > time.time():
+                return entry['value'], entry['expires_at']
+            value, expires_at = issue_func()
+            data.setdefault(key, dict())[name] = {'value': value, 'expires_at': expires_at}
+            self._write(data)
+            return value, expires_at
+
+    def invalidate(self, using_url, api_key, name=None, value=None):
+        # 서버에서 거부된 값을 지운다. name 이 None 이면 해당 키의 모든 값을 지운다.
+        # value 를 주면 저장된 값이 그 값일 때만 지운다 (다른 프로세스가 이미 새로 발급한 값은 남긴다)
+        key = self.make_key(using_url, api_key)
+        with self._locked():
+            data = self._read()
+            if key not in data:
+                return
+            if name is None:
+                del data[key]
+            elif value is None or data[key].get(name, dict()).get('value') == value:
+                data[key].pop(name, None)
+            else:
+                return
+            self._write(data)
+
+
+# 초당 호출 제한 (KIS 는 실전 초당 20건, 모의 초당 2건 수준. 경계에서 초과하지 않도록 약간 낮게 잡는다)
+# order/quote 는 tr_id 구분별 추가 한도이며 None 이면 total 한도만 적용한다.
+DEFAULT_RATE_LIMITS = {
+    'real': {'total': 18, 'order': None, 'quote': None},
+    'paper': {'total': 1.8, 'order': None, 'quote': None},
+}
+RATE_LIMIT_ERROR_CODE = 'EGW00201'  # 초당 거래건수를 초과하였습니다.
+RATE_LIMIT_RETRY = 3
+RATE_LIMIT_PENALTY = 1.0  # EGW00201 을 받으면 이 시간(초) 동안 전체 요청을 멈춘다
+
+ORDER_REQUEST = 'order'
+QUOTE_REQUEST = 'quote'
+_REQUEST_PRIORITY = {ORDER_REQUEST: 0, QUOTE_REQUEST: 1}  # 숫자가 작을수록 먼저 보낸다
+
+
+def classify_tr_id(tr_id):
+    # 주문/정정/취소 tr_id 는 U 로 끝난다 (TTTC0012U, VTTO1101U 등), 나머지는 조회
+    return ORDER_REQUEST if tr_id.endswith('U') else QUOTE_REQUEST
+
+
+class TokenBucket:
+    # rate 개/초 로 토큰이 차는 bucket. capacity 만큼 몰아서 보낼 수 있다.
+    def __init__(self, rate, capacity=1):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._last = time.monotonic()
+
+    def _refill(self, now):
+        if now > self._last:
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+
+    def wait_time(self, now):
+        # 토큰 하나를 쓸 수 있을 때까지 남은 시간 (0 이면 바로 사용 가능)
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return max(self._last - now, 0.0) + (1 - self._tokens) / self.rate
+
+    def take(self):
+        self._tokens -= 1
+
+    def block(self, now, seconds):
+        # 토큰을 비우고 seconds 동안은 채우지 않는다
+        self._tokens = 0.0
+        self._last = max(self._last, now + seconds)
+
+
+class RateLimiter:
+    # 한 app key 로 나가는 모든 요청이 거치는 공용 limiter
+    # 한도를 넘는 호출은 실패시키지 않고 대기열에 세우며, 주문이 조회보다 먼저 나간다.
+    def __init__(self, total_rate, order_rate=None, quote_rate=None, burst=1):
+        self._total = TokenBucket(total_rate, burst)
+        self._buckets = {
+            ORDER_REQUEST: TokenBucket(order_rate, burst) if order_rate else None,
+            QUOTE_REQUEST: TokenBucket(quote_rate, burst) if quote_rate else None,
+        }
+        self._cond = threading.Condition()
+        self._waiters = []  # (priority, seq, kind), 정렬 상태 유지
+        self._seq = 0
+
+    @classmethod
+    def from_config(cls, cfg, is_paper_trading):
+        limits = dict(DEFAULT_RATE_LIMITS['paper' if is_paper_trading else 'real'])
+        limits.update((cfg.get('rate_limit') or dict()).get('paper' if is_paper_trading else 'real') or dict())
+        return cls(limits['total'], limits.get('order'), limits.get('quote'))
+
+    def _class_wait(self, kind, now):
+        bucket = self._buckets[kind]
+        return 0.0 if bucket is None else bucket.wait_time(now)
+
+    def _enqueue(self, kind):
+        self._seq += 1
+        entry = (_REQUEST_PRIORITY[kind], self._seq, kind)
+        bisect.insort(self._waiters, entry)
+        return entry
+
+    def _dequeue(self, entry):
+        self._waiters.remove(entry)
+        self._cond.notify_all()
+
+    def _poll(self, entry):
+        # entry 차례이고 한도가 남아 있으면 토큰을 가져가고 0 을 반환한다.
+        # 아니면 다시 확인할 때까지의 대기 시간 (None 이면 앞선 대기자가 나갈 때까지)
+        # 자기 구분 한도가 남아있는 대기자 중 가장 앞선 대기자만 전체 한도를 가져간다.
+        now = time.monotonic()
+        first_ready = next((w for w in self._waiters if self._class_wait(w[2], now) == 0), None)
+        if first_ready is entry:
+            total_wait = self._total.wait_time(now)
+            if total_wait == 0:
+                self._total.take()
+                bucket = self._buckets[entry[2]]
+                if bucket is not None:
+                    bucket.take()
+            return total_wait
+        elif first_ready is None:
+            return self._class_wait(entry[2], now)
+        return None
+
+    def acquire(self, kind=QUOTE_REQUEST):
+        # 차례가 올 때까지 대기. 대기 순서는 (우선순위, 도착순)
+        with self._cond:
+            entry = self._enqueue(kind)
+            try:
+                while True:
+                    timeout = self._poll(entry)
+                    if timeout == 0:
+                        return
+                    self._cond.wait(timeout)
+            finally:
+                self._dequeue(entry)
+
+    async def acquire_async(self, kind=QUOTE_REQUEST):
+        # 이벤트 루프를 막지 않는 acquire. 스레드 호출자와 같은 대기열을 사용한다.
+        with self._cond:
+            entry = self._enqueue(kind)
+        try:
+            while True:
+                with self._cond:
+                    timeout = self._poll(entry)
+                if timeout == 0:
+                    return
+                if timeout is None:
+                    timeout = 1 / self._total.rate
+                await asyncio.sleep(timeout)
+        finally:
+            with self._cond:
+                self._dequeue(entry)
+
+    def penalize(self, seconds=RATE_LIMIT_PENALTY):
+        # 서버가 EGW00201 을 돌려주면 잠시 전체 요청을 멈춘다
+        with self._cond:
+            self._total.block(time.monotonic(), seconds)
+            self._cond.notify_all()
+
+
+_shared_rate_limiters = dict()
+_shared_rate_limiters_lock = threading.Lock()
+
+
+def get_shared_rate_limiter(cfg, app_key):
+    # 같은 (서버, app key) 를 쓰는 KoreaInvestAPI 들은 하나의 limiter 를 공유한다
+    key = (cfg['using_url'], app_key)
+    with _shared_rate_limiters_lock:
+        limiter = _shared_rate_limiters.get(key)
+        if limiter is None:
+            limiter = RateLimiter.from_config(cfg, cfg['is_paper_trading'])
+            _shared_rate_limiters[key] = limiter
+        return limiter
+
+
+# 조회 응답 캐시 (config 의 response_cache 가 있을 때만 사용)
+# 잘 바뀌지 않는 조회(종목 정보, 조건 목록 등)를 tr_id 별 보관 시간 동안 다시 요청하지 않아 호출 한도를 아낀다.
+# 주문/정정/취소(tr_id 가 U 로 끝남)와 POST 요청은 설정과 관계없이 캐시하지 않는다.
+DEFAULT_RESPONSE_CACHE_SIZE = 1024  # 메모리에 보관하는 최대 응답 수 (넘으면 가장 오래 안 쓴 응답부터 삭제)
+DEFAULT_RESPONSE_CACHE_TTLS = {  # tr_id 별 보관 시간 (초)
+    'CTPF1002R': 24 * 60 * 60,  # 주식 기본 정보
+    'CTPF1702R': 24 * 60 * 60,  # 해외 상품 기본 정보
+    'HHKST03900300': 60 * 60,  # 조건검색 목록
+}
+RESPONSE_CACHE_DISK_MIN_TTL = 60  # 파일에 저장할 때 이보다 남은 시간이 짧은 응답은 제외
+
+
+class BufferedResponse:
+    # 본문을 미리 읽어둔 응답. APIResponse 가 requests.Response 처럼 다룰 수 있게 한다.
+    def __init__(self, status_code, headers, content):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = content
+
+    @property
+    def text(self):
+        return self.content.decode('utf-8', errors='replace')
+
+    def json(self):
+        return json_loads(self.content)
+
+
+class ResponseCache:
+    def __init__(self, ttls=None, max_size=DEFAULT_RESPONSE_CACHE_SIZE, path=''):
+        self.ttls = dict(DEFAULT_RESPONSE_CACHE_TTLS)
+        self.ttls.update(ttls or dict())
+        self.max_size = max_size
+        self.path = os.path.expanduser(path) if path else ''
+        self._entries = OrderedDict()  # key -> (만료시각 epoch, BufferedResponse), 최근 사용이 뒤
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if self.path:
+            self.load()
+
+    @classmethod
+    def from_config(cls, cfg):
+        # config 에 response_cache 가 없으면 None (캐시 사용 안 함)
+        options = cfg.get('response_cache')
+        if options is None:
+            return None
+        options = options or dict()
+        return cls(options.get('ttl'), options.get('max_size', DEFAULT_RESPONSE_CACHE_SIZE), options.get('path', ''))
+
+    def get_ttl(self, tr_id):
+        # 캐시하지 않는 tr_id 는 0
+        if classify_tr_id(tr_id) == ORDER_REQUEST:
+            return 0
+        return self.ttls.get(tr_id, 0)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, ttl, res):
+        response = BufferedResponse(res.status_code, dict(res.headers), res.content)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, response)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, tr_id=None):
+        # tr_id 의 응답을 지운다. None 이면 전체
+        with self._lock:
+            if tr_id is None:
+                self._entries.clear()
+                return
+            marker = f"|{tr_id}|"
+            for key in [k for k in self._entries if marker in k]:
+                del self._entries[key]
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits, 'misses': self.misses, 'size': len(self._entries),
+                'hit_rate': self.hits / total if total else 0.0,
+            }
+
+    def load(self):
+        try:
+            with open(self.path, 'rb') as f:
+                data = json_loads(f.read())
+        except (OSError, ValueError):
+            return
+        now = time.time()
+        with self._lock:
+            for key, (expires_at, status_code, headers, content) in data.items():
+                if expires_at > now:
+                    self._entries[key] = (expires_at, BufferedResponse(status_code, headers, content.encode('utf-8')))
+
+    def save(self):
+        # 남은 시간이 RESPONSE_CACHE_DISK_MIN_TTL 이상인 응답만 파일에 저장 (시세처럼 짧은 응답은 제외)
+        if not self.path:
+            return
+        limit = time.time() + RESPONSE_CACHE_DISK_MIN_TTL
+        with self._lock:
+            data = {
+                key: [expires_at, res.status_code, res.headers, res.content.decode('utf-8')]
+                for key, (expires_at, res) in self._entries.items() if expires_at > limit
+            }
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(json_dumps_bytes(data))
+        os.replace(tmp_path, self.path)
+
 
 class KoreaInvestEnv:
     def __init__(self, cfg):
         self.cfg = cfg
         self.custtype = cfg['custtype']
+        self.session = create_http_session(cfg.get('http_pool_size', DEFAULT_HTTP_POOL_SIZE))
+        self.timeout = get_http_timeout(cfg)
+        cache_path = cfg.get('token_cache_path', DEFAULT_CREDENTIAL_CACHE_PATH)
+        self.credential_cache = CredentialCache(cache_path) if cache_path else None
         self.base_headers = {
             "Content-Type": "application/json",
             "Accept": "text/plain",
@@ -26,18 +554,26 @@ class KoreaInvestEnv:
         is_paper_trading = cfg['is_paper_trading']
         if is_paper_trading:
             using_url = cfg['paper_url']
+            using_websocket_url = cfg['paper_websocket_url']
             api_key = cfg['paper_api_key']
             api_secret_key = cfg['paper_api_secret_key']
             account_num = cfg['paper_stock_account_number']
             future_account_num = cfg['paper_future_account_number']
         else:
             using_url = cfg['url']
+            using_websocket_url = cfg['websocket_url']
             api_key = cfg['api_key']
             api_secret_key = cfg['api_secret_key']
             account_num = cfg['stock_account_number']
             future_account_num = cfg['future_account_number']
-        websocket_approval_key = self.get_websocket_approval_key(using_url, api_key, api_secret_key)
-        account_access_token = self.get_account_access_token(using_url, api_key, api_secret_key)
+        websocket_approval_key, _ = self._get_credential(
+            using_url, api_key, 'approval_key',
+            lambda: (self.get_websocket_approval_key(using_url, api_key, api_secret_key), time.time() + APPROVAL_KEY_LIFETIME),
+        )
+        account_access_token, self.token_expires_at = self._get_credential(
+            using_url, api_key, 'access_token',
+            lambda: self.issue_account_access_token(using_url, api_key, api_secret_key),
+        )
         self.base_headers["authorization"] = account_access_token
         self.base_headers["appkey"] = api_key
         self.base_headers["appsecret"] = api_secret_key
@@ -45,6 +581,10 @@ class KoreaInvestEnv:
         self.cfg['account_num'] = account_num
         self.cfg['future_account_num'] = future_account_num
         self.cfg['using_url'] = using_url
+        self.cfg['using_websocket_url'] = using_websocket_url
+        self.using_url = using_url
+        self.api_key = api_key
+        self.api_secret_key = api_secret_key
     
     def get_base_headers(self):
         return copy.deepcopy(self.base_headers)
@@ -52,8 +592,40 @@ class KoreaInvestEnv:
     def get_full_config(self):
         return copy.deepcopy(self.cfg)
 
+    def _get_credential(self, using_url, api_key, name, issue_func, refresh_margin=None):
+        # 캐시를 쓰지 않으면 매번 발급
+        if self.credential_cache is None:
+            return issue_func()
+        return self.credential_cache.get_or_issue(using_url, api_key, name, issue_func, refresh_margin)
+
+    def refresh_access_token(self, refresh_margin=TOKEN_REFRESH_MARGIN):
+        # 만료가 가까운 접근 토큰을 재발급 (다른 프로세스가 먼저 갱신했다면 캐시 값을 사용)
+        # Output: ("Bearer 토큰", 만료시각 epoch)
+        access_token, expires_at = self._get_credential(
+            self.using_url, self.api_key, 'access_token',
+            lambda: self.issue_account_access_token(self.using_url, self.api_key, self.api_secret_key),
+            refresh_margin,
+        )
+        base_headers = dict(self.base_headers)
+        base_headers["authorization"] = access_token
+        self.base_headers = base_headers
+        self.token_expires_at = expires_at
+        return access_token, expires_at
+
+    def reissue_access_token(self, rejected_token):
+        # 서버가 거부한 접근 토큰을 캐시에서 지우고 다시 발급 (다른 프로세스가 이미 재발급했으면 그 값을 사용)
+        # Output: ("Bearer 토큰", 만료시각 epoch)
+        if self.credential_cache is not None:
+            self.credential_cache.invalidate(self.using_url, self.api_key, 'access_token', rejected_token)
+        return self.refresh_access_token(refresh_margin=0)
+
     def get_account_access_token(self, request_base_url='', api_key='', api_secret_key=''):
         # 계좌에 접근 가능한 토큰 발급
+        return self.issue_account_access_token(request_base_url, api_key, api_secret_key)[0]
+
+    def issue_account_access_token(self, request_base_url='', api_key='', api_secret_key=''):
+        # 계좌에 접근 가능한 토큰 발급
+        # Output: ("Bearer 토큰", 만료시각 epoch)
         p = {
             "grant_type": "client_credentials",
             "appkey": api_key,
@@ -62,35 +634,953 @@ class KoreaInvestEnv:
 
         url = f'{request_base_url}/oauth2/tokenP'
 
-        res = requests.post(url, data=json.dumps(p), headers=self.base_headers)
+        res = self.session.post(url, data=json_dumps_bytes(p), headers=self.base_headers, timeout=self.timeout)
         res.raise_for_status()
-        my_token = res.json()['access_token']
-        return f"Bearer {my_token}"
+        body = json_loads(res.content)
+        expires_at = time.time() + int(body.get('expires_in', ACCESS_TOKEN_LIFETIME))
+        return f"Bearer {body['access_token']}", expires_at
+
+    def get_websocket_approval_key(self, request_base_url='', api_key='', api_secret_key=''):
+        # 웹소켓 접속키 발급
+        headers = {"content-type": "application/json"}
+        body = {
+            "grant_type": "client_credentials",
+            "appkey": api_key,
+            "secretkey": api_secret_key,
+        }
+        URL = f"{request_base_url}/oauth2/Approval"
+        res = self.session.post(URL, headers=headers, data=json_dumps_bytes(body), timeout=self.timeout)
+        approval_key = json_loads(res.content)["approval_key"]
+        return approval_key
+
+
+class TokenManager:
+    # 장시간 실행되는 프로세스에서 접근 토큰이 만료되기 전에 백그라운드 스레드로 재발급하고,
+    # 등록된 KoreaInvestAPI 들의 헤더에 교체한다. 요청 스레드는 재발급을 기다리지 않는다.
+    def __init__(self, env, refresh_margin=TOKEN_REFRESH_MARGIN, retry_interval=60):
+        self.env = env
+        self.refresh_margin = refresh_margin
+        self.retry_interval = retry_interval
+        self._clients = []
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._reissue_lock = threading.Lock()
+        self._refreshed = False  # 시작 후 한 번이라도 재발급했는지
+
+    def register(self, client):
+        # client 는 set_access_token(access_token) 메서드를 가진 객체
+        # KoreaInvestAPI 처럼 on_token_rejected 속성이 있으면 토큰이 거부될 때 reissue 를 호출하게 한다
+        with self._lock:
+            self._clients.append(client)
+        client.set_access_token(self.env.base_headers["authorization"])
+        if hasattr(client, 'on_token_rejected'):
+            client.on_token_rejected = self.reissue
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, name='kis-token-refresh', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def refresh(self):
+        access_token, expires_at = self.env.refresh_access_token(self.refresh_margin)
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            client.set_access_token(access_token)
+        logger.info(f"access token refreshed, expires at {datetime.datetime.fromtimestamp(expires_at)}")
+        return access_token, expires_at
+
+    def reissue(self, rejected_token):
+        # 요청 스레드에서 토큰이 거부되었을 때 호출. 새 토큰 반환
+        # 여러 요청이 동시에 거부되어도 한 번만 재발급하고, 나머지는 이미 바뀐 토큰을 받는다
+        with self._reissue_lock:
+            if self.env.base_headers["authorization"] == rejected_token:
+                access_token, expires_at = self.env.reissue_access_token(rejected_token)
+                logger.info(f"access token rejected, reissued (expires at {datetime.datetime.fromtimestamp(expires_at)})")
+            access_token = self.env.base_headers["authorization"]
+            with self._lock:
+                clients = list(self._clients)
+            for client in clients:
+                client.set_access_token(access_token)
+            return access_token
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            wait_seconds = self.env.token_expires_at - self.refresh_margin - time.time()
+            if wait_seconds <= 0 and self._refreshed:
+                # 서버가 준 유효기간(expires_in)이 refresh_margin 보다 짧으면 바로 다시 만료 임박이 되므로
+                # 남은 시간의 절반마다 재발급한다 (계속 재발급하는 hot loop 방지)
+                wait_seconds = max((self.env.token_expires_at - time.time()) / 2, TOKEN_MIN_REFRESH_INTERVAL)
+            if self._stop_event.wait(max(wait_seconds, 0)):
+                break
+            try:
+                self.refresh()
+                self._refreshed = True
+            except Exception as e:
+                # 발급 실패 시 기존 토큰은 그대로 두고 잠시 후 재시도
+                logger.info(f"token refresh exception: {e}")
+                self._stop_event.wait(self.retry_interval)
+
+
+# 시세 output 중 숫자로 바꾸지 않을 필드 (코드, 여부, 날짜, 이름 등)
+TEXT_FIELD_SUFFIXES = ('_yn', '_code', '_date', '_name', '_isnm', '_cnnm', '_sign', '_iscd')
+TEXT_FIELDS = {'rsym', 'ordy', 'sign', 'stac_month', 'error'}
+DEFAULT_BULK_WORKERS = 8
+DEFAULT_BULK_RETRY = 2
+# 여러 주문을 동시에 보낼 때 worker 수 (실제 전송 속도는 RateLimiter 의 초당 주문 한도를 따른다)
+DEFAULT_BASKET_WORKERS = 8
+ORDER_RESULT_COLUMNS = ['종목코드', '주문번호', '주문시각', 'error', 'attempts', 'elapsed_ms']
+# 옵션 전광판 시장 구분 (FID_COND_MRKT_CLS_CODE)
+OPTION_BOARD_MONTHLY = ''  # 코스피200 월물
+OPTION_BOARD_MINI = 'MKI'  # 미니 코스피200
+OPTION_BOARD_WEEKLY_THU = 'WKI'  # 위클리 (목요일 만기)
+OPTION_BOARD_WEEKLY_MON = 'WKM'  # 위클리 (월요일 만기)
+MAX_CONTINUATION_PAGES = 100  # 연속조회 최대 페이지 수 (무한 반복 방지)
+MULTI_PRICE_BATCH_SIZE = 30  # 관심종목(멀티종목) 시세조회 1회 최대 종목 수
+DAILY_MINUTE_CHART_PAGE_SIZE = 120  # 일별 분봉 조회 1회 최대 분봉 수
+MINUTE_HISTORY_END_HOUR = "153000"  # 일별 분봉을 거슬러 올라가기 시작하는 시각 (장 마감)
+MINUTE_HISTORY_EMPTY_DAYS = 10  # 분봉이 없는 날이 연속으로 이만큼이면 보관 기간을 지난 것으로 보고 중단 (주말/연휴보다 길게)
+# 멀티종목 시세조회 필드 -> 단일종목 현재가(inquire-price) 필드
+MULTI_PRICE_FIELD_MAP = {
+    'inter2_prpr': 'stck_prpr',
+    'inter2_prdy_vrss': 'prdy_vrss',
+    'prdy_vrss_sign': 'prdy_vrss_sign',
+    'prdy_ctrt': 'prdy_ctrt',
+    'acml_vol': 'acml_vol',
+    'acml_tr_pbmn': 'acml_tr_pbmn',
+    'inter2_oprc': 'stck_oprc',
+    'inter2_hgpr': 'stck_hgpr',
+    'inter2_lwpr': 'stck_lwpr',
+    'inter2_mxpr': 'stck_mxpr',
+    'inter2_llam': 'stck_llam',
+    'inter2_sdpr': 'stck_sdpr',
+    'inter2_prdy_clpr': 'stck_prdy_clpr',
+}
+
+
+def make_typed_frame(outputs, errors, index_names):
+    # {key: output dict} 와 {key: 오류 메시지} 를 key 를 index 로 하는 하나의 DataFrame 으로 변환
+    # 코드/여부/날짜 필드를 제외한 나머지는 숫자형으로 변환한다.
+    keys = list(outputs) + [key for key in errors if key not in outputs]
+    df = pd.DataFrame([outputs.get(key, dict()) for key in keys])
+    for col in df.columns:
+        if col not in TEXT_FIELDS and not col.endswith(TEXT_FIELD_SUFFIXES):
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+    df['error'] = [errors.get(key) for key in keys]
+    if len(index_names) == 1:
+        df.index = pd.Index(keys, name=index_names[0])
+    else:
+        df.index = pd.MultiIndex.from_tuples(keys, names=index_names)
+    return df
+
+
+def make_order_result_frame(results, codes, index_name):
+    # _submit_many 결과를 주문별 결과 DataFrame 으로 변환 (key 를 index 로, 요청 순서 유지)
+    # 주문번호/주문시각은 접수 응답의 ODNO/ORD_TMD, 실패한 주문은 error 에 오류 메시지
+    rows = []
+    for key, (t1, error, attempts, elapsed) in results.items():
+        output = t1.get_body().output if error is None else None
+        output = output if isinstance(output, dict) else dict()
+        rows.append((codes.get(key, ''), output.get('ODNO', ''), output.get('ORD_TMD', ''), error, attempts, elapsed))
+    df = pd.DataFrame(rows, columns=ORDER_RESULT_COLUMNS)
+    df.index = pd.Index(list(results), name=index_name)
+    return df
+
+
+class FrameSchema:
+    # 응답 목록(list of dict) 을 DataFrame 으로 바꾸는 정의
+    # fields: (원본 필드, 출력 열 이름, dtype) 목록
+    #   dtype: 'str', 'num' (정수로 표현되면 int64, 아니면 float64. pd.to_numeric 과 같은 결과), 'int', 'float', 'date' (YYYYMMDD)
+    # index: index 로 쓸 출력 열 이름
+    # 필요한 필드만 한 번에 꺼내 열 단위로 변환하므로 전체 응답을 DataFrame 으로 만든 뒤 고르고 바꾸는 것보다 빠르다.
+    def __init__(self, fields, index=None):
+        self.fields = tuple(field for field, _, _ in fields)
+        self.names = tuple(name for _, name, _ in fields)
+        self.dtypes = tuple(dtype for _, _, dtype in fields)
+        self.index = index
+        self._getter = itemgetter(*self.fields)
+        self._empty = self._make_frame([_EMPTY_COLUMNS[dtype] for dtype in self.dtypes])
+
+    def _make_frame(self, columns):
+        df = pd.DataFrame(dict(zip(self.names, columns)), copy=False)
+        if self.index is not None:
+            df.set_index(self.index, inplace=True)
+        return df
+
+    def empty_frame(self):
+        # 조회 결과가 없을 때 쓰는 같은 열/dtype 의 빈 DataFrame (미리 만든 것의 사본)
+        return self._empty.copy()
+
+    def build(self, records):
+        if not records:
+            return self.empty_frame()
+        rows = list(map(self._getter, records))
+        if len(self.fields) == 1:
+            rows = [(value,) for value in rows]
+        columns = [_convert_column(values, dtype) for values, dtype in zip(zip(*rows), self.dtypes)]
+        return self._make_frame(columns)
+
+
+_EMPTY_COLUMNS = {
+    'str': np.array([], dtype=object),
+    'num': np.array([], dtype=np.int64),
+    'int': np.array([], dtype=np.int64),
+    'float': np.array([], dtype=np.float64),
+    'date': np.array([], dtype='datetime64[ns]'),
+}
+
+
+def _convert_column(values, dtype):
+    # 문자열 tuple 하나를 dtype 배열로 변환
+    if dtype == 'str':
+        return np.array(values, dtype=object)
+    if dtype == 'date':
+        return pd.to_datetime(values, format="%Y%m%d")
+    try:
+        if dtype != 'float':
+            try:
+                return np.array(values, dtype=np.int64)
+            except ValueError:
+                if dtype == 'int':
+                    raise
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        # 빈 문자열 등 숫자가 아닌 값이 섞여 있으면 그 값만 nan
+        return pd.to_numeric(pd.Series(values), errors='coerce').to_numpy()
+
+
+# tr_id 별 응답 목록 변환 정의 (모의투자 tr_id 도 같은 정의를 사용)
+FRAME_SCHEMAS = dict()
+
+
+def register_frame_schema(tr_id, schema):
+    FRAME_SCHEMAS[tr_id] = schema
+    if tr_id[0] in ('T', 'J', 'C'):
+        FRAME_SCHEMAS['V' + tr_id[1:]] = schema
+    return schema
+
+
+def get_frame_schema(tr_id):
+    return FRAME_SCHEMAS[tr_id]
+
+
+_OPTION_BOARD_FIELDS = (
+    ('optn_shrn_iscd', '종목코드', 'str'),
+    ('acml_vol', '거래량', 'int'),
+    ('optn_prdy_vrss', '전일대비', 'float'),
+    ('optn_prdy_ctrt', '등락율', 'float'),
+    ('optn_prpr', '현재가', 'float'),
+    ('acpr', '행사가', 'float'),
+)
+
+# 해외주식 잔고
+register_frame_schema('TTTS3012R', FrameSchema([
+    ('ovrs_pdno', '종목코드', 'str'),
+    ('ovrs_excg_cd', '해외거래소코드', 'str'),
+    ('ovrs_item_name', '종목명', 'str'),
+    ('ovrs_cblc_qty', '보유수량', 'num'),
+    ('ord_psbl_qty', '매도가능수량', 'num'),
+    ('pchs_avg_pric', '매입단가', 'num'),
+    ('evlu_pfls_rt', '수익률', 'num'),
+    ('now_pric2', '현재가', 'num'),
+    ('frcr_evlu_pfls_amt', '평가손익', 'num'),
+]))
+# 주식 잔고
+register_frame_schema('TTTC8434R', FrameSchema([
+    ('pdno', '종목코드', 'str'),
+    ('prdt_name', '종목명', 'str'),
+    ('hldg_qty', '보유수량', 'num'),
+    ('ord_psbl_qty', '매도가능수량', 'num'),
+    ('pchs_avg_pric', '매입단가', 'num'),
+    ('evlu_pfls_rt', '수익률', 'num'),
+    ('prpr', '현재가', 'num'),
+    ('bfdy_cprs_icdc', '전일대비', 'num'),
+    ('fltt_rt', '전일대비 등락률', 'num'),
+]))
+# 주식 당일 분봉
+register_frame_schema('FHKST03010200', FrameSchema([
+    ('stck_bsop_date', '일자', 'str'),
+    ('stck_cntg_hour', '시간', 'str'),
+    ('stck_oprc', '시가', 'num'),
+    ('stck_hgpr', '고가', 'num'),
+    ('stck_lwpr', '저가', 'num'),
+    ('stck_prpr', '종가', 'num'),
+]))
+# 조건검색 목록
+register_frame_schema('HHKST03900300', FrameSchema([
+    ('seq', '조건키값', 'str'),
+    ('grp_nm', '그룹명', 'str'),
+    ('condition_nm', '조건명', 'str'),
+]))
+# 조건검색 종목
+register_frame_schema('HHKST03900400', FrameSchema([
+    ('code', '종목코드', 'str'),
+    ('name', '종목명', 'str'),
+    ('price', '현재가', 'num'),
+    ('chgrate', '등락율', 'num'),
+]))
+# 해외주식 조건검색
+register_frame_schema('HHDFS76410000', FrameSchema([
+    ('symb', '종목코드', 'str'),
+    ('name', '종목명', 'str'),
+    ('last', '현재가', 'num'),
+    ('rate', '등락율', 'num'),
+]))
+# 등락률 순위
+register_frame_schema('FHPST01700000', FrameSchema([
+    ('stck_shrn_iscd', '종목코드', 'str'),
+    ('stck_prpr', '현재가', 'str'),
+    ('prdy_ctrt', '전일대비율', 'str'),
+]))
+# 해외주식 미체결
+register_frame_schema('TTTS3018R', FrameSchema([
+    ('odno', 'odno', 'str'),
+    ('pdno', '종목코드', 'str'),
+    ('ft_ord_qty', '주문수량', 'str'),
+    ('ft_ord_unpr3', '주문가격', 'str'),
+    ('ord_tmd', '시간', 'str'),
+    ('ovrs_excg_cd', '거래소코드', 'str'),
+    ('orgn_odno', '원주문번호', 'str'),
+    ('nccs_qty', '주문가능수량', 'str'),
+    ('sll_buy_dvsn_cd', '매도매수구분코드', 'str'),
+    ('sll_buy_dvsn_cd_name', '매도매수구분코드명', 'str'),
+], index='odno'))
+# 해외주식 체결
+register_frame_schema('TTTS3035R', FrameSchema([
+    ('odno', 'odno', 'str'),
+    ('pdno', '종목코드', 'str'),
+    ('ft_ord_qty', '주문수량', 'str'),
+    ('ft_ord_unpr3', '주문가격', 'str'),
+    ('ft_ccld_unpr3', '체결가격', 'str'),
+    ('ft_ccld_qty', '체결수량', 'str'),
+    ('ord_tmd', '시간', 'str'),
+    ('orgn_odno', '원주문번호', 'str'),
+    ('nccs_qty', '주문가능수량', 'str'),
+    ('sll_buy_dvsn_cd', '매도매수구분코드', 'str'),
+    ('sll_buy_dvsn_cd_name', '매도매수구분코드명', 'str'),
+], index='odno'))
+# 정정취소 가능 주문
+register_frame_schema('TTTC8036R', FrameSchema([
+    ('odno', 'odno', 'str'),
+    ('pdno', '종목코드', 'str'),
+    ('ord_qty', '주문수량', 'str'),
+    ('ord_unpr', '주문가격', 'str'),
+    ('ord_tmd', '시간', 'str'),
+    ('ord_gno_brno', '주문점', 'str'),
+    ('orgn_odno', '원주문번호', 'str'),
+    ('psbl_qty', '주문가능수량', 'str'),
+], index='odno'))
+# 일별 주문 체결 (get_my_complete zipFlag=True)
+register_frame_schema('TTTC8001R', FrameSchema([
+    ('odno', 'odno', 'str'),
+    ('ord_dt', 'ord_dt', 'str'),
+    ('orgn_odno', 'orgn_odno', 'str'),
+    ('sll_buy_dvsn_cd_name', 'sll_buy_dvsn_cd_name', 'str'),
+    ('pdno', 'pdno', 'str'),
+    ('ord_qty', 'ord_qty', 'str'),
+    ('ord_unpr', 'ord_unpr', 'str'),
+    ('avg_prvs', 'avg_prvs', 'str'),
+    ('cncl_yn', 'cncl_yn', 'str'),
+    ('tot_ccld_amt', 'tot_ccld_amt', 'str'),
+    ('rmn_qty', 'rmn_qty', 'str'),
+], index='odno'))
+# 주식 일/주/월별 시세 (get_stock_history_by_ohlcv)
+register_frame_schema('FHKST01010400', FrameSchema([
+    ('stck_bsop_date', 'Date', 'date'),
+    ('stck_oprc', 'Open', 'num'),
+    ('stck_hgpr', 'High', 'num'),
+    ('stck_lwpr', 'Low', 'num'),
+    ('stck_clpr', 'Close', 'num'),
+    ('acml_vol', 'Volume', 'num'),
+], index='Date'))
+# 투자자별 매매 동향
+register_frame_schema('FHKST01010900', FrameSchema([
+    ('stck_bsop_date', 'Date', 'date'),
+    ('prsn_ntby_qty', 'PerBuy', 'num'),
+    ('frgn_ntby_qty', 'ForBuy', 'num'),
+    ('orgn_ntby_qty', 'OrgBuy', 'num'),
+], index='Date'))
+# 선물옵션 주문체결 내역
+register_frame_schema('TTTO5201R', FrameSchema([
+    ('pdno', '종목코드', 'str'),
+    ('prdt_name', '종목명', 'str'),
+    ('ord_qty', '주문수량', 'str'),
+    ('qty', '미체결수량', 'str'),
+    ('odno', '주문번호', 'str'),
+    ('trad_dvsn_name', '매수매도구분', 'str'),
+    ('nmpr_type_name', '주문유형', 'str'),
+]))
+# 옵션 전광판 (콜 output1, 풋 output2)
+register_frame_schema('FHPIF05030100', FrameSchema(_OPTION_BOARD_FIELDS))
+
+
+def make_ohlcv_frame(rows, date_field, hour_field, close_field, volume_field, adVar=False):
+    # 시세 row(dict) 리스트를 get_stock_history_by_ohlcv 형식 (index Date, Open/High/Low/Close/Volume) 으로 변환
+    # hour_field 가 있으면 Date 는 일시 (분봉)
+    columns = ['Open', 'High', 'Low', 'Close', 'Volume']
+    if not rows:
+        df = pd.DataFrame(columns=['Date'] + columns)
+        return df.set_index('Date')
+    df = pd.DataFrame(rows)
+    dates = df[date_field] + df[hour_field] if hour_field else df[date_field]
+    df = pd.DataFrame({
+        'Date': pd.to_datetime(dates, format="%Y%m%d%H%M%S" if hour_field else "%Y%m%d"),
+        'Open': pd.to_numeric(df['stck_oprc']),
+        'High': pd.to_numeric(df['stck_hgpr']),
+        'Low': pd.to_numeric(df['stck_lwpr']),
+        'Close': pd.to_numeric(df[close_field]),
+        'Volume': pd.to_numeric(df[volume_field]),
+    }).set_index('Date')
+    if adVar:
+        df['inter_volatile'] = (df['High'] - df['Low']) / df['Close']
+        df['pct_change'] = (df['Close'] - df['Close'].shift(-1)) / df['Close'].shift(-1) * 100
+    return df
+
+
+class KoreaInvestAPIBase:
+    # 동기(KoreaInvestAPI)/비동기(AsyncKoreaInvestAPI) 클라이언트가 공유하는 부분
+    # 설정값, 헤더, 요청 정의(url, tr_id, params)와 응답 해석을 한 곳에 두어 두 클라이언트가 어긋나지 않게 한다.
+    def __init__(self, cfg, base_headers, rate_limiter=None, response_cache=None):
+        self.custtype = cfg['custtype']
+        self._base_headers = base_headers
+        self.websocket_approval_key = cfg['websocket_approval_key']
+        self.account_num = cfg['account_num']
+        self.future_account_num = cfg['future_account_num']
+        self.is_paper_trading = cfg['is_paper_trading']
+        self.htsid = cfg['htsid']
+        self.using_url = cfg['using_url']
+        self.subscription_registry = SubscriptionRegistry(self.websocket_approval_key, self.custtype, self.htsid)
+        # 같은 app key 를 쓰는 모든 클라이언트가 공유하는 초당 호출 제한
+        if rate_limiter is None:
+            rate_limiter = get_shared_rate_limiter(cfg, base_headers.get('appkey', ''))
+        self._rate_limiter = rate_limiter
+        # 조회 응답 캐시 (config 에 response_cache 가 없으면 None)
+        if response_cache is None:
+            response_cache = ResponseCache.from_config(cfg)
+        self.response_cache = response_cache
+        # callback(거부된 토큰) -> 새 토큰. TokenManager.register 가 설정하며, 없으면 토큰 오류를 그대로 실패 처리
+        self.on_token_rejected = None
+
+    def _is_token_rejected(self, res):
+        return self.on_token_rejected is not None and res.status_code != 200 and any(code in res.text for code in TOKEN_ERROR_CODES)
+
+    def _response_cache_key(self, api_url, tr_id, params, is_post_request, tr_cont):
+        # 캐시할 요청이면 (key, 보관 시간), 아니면 None
+        cache = self.response_cache
+        if cache is None or is_post_request:
+            return None
+        ttl = cache.get_ttl(tr_id)
+        if not ttl:
+            return None
+        query = '&'.join(f"{k}={v}" for k, v in sorted(params.items()))
+        return f"{self.using_url}{api_url}|{tr_id}|{query}|{tr_cont}", ttl
+
+    def set_access_token(self, access_token):
+        # 새 헤더 dict 를 만든 뒤 참조를 한 번에 교체한다.
+        # 요청 중인 스레드는 이전 dict 를 그대로 쓰므로 반쯤 바뀐 헤더를 보는 일이 없다.
+        base_headers = dict(self._base_headers)
+        base_headers["authorization"] = access_token
+        self._base_headers = base_headers
+
+    def _make_headers(self, tr_id, tr_cont=''):
+        # 요청별 헤더 사본 생성 (공유 헤더는 건드리지 않고 사본에 tr_id, hashkey 설정)
+        # 모의투자는 T, J, C 로 시작하는 tr_id 를 V 로 바꿔서 보낸다.
+        # tr_cont 는 연속조회 여부 (다음 페이지 요청이면 'N')
+        if tr_id[0] in ('T', 'J', 'C'):
+            if self.is_paper_trading:
+                tr_id = 'V' + tr_id[1:]
+        headers = dict(self._base_headers)
+        headers["tr_id"] = tr_id
+        headers["custtype"] = self.custtype
+        if tr_cont:
+            headers["tr_cont"] = tr_cont
+        return tr_id, headers
+
+    @staticmethod
+    def _continuation_key_names(params):
+        # 요청 params 에서 연속조회키 이름 (CTX_AREA_FK100/NK100 또는 FK200/NK200) 을 찾는다
+        fk_name = next((k for k in params if k.upper().startswith('CTX_AREA_FK')), None)
+        nk_name = next((k for k in params if k.upper().startswith('CTX_AREA_NK')), None)
+        return fk_name, nk_name
+
+    @staticmethod
+    def _next_page_params(t1, params, fk_name, nk_name):
+        # 다음 페이지가 있으면 응답 body 의 연속조회키를 넣은 params 를, 없으면 None 을 반환
+        if fk_name is None or not t1.is_ok() or not t1.has_next_page():
+            return None
+        body = t1.get_body()
+        next_params = dict(params)
+        next_params[fk_name] = getattr(body, fk_name.lower(), '')
+        next_params[nk_name] = getattr(body, nk_name.lower(), '')
+        return next_params
+
+    @staticmethod
+    def _merge_pages(pages, output_names):
+        # 여러 페이지 응답의 output 목록을 이어붙여 첫 페이지 응답에 담아 반환 (요약 output2 등은 첫 페이지 값)
+        if not pages:
+            return None
+        first = pages[0]
+        if len(pages) > 1 and first.is_ok():
+            merged = dict()
+            for name in output_names:
+                records = []
+                for page in pages:
+                    if page.is_ok():
+                        records.extend(getattr(page.get_body(), name, None) or [])
+                merged[name] = records
+            first.replace_body(**merged)
+        return first
+
+    def _overseas_acct_balance_request(self):
+        url = '/uapi/overseas-stock/v1/trading/inquire-balance'
+        if self.is_paper_trading:
+            tr_id = "VTTS3012R"
+        else:
+            tr_id = "TTTS3012R"
+        params = {
+            'CANO': self.account_num,
+            'ACNT_PRDT_CD': '01',
+            'OVRS_EXCG_CD': 'NASD',
+            'TR_CRCY_CD': 'USD',
+            'CTX_AREA_FK200': '',
+            'CTX_AREA_NK200': '',
+        }
+        return url, tr_id, params
+
+    def _acct_balance_request(self):
+        url = '/uapi/domestic-stock/v1/trading/inquire-balance'
+        if self.is_paper_trading:
+            tr_id = "VTTC8434R"
+        else:
+            tr_id = "TTTC8434R"
+
+        params = {
+            'CANO': self.account_num,
+            'ACNT_PRDT_CD': '01',
+            'AFHR_FLPR_YN': 'N',
+            'FNCG_AMT_AUTO_RDPT_YN': 'N',
+            'FUND_STTL_ICLD_YN': 'N',
+            'INQR_DVSN': '01',
+            'OFL_YN': 'N',
+            'PRCS_DVSN': '01',
+            'UNPR_DVSN': '01',
+            'CTX_AREA_FK100': '',
+            'CTX_AREA_NK100': ''
+        }
+        return url, tr_id, params
+
+    def _hoga_info_request(self, stock_no):
+        url = "/uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn"
+        tr_id = "FHKST01010200"
+
+        params = {
+            'FID_COND_MRKT_DIV_CODE': "J",
+            'FID_INPUT_ISCD': stock_no
+        }
+        return url, tr_id, params
+
+    def _stock_history_request(self, stock_no, gb_cd='D'):
+        # 최근 30개 일/주/월별 시세
+        url = "/uapi/domestic-stock/v1/quotations/inquire-daily-price"
+        tr_id = "FHKST01010400"
+        params = {
+            "FID_COND_MRKT_DIV_CODE": 'J',
+            "FID_INPUT_ISCD": stock_no,
+            "FID_PERIOD_DIV_CODE": gb_cd,
+            "FID_ORG_ADJ_PRC": "0000000001"
+        }
+        return url, tr_id, params
+
+    def _minute_chart_request(self, stock_code, hour):
+        # 당일 분봉 조회. hour(HHMMSS) 이전 30개 분봉
+        url = '/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice'
+        tr_id = "FHKST03010200"
+
+        params = {
+            'FID_ETC_CLS_CODE': "",
+            'FID_COND_MRKT_DIV_CODE': 'J',
+            'FID_INPUT_ISCD': stock_code,
+            'FID_INPUT_HOUR_1': hour,
+            'FID_PW_DATA_INCU_YN': 'Y',
+        }
+        return url, tr_id, params
+
+    def _period_chart_request(self, stock_no, start_date, end_date, gb_cd='D', adjusted=False):
+        # 기간별 시세 (일/주/월/년), start_date ~ end_date(YYYYMMDD) 중 최근 100개
+        # adjusted: True 면 수정주가, False 면 원주가 (get_stock_history_by_ohlcv 와 같은 기준)
+        url = "/uapi/domestic-stock/v1/quotations/inquire-daily-itemchartprice"
+        tr_id = "FHKST03010100"
+
+        params = {
+            "FID_COND_MRKT_DIV_CODE": 'J',
+            "FID_INPUT_ISCD": stock_no,
+            "FID_INPUT_DATE_1": start_date,
+            "FID_INPUT_DATE_2": end_date,
+            "FID_PERIOD_DIV_CODE": gb_cd,
+            "FID_ORG_ADJ_PRC": "0" if adjusted else "1",
+        }
+        return url, tr_id, params
+
+    def _daily_minute_chart_request(self, stock_no, date, hour):
+        # 일별 분봉 조회. date(YYYYMMDD) 의 hour(HHMMSS) 이전 120개 분봉 (모의투자 미지원)
+        url = "/uapi/domestic-stock/v1/quotations/inquire-time-dailychartprice"
+        tr_id = "FHKST03010230"
+
+        params = {
+            "FID_COND_MRKT_DIV_CODE": 'J',
+            "FID_INPUT_ISCD": stock_no,
+            "FID_INPUT_HOUR_1": hour,
+            "FID_INPUT_DATE_1": date,
+            "FID_PW_DATA_INCU_YN": 'Y',
+            "FID_FAKE_TICK_INCU_YN": '',
+        }
+        return url, tr_id, params
+
+    def _current_price_request(self, stock_no):
+        url = "/uapi/domestic-stock/v1/quotations/inquire-price"
+        tr_id = "FHKST01010100"
+
+        params = {
+            'FID_COND_MRKT_DIV_CODE': 'J',
+            'FID_INPUT_ISCD': stock_no
+        }
+        return url, tr_id, params
+
+    def _multi_current_price_request(self, stock_nos):
+        # 관심종목(멀티종목) 시세조회, 최대 30종목
+        url = "/uapi/domestic-stock/v1/quotations/intstock-multprice"
+        tr_id = "FHKST11300006"
+
+        params = dict()
+        for i, stock_no in enumerate(stock_nos, start=1):
+            params[f'FID_COND_MRKT_DIV_CODE_{i}'] = 'J'
+            params[f'FID_INPUT_ISCD_{i}'] = stock_no
+        return url, tr_id, params
+
+    def _overseas_current_price_request(self, exchange_code, stock_no):
+        url = "/uapi/overseas-price/v1/quotations/price"
+        tr_id = "HHDFS00000300"
+
+        params = {
+            'AUTH': "",
+            'EXCD': exchange_code,  # 거래소 코드
+            'SYMB': stock_no,  # 종목코드
+        }
+        return url, tr_id, params
+
+    def _overseas_do_order_request(self, stock_code, exchange_code, order_qty, order_price, prd_code, buy_flag, order_type):
+        url = "/uapi/overseas-stock/v1/trading/order"
+
+        if buy_flag:
+            tr_id = "TTTT1002U"  # buy
+            if self.is_paper_trading:
+                tr_id = "VTTT1002U"  # buy
+        else:
+            tr_id = "TTTT1006U"  # sell
+            if self.is_paper_trading:
+                tr_id = "VTTT1006U"
+
+        params = {
+            'CANO': self.account_num,
+            'ACNT_PRDT_CD': prd_code,
+            "OVRS_EXCG_CD": exchange_code,
+            'PDNO': stock_code,
+            'ORD_QTY': str(order_qty),
+            'OVRS_ORD_UNPR': str(order_price),
+            "ORD_SVR_DVSN_CD": "0",
+            "ORD_DVSN": order_type,
+        }
+        return url, tr_id, params
+
+    def _do_order_request(self, stock_code, order_qty, order_price, prd_code, buy_flag, order_type, exchange):
+        url = "/uapi/domestic-stock/v1/trading/order-cash"
+
+        if buy_flag:
+            tr_id = "TTTC0012U"  # buy
+            if self.is_paper_trading:
+                tr_id = "VTTC0012U"
+        else:
+            tr_id = "TTTC0011U"  # sell
+            if self.is_paper_trading:
+                tr_id = "VTTC0011U"  # sell
+
+        params = {
+            'CANO': self.account_num,
+            'ACNT_PRDT_CD': prd_code,
+            'PDNO': stock_code,
+            'ORD_DVSN': order_type,
+            'ORD_QTY': str(order_qty),
+            'ORD_UNPR': str(order_price),
+            'CTAC_TLNO': '',
+            'SLL_TYPE': '01',
+            'EXCG_ID_DVSN_CD': exchange,
+        }
+        return url, tr_id, params
+
+    def _do_cancel_revise_request(self, order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, exchange):
+        url = "/uapi/domestic-stock/v1/trading/order-rvsecncl"
+        tr_id = "TTTC0013U"
+
+        params = {
+            "CANO": self.account_num,
+            "ACNT_PRDT_CD": prd_code,
+            "KRX_FWDG_ORD_ORGNO": order_branch,
+            "ORGN_ODNO": order_no,
+            "ORD_DVSN": order_dv,
+            "RVSE_CNCL_DVSN_CD": cncl_dv,  # 취소(02)
+            "ORD_QTY": str(order_qty),
+            "ORD_UNPR": str(order_price),
+            "QTY_ALL_ORD_YN": qty_all_yn,
+            "EXCG_ID_DVSN_CD": exchange,
+        }
+        return url, tr_id, params
+
+    def _overseas_do_cancel_revise_request(self, order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv):
+        url = "/uapi/overseas-stock/v1/trading/order-rvsecncl"
+        tr_id = "TTTT1004U"
+
+        params = {
+            "CANO": self.account_num,
+            "ACNT_PRDT_CD": prd_code,
+            "OVRS_EXCG_CD": order_branch,
+            "PDNO": stock_code,
+            "ORGN_ODNO": order_no,
+            "ORD_SVR_DVSN_CD": "0",
+            "RVSE_CNCL_DVSN_CD": cncl_dv,  # 취소(02)
+            "ORD_QTY": str(order_qty),
+            "OVRS_ORD_UNPR": str(order_price),
+        }
+        return url, tr_id, params
+
+    def _buyable_cash_request(self, stock_code, qry_price, prd_code):
+        url = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
+        tr_id = "TTTC8908R"
+
+        params = {
+            "CANO": self.account_num,
+            "ACNT_PRDT_CD": prd_code,
+            "PDNO": stock_code,
+            "ORD_UNPR": str(qry_price),
+            "ORD_DVSN": "02",
+            "CMA_EVLU_AMT_ICLD_YN": "Y",  # API 설명부분 수정 필요 (YN)
+            "OVRS_ICLD_YN": "N"
+        }
+        return url, tr_id, params
+
+    def _future_options_do_amend_cancel_order_request(self, order_qty, order_price, order_num, is_cancel_order, prd_code, order_type):
+        url = "/uapi/domestic-futureoption/v1/trading/order-rvsecncl"
+        if self.is_paper_trading:
+            tr_id = "VTTO1103U"
+        else:
+            tr_id = "TTTO1103U"
+
+        params = {
+            'ORD_PRCS_DVSN_CD': "02",
+            'CANO': self.future_account_num,
+            'ACNT_PRDT_CD': prd_code,
+            'RVSE_CNCL_DVSN_CD': "02" if is_cancel_order else "01",
+            'ORGN_ODNO': order_num,
+            'ORD_QTY': str(order_qty),
+            'UNIT_PRICE': str(order_price),
+            "NMPR_TYPE_CD": order_type,
+            "KRX_NMPR_CNDT_CD": "0",
+            'RMN_QTY_YN': 'Y',
+            "ORD_DVSN_CD": order_type,
+        }
+        return url, tr_id, params
+
+    def _future_options_do_order_request(self, product_code, order_qty, order_price, is_buy_order, prd_code, order_type):
+        url = "/uapi/domestic-futureoption/v1/trading/order"
+        if self.is_paper_trading:
+            tr_id = "VTTO1101U"
+        else:
+            tr_id = "TTTO1101U"
+
+        params = {
+            'ORD_PRCS_DVSN_CD': "02",
+            'CANO': self.future_account_num,
+            'ACNT_PRDT_CD': prd_code,
+            "SLL_BUY_DVSN_CD": "02" if is_buy_order else "01",
+            'SHTN_PDNO': product_code,
+            'ORD_QTY': str(order_qty),
+            'UNIT_PRICE': str(order_price),
+            "NMPR_TYPE_CD": order_type,
+            "KRX_NMPR_CNDT_CD": "0",
+            "ORD_DVSN_CD": order_type,
+        }
+        return url, tr_id, params
+
+    def _futures_price_request(self, future_code):
+        url = "/uapi/domestic-futureoption/v1/quotations/inquire-price"
+        tr_id = "FHMIF10000000"
+
+        params = {
+            "FID_COND_MRKT_DIV_CODE": "F",
+            "FID_INPUT_ISCD": future_code,
+        }
+        return url, tr_id, params
+
+    def _future_option_balance_request(self):
+        url = "/uapi/domestic-futureoption/v1/trading/inquire-balance"
+        if self.is_paper_trading:
+            tr_id = "VTFO6118R"
+        else:
+            tr_id = "CTFO6118R"
+
+        params = {
+            'CANO': self.future_account_num,
+            'ACNT_PRDT_CD': '03',
+            'MGNA_DVSN': "01",
+            'EXCC_STAT_CD': '1',
+            'CTX_AREA_FK200': '',
+            'CTX_AREA_NK200': '',
+        }
+        return url, tr_id, params
+
+    def _option_board_request(self, target_date, market_cls_code=''):
+        # 옵션 전광판 (콜 output1, 풋 output2)
+        # target_date: 월물 YYYYMM, 위클리 YYMMWW (WW: 그 달의 몇 번째 주)
+        url = "/uapi/domestic-futureoption/v1/quotations/display-board-callput"
+        tr_id = "FHPIF05030100"
+        params = {
+            "FID_COND_MRKT_DIV_CODE": "O",
+            "FID_COND_SCR_DIV_CODE": "20503",
+            "FID_MRKT_CLS_CODE": "CO",
+            "FID_MTRT_CNT": target_date,
+            "FID_COND_MRKT_CLS_CODE": market_cls_code,
+            "FID_MRKT_CLS_CODE1": "PO",
+        }
+        return url, tr_id, params
+
+    @staticmethod
+    def _option_board_frame(output1, output2):
+        # 콜(output1)/풋(output2) 전광판을 행사가 기준으로 합친 DataFrame (콜 열, 행사가, 풋 열 순서)
+        schema = get_frame_schema('FHPIF05030100')
+        hdf1 = schema.build(output1)
+        hdf2 = schema.build(output2)
+        hdf2 = hdf2[hdf2.columns[::-1]]
+        # hdf1과 hdf2를 '행사가'를 기준으로 내부 조인
+        merged_df = pd.merge(hdf1, hdf2, on='행사가', suffixes=('_콜', '_풋'))
+        # '행사가'를 중간으로 이동
+        cols = list(merged_df.columns)
+        cols.remove('행사가')
+        new_col_order = cols[:len(cols) // 2] + ['행사가'] + cols[len(cols) // 2:]
+        return merged_df[new_col_order]
+
+    def _output_result(self, t1, output_name='output'):
+        # 조회 결과의 output(또는 output1) dict 반환, 실패하면 빈 dict
+        if t1 is not None and t1.is_ok():
+            return getattr(t1.get_body(), output_name)
+        elif t1 is None:
+            return dict()
+        else:
+            t1.print_error()
+            return dict()
+
+    def _order_result(self, t1):
+        # 주문/정정/취소 응답, 실패하면 None
+        if t1 is not None and t1.is_ok():
+            return t1
+        elif t1 is None:
+            return None
+        else:
+            t1.print_error()
+            return None
+
+    def _overseas_acct_balance_result(self, t1):
+        schema = get_frame_schema('TTTS3012R')
+        if t1 is None:
+            return 0, schema.empty_frame()
+
+        try:
+            output1 = t1.get_body().output1
+        except Exception as e:
+            logger.info(f"Exception: {e}, t1: {t1}")
+            return 0, schema.empty_frame()
+        if t1 is not None and t1.is_ok() and output1:  # body 의 rt_cd 가 0 인 경우만 성공
+            df = schema.build(output1)
+            df = df[df['보유수량'] != 0]
+            r2 = t1.get_body().output2
+            return float(r2['tot_evlu_pfls_amt']), df
+        else:
+            return 0, schema.empty_frame()
+
+    def _acct_balance_result(self, t1):
+        schema = get_frame_schema('TTTC8434R')
+        if t1 is None:
+            return 0, schema.empty_frame()
+        try:
+            output1 = t1.get_body().output1
+        except Exception as e:
+            logger.info(f"Exception: {e}, t1: {t1}")
+            return 0, schema.empty_frame()
+        if t1 is not None and t1.is_ok() and output1:  # body 의 rt_cd 가 0 인 경우만 성공
+            df = schema.build(output1)
+            df = df[df['보유수량'] != 0]
+            r2 = t1.get_body().output2
+            return int(r2[0]['tot_evlu_amt']), df
+        else:
+            logger.info(f"t1.is_ok(): {t1.is_ok()}, output1: {output1}")
+            tot_evlu_amt = 0
+            if t1.is_ok():
+                r2 = t1.get_body().output2
+                tot_evlu_amt = int(r2[0]['tot_evlu_amt'])
+            return tot_evlu_amt, schema.empty_frame()
+
+    def _buyable_cash_result(self, t1):
+        if t1 is not None and t1.is_ok():
+            return int(t1.get_body().output['ord_psbl_cash'])
+        elif t1 is None:
+            return 0
+        else:
+            t1.print_error()
+            return 0
+
+    def _futures_price_result(self, t1):
+        if t1 is not None and t1.is_ok():
+            return float(t1.get_body().output1['futs_prpr'])
+        elif t1 is None:
+            return None
+        else:
+            t1.print_error()
+            return None
+
+    def _future_option_balance_result(self, t1):
+        if t1 is not None and t1.is_ok():
+            추정예탁자산 = int(t1.get_body().output2['prsm_dpast'])
+            매매손익금액 = int(t1.get_body().output2['trad_pfls_amt_smtl'])
+            평가손익금액 = int(t1.get_body().output2['evlu_pfls_amt_smtl'])
+            return dict(매매손익금액=매매손익금액, 추정예탁자산=추정예탁자산, 평가손익금액=평가손익금액)
+        elif t1 is None:
+            return None
+        else:
+            t1.print_error()
+            return None
 
-    def get_websocket_approval_key(self, request_base_url='', api_key='', api_secret_key=''):
-        # 웹소켓 접속키 발급
-        headers = {"content-type": "application/json"}
-        body = {
-            "grant_type": "client_credentials",
-            "appkey": api_key,
-            "secretkey": api_secret_key,
-        }
-        URL = f"{request_base_url}/oauth2/Approval"
-        res = requests.post(URL, headers=headers, data=json.dumps(body))
-        approval_key = res.json()["approval_key"]
-        return approval_key
 
+class KoreaInvestAPI(KoreaInvestAPIBase):
+    def __init__(self, cfg, base_headers, session=None, rate_limiter=None, response_cache=None):
+        super().__init__(cfg, base_headers, rate_limiter, response_cache)
+        # 클라이언트마다 하나의 커넥션 풀 세션을 유지한다. (session 을 넘기면 공유)
+        if session is None:
+            session = create_http_session(cfg.get('http_pool_size', DEFAULT_HTTP_POOL_SIZE))
+        self._session = session
+        self._timeout = get_http_timeout(cfg)
 
-class KoreaInvestAPI:
-    def __init__(self, cfg, base_headers):
-        self.custtype = cfg['custtype']
-        self._base_headers = base_headers
-        self.websocket_approval_key = cfg['websocket_approval_key']
-        self.account_num = cfg['account_num']
-        self.future_account_num = cfg['future_account_num']
-        self.is_paper_trading = cfg['is_paper_trading']
-        self.htsid = cfg['htsid']
-        self.using_url = cfg['using_url']
+    def close(self):
+        # 커넥션 풀에 남아있는 연결을 정리하고 응답 캐시를 파일에 저장
+        self._session.close()
+        if self.response_cache is not None:
+            self.response_cache.save()
 
     def set_order_hash_key(self, h, p):
         # 주문 API에서 사용할 hash key값을 받아 header에 설정해 주는 함수
@@ -98,36 +1588,56 @@ class KoreaInvestAPI:
         # Output: None
         url = f"{self.using_url}/uapi/hashkey"
 
-        res = requests.post(url, data=json.dumps(p), headers=h)
+        self._rate_limiter.acquire(ORDER_REQUEST)
+        res = self._session.post(url, data=json_dumps_bytes(p), headers=h, timeout=self._timeout)
         rescode = res.status_code
         if rescode == 200:
-            h['hashkey'] = res.json()['HASH']
+            h['hashkey'] = json_loads(res.content)['HASH']
         else:
             logger.info(f"Error: {rescode}")
 
-    def _url_fetch(self, api_url, tr_id, params, is_post_request=False, use_hash=True):
+    def _url_fetch(self, api_url, tr_id, params, is_post_request=False, use_hash=True, tr_cont=''):
         try:
-            url = f"{self.using_url}{api_url}"
-            headers = self._base_headers
+            cache_key = self._response_cache_key(api_url, tr_id, params, is_post_request, tr_cont)
+            if cache_key is not None:
+                res = self.response_cache.get(cache_key[0])
+                if res is not None:
+                    return APIResponse(res)
 
-            # 추가 Header 설정
-            tr_id = tr_id
-            if tr_id[0] in ('T', 'J', 'C'):
-                if self.is_paper_trading:
-                    tr_id = 'V' + tr_id[1:]
-
-            headers["tr_id"] = tr_id
-            headers["custtype"] = self.custtype
-
-            if is_post_request:
-                if use_hash:
-                    self.set_order_hash_key(headers, params)
-                res = requests.post(url, headers=headers, data=json.dumps(params))
-            else:
-                res = requests.get(url, headers=headers, params=params)
+            url = f"{self.using_url}{api_url}"
+            tr_id, headers = self._make_headers(tr_id, tr_cont)
+            request_kind = classify_tr_id(tr_id)
+
+            if is_post_request and use_hash:
+                self.set_order_hash_key(headers, params)
+
+            token_retried = False
+            for _ in range(RATE_LIMIT_RETRY + 1):
+                # 초당 호출 한도 안에서 차례를 기다린 뒤 전송
+                self._rate_limiter.acquire(request_kind)
+                if is_post_request:
+                    res = self._session.post(url, headers=headers, data=json_dumps_bytes(params), timeout=self._timeout)
+                else:
+                    res = self._session.get(url, headers=headers, params=params, timeout=self._timeout)
+                if res.status_code != 200 and RATE_LIMIT_ERROR_CODE in res.text:
+                    # 초당 거래건수 초과로 거부된 요청은 처리되지 않았으므로 잠시 멈춘 뒤 다시 보낸다
+                    logger.info(f"Rate limited ({RATE_LIMIT_ERROR_CODE}): {tr_id}, retry")
+                    self._rate_limiter.penalize()
+                    continue
+                if not token_retried and self._is_token_rejected(res):
+                    # 만료/무효 토큰: 캐시에서 지우고 재발급한 토큰으로 한 번만 다시 보낸다
+                    logger.info(f"Access token rejected: {tr_id}, reissue and retry")
+                    token_retried = True
+                    headers["authorization"] = self.on_token_rejected(headers["authorization"])
+                    if is_post_request and use_hash:
+                        self.set_order_hash_key(headers, params)
+                    continue
+                break
 
             if res.status_code == 200:
                 ar = APIResponse(res)
+                if cache_key is not None and ar.is_ok():  # 정상 응답만 캐시
+                    self.response_cache.put(cache_key[0], cache_key[1], res)
                 return ar
             else:
                 logger.info(f"Error Code : {res.status_code} | {res.text}")
@@ -135,143 +1645,77 @@ class KoreaInvestAPI:
         except Exception as e:
             logger.info(f"URL exception: {e}")
 
+    def iter_pages(self, api_url, tr_id, params, max_pages=MAX_CONTINUATION_PAGES):
+        # 연속조회 페이지를 하나씩 돌려주는 generator (APIResponse)
+        # 응답 헤더 tr_cont 가 M/F 이면 다음 페이지가 있으며, body 의 ctx_area_fk/nk 값을 다음 요청에 넣는다.
+        # 한 번에 한 페이지만 들고 있으므로 긴 체결 내역도 메모리를 적게 쓴다.
+        fk_name, nk_name = self._continuation_key_names(params)
+        tr_cont = ''
+        for _ in range(max_pages):
+            t1 = self._url_fetch(api_url, tr_id, params, tr_cont=tr_cont)
+            if t1 is None:
+                return
+            yield t1
+            params = self._next_page_params(t1, params, fk_name, nk_name)
+            if params is None:
+                return
+            tr_cont = 'N'
+
+    def fetch_all_pages(self, api_url, tr_id, params, output_name='output', max_pages=MAX_CONTINUATION_PAGES):
+        # 모든 연속조회 페이지의 output_name 목록을 이어붙인 DataFrame
+        frames = []
+        for t1 in self.iter_pages(api_url, tr_id, params, max_pages):
+            if not t1.is_ok():
+                t1.print_error()
+                break
+            frames.append(pd.DataFrame(getattr(t1.get_body(), output_name, None) or []))
+        if not frames:
+            return pd.DataFrame()
+        return pd.concat(frames, ignore_index=True)
+
+    def _url_fetch_all(self, api_url, tr_id, params, output_names=('output',), max_pages=MAX_CONTINUATION_PAGES):
+        # 모든 페이지의 output 을 이어붙인 하나의 APIResponse (기존 단일 페이지 결과 처리 함수를 그대로 쓰기 위함)
+        pages = list(self.iter_pages(api_url, tr_id, params, max_pages))
+        return self._merge_pages(pages, output_names)
+
+    def _url_fetch_complete(self, api_url, tr_id, params, output_names=('output',), max_pages=MAX_CONTINUATION_PAGES):
+        # _url_fetch_all 과 같지만, 모든 페이지를 정상으로 받고 마지막 페이지에 다음 데이터가 없을 때만 반환 (아니면 None)
+        # 조회에 없는 주문을 끝난 것으로 보는 대사처럼 목록이 빠짐없어야 하는 곳에서 사용
+        pages = list(self.iter_pages(api_url, tr_id, params, max_pages))
+        if not pages or not all(page.is_ok() for page in pages) or pages[-1].has_next_page():
+            logger.info(f"연속조회 미완료: {tr_id} {len(pages)} 페이지")
+            return None
+        return self._merge_pages(pages, output_names)
+
     def get_overseas_acct_balance(self):
         # 계좌 잔고를 평가잔고와 상세 내역을 DataFrame 으로 반환
-        url = '/uapi/overseas-stock/v1/trading/inquire-balance'
-        if self.is_paper_trading:
-            tr_id = "VTTS3012R"
-        else:
-            tr_id = "TTTS3012R"
-        params = {
-            'CANO': self.account_num,
-            'ACNT_PRDT_CD': '01',
-            'OVRS_EXCG_CD': 'NASD',
-            'TR_CRCY_CD': 'USD',
-            'CTX_AREA_FK200': '',
-            'CTX_AREA_NK200': '',
-        }
-
-        t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['종목코드', '해외거래소코드', '종목명', '보유수량', '매도가능수량', '매입단가', '수익률', '현재가', '평가손익']
-        if t1 is None:
-            return 0, pd.DataFrame(columns=output_columns)
-
-        try:
-            output1 = t1.get_body().output1
-        except Exception as e:
-            logger.info(f"Exception: {e}, t1: {t1}")
-            return 0, pd.DataFrame(columns=output_columns)
-        if t1 is not None and t1.is_ok() and output1:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output1)
-            target_columns = ['ovrs_pdno', 'ovrs_excg_cd', 'ovrs_item_name', 'ovrs_cblc_qty', 'ord_psbl_qty', 'pchs_avg_pric', 'evlu_pfls_rt', 'now_pric2', 'frcr_evlu_pfls_amt']
-            df = df[target_columns]
-            df[target_columns[3:]] = df[target_columns[3:]].apply(pd.to_numeric)
-            column_name_map = dict(zip(target_columns, output_columns))
-            df.rename(columns=column_name_map, inplace=True)
-            df = df[df['보유수량'] != 0]
-            r2 = t1.get_body().output2
-            return float(r2['tot_evlu_pfls_amt']), df
-        else:
-            return 0, pd.DataFrame(columns=['종목코드', '해외거래소코드', '종목명', '보유수량', '매도가능수량', '매입단가', '수익률', '현재가', '평가손익'])
+        url, tr_id, params = self._overseas_acct_balance_request()
+        t1 = self._url_fetch_all(url, tr_id, params, ('output1',))
+        return self._overseas_acct_balance_result(t1)
 
     def get_acct_balance(self):
         # 계좌 잔고 평가 잔고와 상세 내역을 DataFrame 으로 반환
-        url = '/uapi/domestic-stock/v1/trading/inquire-balance'
-        if self.is_paper_trading:
-            tr_id = "VTTC8434R"
-        else:
-            tr_id = "TTTC8434R"
-
-        params = {
-            'CANO': self.account_num,
-            'ACNT_PRDT_CD': '01',
-            'AFHR_FLPR_YN': 'N',
-            'FNCG_AMT_AUTO_RDPT_YN': 'N',
-            'FUND_STTL_ICLD_YN': 'N',
-            'INQR_DVSN': '01',
-            'OFL_YN': 'N',
-            'PRCS_DVSN': '01',
-            'UNPR_DVSN': '01',
-            'CTX_AREA_FK100': '',
-            'CTX_AREA_NK100': ''
-        }
-
-        t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['종목코드', '종목명', '보유수량', '매도가능수량', '매입단가', '수익률', '현재가', '전일대비', '전일대비 등락률']
-        if t1 is None:
-            return 0, pd.DataFrame(columns=output_columns)
-        try:
-            output1 = t1.get_body().output1
-        except Exception as e:
-            logger.info(f"Exception: {e}, t1: {t1}")
-            return 0, pd.DataFrame(columns=output_columns)
-        if t1 is not None and t1.is_ok() and output1:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output1)
-            target_columns = [
-                'pdno',
-                'prdt_name',
-                'hldg_qty',
-                'ord_psbl_qty',
-                'pchs_avg_pric',
-                'evlu_pfls_rt',
-                'prpr',
-                'bfdy_cprs_icdc',
-                'fltt_rt',
-            ]
-            df = df[target_columns]
-            df[target_columns[2:]] = df[target_columns[2:]].apply(pd.to_numeric)  # 종목코드, 종목명을 제외하고 형변환
-            column_name_map = dict(zip(target_columns, output_columns))
-            df.rename(columns=column_name_map, inplace=True)
-            df = df[df['보유수량'] != 0]
-            r2 = t1.get_body().output2
-            return int(r2[0]['tot_evlu_amt']), df
-        else:
-            logger.info(f"t1.is_ok(): {t1.is_ok()}, output1: {output1}")
-            tot_evlu_amt = 0
-            if t1.is_ok():
-                r2 = t1.get_body().output2
-                tot_evlu_amt = int(r2[0]['tot_evlu_amt'])
-            return tot_evlu_amt, pd.DataFrame(columns=output_columns)
+        url, tr_id, params = self._acct_balance_request()
+        t1 = self._url_fetch_all(url, tr_id, params, ('output1',))
+        return self._acct_balance_result(t1)
 
     def get_minute_chart_data(self, stock_code):
         # 계좌 잔고 평가 잔고와 상세 내역을 DataFrame 으로 반환
-        url = '/uapi/domestic-stock/v1/quotations/inquire-time-itemchartprice'
-        tr_id = "FHKST03010200"
-
-        params = {
-            'FID_ETC_CLS_CODE': "",
-            'FID_COND_MRKT_DIV_CODE': 'J',
-            'FID_INPUT_ISCD': stock_code,
-            'FID_INPUT_HOUR_1': datetime.datetime.now().strftime("%H%M%S"),
-            'FID_PW_DATA_INCU_YN': 'Y',
-        }
-
+        url, tr_id, params = self._minute_chart_request(stock_code, datetime.datetime.now().strftime("%H%M%S"))
         t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['일자', '시간', '시가', '고가', '저가', '종가']
+        schema = get_frame_schema(tr_id)
         if t1 is None:
-            return 0, pd.DataFrame(columns=output_columns)
+            return 0, schema.empty_frame()
         try:
             output2 = t1.get_body().output2
         except Exception as e:
             logger.info(f"Exception: {e}, t1: {t1}")
-            return 0, pd.DataFrame(columns=output_columns)
+            return 0, schema.empty_frame()
         if t1 is not None and t1.is_ok() and output2:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output2)
-            target_columns = [
-                'stck_bsop_date',
-                'stck_cntg_hour',
-                'stck_oprc',
-                'stck_hgpr',
-                'stck_lwpr',
-                'stck_prpr',
-            ]
-            df = df[target_columns]
-            df[target_columns[2:]] = df[target_columns[2:]].apply(pd.to_numeric)  # 종목코드, 종목명을 제외하고 형변환
-            column_name_map = dict(zip(target_columns, output_columns))
-            df.rename(columns=column_name_map, inplace=True)
+            df = schema.build(output2)
             return df[::-1].reset_index(drop=True)
         else:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
 
     def list_conditions(self):
         url = '/uapi/domestic-stock/v1/quotations/psearch-title'
@@ -282,27 +1726,18 @@ class KoreaInvestAPI:
         }
 
         t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['조건키값', '그룹명', '조건명']
+        schema = get_frame_schema(tr_id)
         if t1 is None:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         try:
             output2 = t1.get_body().output2
         except Exception as e:
             logger.info(f"Exception: {e}, t1: {t1}")
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         if t1 is not None and t1.is_ok() and output2:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output2)
-            target_columns = [
-                'seq',
-                'grp_nm',
-                'condition_nm',
-            ]
-            df = df[target_columns]
-            column_name_map = dict(zip(target_columns, output_columns))
-            df.rename(columns=column_name_map, inplace=True)
-            return df.reset_index(drop=True)
+            return schema.build(output2)
         else:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
 
     def list_condition_matching_stocks(self, seq_num):
         url = '/uapi/domestic-stock/v1/quotations/psearch-result'
@@ -314,29 +1749,18 @@ class KoreaInvestAPI:
         }
 
         t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['종목코드', '종목명', '현재가', '등락율']
+        schema = get_frame_schema(tr_id)
         if t1 is None:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         try:
             output2 = t1.get_body().output2
         except Exception as e:
             logger.info(f"Exception: {e}, t1: {t1}")
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         if t1 is not None and t1.is_ok() and output2:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output2)
-            target_columns = [
-                'code',
-                'name',
-                'price',
-                'chgrate',
-            ]
-            df = df[target_columns]
-            column_name_map = dict(zip(target_columns, output_columns))
-            df[target_columns[2:]] = df[target_columns[2:]].apply(pd.to_numeric)  # 종목코드, 종목명을 제외하고 형변환
-            df.rename(columns=column_name_map, inplace=True)
-            return df.reset_index(drop=True)
+            return schema.build(output2)
         else:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
 
     def list_overseas_condition_matching_stocks(self, exchange_code="NAS"):
         url = '/uapi/overseas-price/v1/quotations/inquire-search'
@@ -354,48 +1778,23 @@ class KoreaInvestAPI:
         }
 
         t1 = self._url_fetch(url, tr_id, params)
-        output_columns = ['종목코드', '종목명', '현재가', '등락율']
+        schema = get_frame_schema(tr_id)
         if t1 is None:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         try:
             output2 = t1.get_body().output2
         except Exception as e:
             logger.info(f"Exception: {e}, t1: {t1}")
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
         if t1 is not None and t1.is_ok() and output2:  # body 의 rt_cd 가 0 인 경우만 성공
-            df = pd.DataFrame(output2)
-            target_columns = [
-                'symb',
-                'name',
-                'last',
-                'rate',
-            ]
-            df = df[target_columns]
-            column_name_map = dict(zip(target_columns, output_columns))
-            df[target_columns[2:]] = df[target_columns[2:]].apply(pd.to_numeric)  # 종목코드, 종목명을 제외하고 형변환
-            df.rename(columns=column_name_map, inplace=True)
-            return df.reset_index(drop=True)
+            return schema.build(output2)
         else:
-            return pd.DataFrame(columns=output_columns)
+            return schema.empty_frame()
 
     def get_hoga_info(self, stock_no):
-        url = "/uapi/domestic-stock/v1/quotations/inquire-asking-price-exp-ccn"
-        tr_id = "FHKST01010200"
-
-        params = {
-            'FID_COND_MRKT_DIV_CODE': "J",
-            'FID_INPUT_ISCD': stock_no
-        }
-
+        url, tr_id, params = self._hoga_info_request(stock_no)
         t1 = self._url_fetch(url, tr_id, params)
-
-        if t1 is not None and t1.is_ok():
-            return t1.get_body().output1
-        elif t1 is None:
-            return dict()
-        else:
-            t1.print_error()
-            return dict()
+        return self._output_result(t1, 'output1')
 
     def get_fluctuation_ranking(self):
         url = "/uapi/domestic-stock/v1/ranking/fluctuation"
@@ -421,12 +1820,7 @@ class KoreaInvestAPI:
         t1 = self._url_fetch(url, tr_id, params)
 
         if t1 is not None and t1.is_ok():
-            df = pd.DataFrame(t1.get_body().output)
-            target_columns = ['stck_shrn_iscd', 'stck_prpr', 'prdy_ctrt']
-            output_columns = ['종목코드', '현재가', '전일대비율']
-            df = df[target_columns]
-            column_name_map = dict(zip(target_columns, output_columns))
-            return df.rename(columns=column_name_map)
+            return get_frame_schema(tr_id).build(t1.get_body().output)
         elif t1 is None:
             return dict()
         else:
@@ -453,23 +1847,9 @@ class KoreaInvestAPI:
             return dict()
 
     def get_current_price(self, stock_no):
-        url = "/uapi/domestic-stock/v1/quotations/inquire-price"
-        tr_id = "FHKST01010100"
-
-        params = {
-            'FID_COND_MRKT_DIV_CODE': 'J',
-            'FID_INPUT_ISCD': stock_no
-        }
-
+        url, tr_id, params = self._current_price_request(stock_no)
         t1 = self._url_fetch(url, tr_id, params)
-
-        if t1 is not None and t1.is_ok():
-            return t1.get_body().output
-        elif t1 is None:
-            return dict()
-        else:
-            t1.print_error()
-            return dict()
+        return self._output_result(t1)
 
     def get_overseas_ticker_info(self, exchange_code, stock_no):
         url = "/uapi/overseas-price/v1/quotations/search-info"
@@ -497,57 +1877,107 @@ class KoreaInvestAPI:
             return dict()
 
     def get_overseas_current_price(self, exchange_code, stock_no):
-        url = "/uapi/overseas-price/v1/quotations/price"
-        tr_id = "HHDFS00000300"
-
-        params = {
-            'AUTH': "",
-            'EXCD': exchange_code,  # 거래소 코드
-            'SYMB': stock_no,  # 종목코드
-        }
-
+        url, tr_id, params = self._overseas_current_price_request(exchange_code, stock_no)
         t1 = self._url_fetch(url, tr_id, params)
+        return self._output_result(t1)
+
+    def _fetch_many(self, requests_by_key, output_name='output', max_workers=DEFAULT_BULK_WORKERS, retry=DEFAULT_BULK_RETRY):
+        # 여러 조회 요청을 worker pool 에서 동시에 실행 (초당 호출 제한은 _url_fetch 의 RateLimiter 가 지킨다)
+        # Input: {key: (url, tr_id, params)}
+        # Output: ({key: output}, {key: 오류 메시지}), output_name 이 tuple 이면 output 도 같은 순서의 tuple
+        def fetch(key):
+            url, tr_id, params = requests_by_key[key]
+            error = None
+            for _ in range(retry + 1):
+                t1 = self._url_fetch(url, tr_id, params)
+                if t1 is None:  # 네트워크 오류 등은 재시도
+                    error = 'request failed'
+                    continue
+                if t1.is_ok():
+                    body = t1.get_body()
+                    if isinstance(output_name, tuple):
+                        return key, tuple(getattr(body, name) for name in output_name), None
+                    return key, getattr(body, output_name), None
+                return key, None, f"{t1.get_error_code()} {t1.get_error_message()}"  # 잘못된 종목코드 등은 재시도하지 않음
+            return key, None, error
+
+        outputs = dict()
+        errors = dict()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for key, output, error in executor.map(fetch, list(requests_by_key)):
+                if error is None:
+                    outputs[key] = output
+                else:
+                    errors[key] = error
+        return outputs, errors
+
+    def _submit_many(self, requests_by_key, max_workers=DEFAULT_BASKET_WORKERS, retry=DEFAULT_BULK_RETRY, use_hash=False):
+        # 여러 주문/정정/취소 요청을 worker pool 에서 동시에 전송 (초당 주문 한도는 _url_fetch 의 RateLimiter 가 지킨다)
+        # 응답을 받지 못한 요청(네트워크 오류, HTTP 오류)만 retry 번까지 다시 보낸다. 거부 응답은 다시 보내지 않는다.
+        # hashkey 는 선택 사항이므로 기본으로 생략한다 (hashkey 요청도 초당 주문 한도를 쓰므로 생략하면 처리량이 두 배)
+        # Input: {key: (url, tr_id, params)}
+        # Output: {key: (APIResponse 또는 None, 오류 메시지 또는 None, 시도 횟수, 소요시간 ms)}, 요청 순서 유지
+        def submit(key):
+            url, tr_id, params = requests_by_key[key]
+            start = time.perf_counter()
+            error = None
+            for attempt in range(1, retry + 2):
+                t1 = self._url_fetch(url, tr_id, params, is_post_request=True, use_hash=use_hash)
+                if t1 is None:
+                    error = 'request failed'
+                    continue
+                error = None if t1.is_ok() else f"{t1.get_error_code()} {t1.get_error_message()}"
+                break
+            return key, (t1, error, attempt, (time.perf_counter() - start) * 1000)
 
-        if t1 is not None and t1.is_ok():
-            return t1.get_body().output
-        elif t1 is None:
+        if not requests_by_key:
             return dict()
-        else:
-            t1.print_error()
-            return dict()
-
-    def overseas_do_order(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00"):
-        url = "/uapi/overseas-stock/v1/trading/order"
-
-        if buy_flag:
-            tr_id = "TTTT1002U"  # buy
-            if self.is_paper_trading:
-                tr_id = "VTTT1002U"  # buy
-        else:
-            tr_id = "TTTT1006U"  # sell
-            if self.is_paper_trading:
-                tr_id = "VTTT1006U"
-
-        params = {
-            'CANO': self.account_num,
-            'ACNT_PRDT_CD': prd_code,
-            "OVRS_EXCG_CD": exchange_code,
-            'PDNO': stock_code,
-            'ORD_QTY': str(order_qty),
-            'OVRS_ORD_UNPR': str(order_price),
-            "ORD_SVR_DVSN_CD": "0",
-            "ORD_DVSN": order_type,
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(requests_by_key))) as executor:
+            return dict(executor.map(submit, list(requests_by_key)))
+
+    def get_current_prices(self, stock_nos, max_workers=DEFAULT_BULK_WORKERS, retry=DEFAULT_BULK_RETRY):
+        # 여러 종목의 현재가를 동시에 조회해 종목코드를 index 로 하는 DataFrame 으로 반환
+        # 실패한 종목은 error 컬럼에 오류 메시지가 들어간다.
+        requests_by_key = {stock_no: self._current_price_request(stock_no) for stock_no in stock_nos}
+        outputs, errors = self._fetch_many(requests_by_key, max_workers=max_workers, retry=retry)
+        return make_typed_frame(outputs, errors, ['종목코드'])
+
+    def get_multi_current_prices(self, stock_nos, max_workers=DEFAULT_BULK_WORKERS, retry=DEFAULT_BULK_RETRY):
+        # get_current_prices 와 같은 결과를 멀티종목 시세조회로 30종목씩 묶어 조회 (호출 수 1/30)
+        # 단일종목 조회와 같은 필드명으로 바꿔서 반환한다.
+        stock_nos = list(dict.fromkeys(stock_nos))  # 중복 제거, 순서 유지
+        chunks = [tuple(stock_nos[i:i + MULTI_PRICE_BATCH_SIZE]) for i in range(0, len(stock_nos), MULTI_PRICE_BATCH_SIZE)]
+        requests_by_key = {chunk: self._multi_current_price_request(chunk) for chunk in chunks}
+        chunk_outputs, chunk_errors = self._fetch_many(requests_by_key, max_workers=max_workers, retry=retry)
+
+        outputs = dict()
+        errors = dict()
+        for chunk, rows in chunk_outputs.items():
+            for row in rows:
+                outputs[row['inter_shrn_iscd']] = {MULTI_PRICE_FIELD_MAP[k]: v for k, v in row.items() if k in MULTI_PRICE_FIELD_MAP}
+            for stock_no in chunk:
+                if stock_no not in outputs:
+                    errors[stock_no] = 'not found'
+        for chunk, error in chunk_errors.items():
+            for stock_no in chunk:
+                errors[stock_no] = error
+        outputs = {stock_no: outputs[stock_no] for stock_no in stock_nos if stock_no in outputs}
+        return make_typed_frame(outputs, errors, ['종목코드'])
+
+    def get_overseas_current_prices(self, tickers, max_workers=DEFAULT_BULK_WORKERS, retry=DEFAULT_BULK_RETRY):
+        # 여러 해외 종목의 현재가를 동시에 조회해 (거래소코드, 종목코드) 를 index 로 하는 DataFrame 으로 반환
+        # Input: [(exchange_code, stock_no), ...]
+        requests_by_key = {
+            (exchange_code, stock_no): self._overseas_current_price_request(exchange_code, stock_no)
+            for exchange_code, stock_no in tickers
         }
+        outputs, errors = self._fetch_many(requests_by_key, max_workers=max_workers, retry=retry)
+        return make_typed_frame(outputs, errors, ['거래소코드', '종목코드'])
 
+    def overseas_do_order(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00"):
+        url, tr_id, params = self._overseas_do_order_request(stock_code, exchange_code, order_qty, order_price, prd_code, buy_flag, order_type)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=True, use_hash=True)
-
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._order_result(t1)
 
     def overseas_do_sell(self, stock_code, exchange_code, order_qty, order_price, prd_code="01", order_type="00"):
         t1 = self.overseas_do_order(
@@ -574,38 +2004,9 @@ class KoreaInvestAPI:
         return t1
 
     def do_order(self, stock_code, order_qty, order_price, prd_code="01", buy_flag=True, order_type="00", exchange="KRX"):
-        url = "/uapi/domestic-stock/v1/trading/order-cash"
-
-        if buy_flag:
-            tr_id = "TTTC0012U"  # buy
-            if self.is_paper_trading:
-                tr_id = "VTTC0012U"
-        else:
-            tr_id = "TTTC0011U"  # sell
-            if self.is_paper_trading:
-                tr_id = "VTTC0011U"  # sell
-
-        params = {
-            'CANO': self.account_num,
-            'ACNT_PRDT_CD': prd_code,
-            'PDNO': stock_code,
-            'ORD_DVSN': order_type,
-            'ORD_QTY': str(order_qty),
-            'ORD_UNPR': str(order_price),
-            'CTAC_TLNO': '',
-            'SLL_TYPE': '01',
-            'EXCG_ID_DVSN_CD': exchange,
-        }
-
+        url, tr_id, params = self._do_order_request(stock_code, order_qty, order_price, prd_code, buy_flag, order_type, exchange)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=True, use_hash=True)
-
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._order_result(t1)
 
     def do_sell(self, stock_code, order_qty, order_price, order_type="00"):
         t1 = self.do_order(stock_code, order_qty, order_price, buy_flag=False, order_type=order_type)
@@ -627,31 +2028,25 @@ class KoreaInvestAPI:
             "CTX_AREA_NK200": '',
         }
 
-        t1 = self._url_fetch(url, tr_id, params)
+        t1 = self._url_fetch_all(url, tr_id, params)
         if t1 is not None and t1.is_ok() and t1.get_body().output:
-            tdf = pd.DataFrame(t1.get_body().output)
-            tdf.set_index('odno', inplace=True)
-            cf1 = ['pdno', 'ft_ord_qty', 'ft_ord_unpr3', 'ord_tmd', 'ovrs_excg_cd', 'orgn_odno', 'nccs_qty', 'sll_buy_dvsn_cd', 'sll_buy_dvsn_cd_name']
-            cf2 = ['종목코드', '주문수량', '주문가격', '시간', '거래소코드', '원주문번호', '주문가능수량', '매도매수구분코드', '매도매수구분코드명']
-            tdf = tdf[cf1]
-            ren_dict = dict(zip(cf1, cf2))
-
-            return tdf.rename(columns=ren_dict)
+            return get_frame_schema(tr_id).build(t1.get_body().output)
         else:
             return None
 
-    def get_overseas_finished_orders(self, prd_code='01') -> pd.DataFrame:
+    def _overseas_order_history_request(self, sdt, edt, exchange_code='NASD', ccld_nccs_dvsn='01', prd_code='01'):
+        # 해외주식 주문체결내역. ccld_nccs_dvsn: 00 전체, 01 체결, 02 미체결
         url = "/uapi/overseas-stock/v1/trading/inquire-ccnl"
         tr_id = "TTTS3035R"
         params = {
             "CANO": self.account_num,
             "ACNT_PRDT_CD": prd_code,
             "PDNO": "%",
-            "ORD_STRT_DT": datetime.datetime.now().strftime("%Y%m%d"),
-            "ORD_END_DT": datetime.datetime.now().strftime("%Y%m%d"),
+            "ORD_STRT_DT": sdt,
+            "ORD_END_DT": edt,
             "SLL_BUY_DVSN": "00",
-            "CCLD_NCCS_DVSN": "01",
-            "OVRS_EXCG_CD": "NASD",
+            "CCLD_NCCS_DVSN": ccld_nccs_dvsn,
+            "OVRS_EXCG_CD": exchange_code,
             "SORT_SQN": "AS",
             "ORD_DT": "",
             "ORD_GNO_BRNO": "",
@@ -659,17 +2054,15 @@ class KoreaInvestAPI:
             "CTX_AREA_FK200": '',
             "CTX_AREA_NK200": '',
         }
+        return url, tr_id, params
 
-        t1 = self._url_fetch(url, tr_id, params)
+    def get_overseas_finished_orders(self, prd_code='01', exchange_code='NASD') -> pd.DataFrame:
+        today = datetime.datetime.now().strftime("%Y%m%d")
+        url, tr_id, params = self._overseas_order_history_request(today, today, exchange_code, '01', prd_code)
+
+        t1 = self._url_fetch_all(url, tr_id, params)
         if t1 is not None and t1.is_ok() and t1.get_body().output:
-            tdf = pd.DataFrame(t1.get_body().output)
-            tdf.set_index('odno', inplace=True)
-            cf1 = ['pdno', 'ft_ord_qty', 'ft_ord_unpr3', 'ft_ccld_unpr3', 'ft_ccld_qty', 'ord_tmd', 'orgn_odno', 'nccs_qty', 'sll_buy_dvsn_cd', 'sll_buy_dvsn_cd_name']
-            cf2 = ['종목코드', '주문수량', '주문가격', '체결가격', '체결수량', '시간', '원주문번호', '주문가능수량', '매도매수구분코드', '매도매수구분코드명']
-            tdf = tdf[cf1]
-            ren_dict = dict(zip(cf1, cf2))
-
-            return tdf.rename(columns=ren_dict)
+            return get_frame_schema(tr_id).build(t1.get_body().output)
         else:
             return None
 
@@ -678,86 +2071,36 @@ class KoreaInvestAPI:
         tr_id = "TTTC8036R"
         params = {
             "CANO": self.account_num,
-            "ACNT_PRDT_CD": prd_code,
-            "CTX_AREA_FK100": '',
-            "CTX_AREA_NK100": '',
-            "INQR_DVSN_1": '0',
-            "INQR_DVSN_2": '0'
-        }
-
-        t1 = self._url_fetch(url, tr_id, params)
-        if t1 is not None and t1.is_ok() and t1.get_body().output:
-            tdf = pd.DataFrame(t1.get_body().output)
-            tdf.set_index('odno', inplace=True)
-            cf1 = ['pdno', 'ord_qty', 'ord_unpr', 'ord_tmd', 'ord_gno_brno', 'orgn_odno', 'psbl_qty']
-            cf2 = ['종목코드', '주문수량', '주문가격', '시간', '주문점', '원주문번호', '주문가능수량']
-            tdf = tdf[cf1]
-            ren_dict = dict(zip(cf1, cf2))
-
-            return tdf.rename(columns=ren_dict)
-        else:
-            return None
-
-    def _do_cancel_revise(self, order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, exchange="KRX"):
-        # 특정 주문 취소(01)/정정(02)
-        # Input: 주문 번호(get_orders 를 호출하여 얻은 DataFrame 의 index  column 값이 취소 가능한 주문번호임)
-        #       주문점(통상 06010), 주문수량, 주문가격, 상품코드(01), 주문유형(00), 정정구분(취소-02, 정정-01)
-        # Output: APIResponse object
-        url = "/uapi/domestic-stock/v1/trading/order-rvsecncl"
-        tr_id = "TTTC0013U"
-
-        params = {
-            "CANO": self.account_num,
-            "ACNT_PRDT_CD": prd_code,
-            "KRX_FWDG_ORD_ORGNO": order_branch,
-            "ORGN_ODNO": order_no,
-            "ORD_DVSN": order_dv,
-            "RVSE_CNCL_DVSN_CD": cncl_dv,  # 취소(02)
-            "ORD_QTY": str(order_qty),
-            "ORD_UNPR": str(order_price),
-            "QTY_ALL_ORD_YN": qty_all_yn,
-            "EXCG_ID_DVSN_CD": exchange,
+            "ACNT_PRDT_CD": prd_code,
+            "CTX_AREA_FK100": '',
+            "CTX_AREA_NK100": '',
+            "INQR_DVSN_1": '0',
+            "INQR_DVSN_2": '0'
         }
 
-        t1 = self._url_fetch(url, tr_id, params=params, is_post_request=True)
-
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
+        t1 = self._url_fetch_all(url, tr_id, params)
+        if t1 is not None and t1.is_ok() and t1.get_body().output:
+            return get_frame_schema(tr_id).build(t1.get_body().output)
         else:
-            t1.print_error()
             return None
 
-    def _overseas_do_cancel_revise(self, order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv):
+    def _do_cancel_revise(self, order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, exchange="KRX"):
         # 특정 주문 취소(01)/정정(02)
         # Input: 주문 번호(get_orders 를 호출하여 얻은 DataFrame 의 index  column 값이 취소 가능한 주문번호임)
         #       주문점(통상 06010), 주문수량, 주문가격, 상품코드(01), 주문유형(00), 정정구분(취소-02, 정정-01)
         # Output: APIResponse object
-        url = "/uapi/overseas-stock/v1/trading/order-rvsecncl"
-        tr_id = "TTTT1004U"
-
-        params = {
-            "CANO": self.account_num,
-            "ACNT_PRDT_CD": prd_code,
-            "OVRS_EXCG_CD": order_branch,
-            "PDNO": stock_code,
-            "ORGN_ODNO": order_no,
-            "ORD_SVR_DVSN_CD": "0",
-            "RVSE_CNCL_DVSN_CD": cncl_dv,  # 취소(02)
-            "ORD_QTY": str(order_qty),
-            "OVRS_ORD_UNPR": str(order_price),
-        }
-
-        t1 = self._url_fetch(url, tr_id, params=params, is_post_request=True)
+        url, tr_id, params = self._do_cancel_revise_request(order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn, exchange)
+        t1 = self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
 
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+    def _overseas_do_cancel_revise(self, order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv):
+        # 특정 주문 취소(01)/정정(02)
+        # Input: 주문 번호(get_orders 를 호출하여 얻은 DataFrame 의 index  column 값이 취소 가능한 주문번호임)
+        #       주문점(통상 06010), 주문수량, 주문가격, 상품코드(01), 주문유형(00), 정정구분(취소-02, 정정-01)
+        # Output: APIResponse object
+        url, tr_id, params = self._overseas_do_cancel_revise_request(order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv)
+        t1 = self._url_fetch(url, tr_id, params, is_post_request=True)
+        return self._order_result(t1)
 
     def do_cancel(self, order_no, order_qty, order_price="01", order_branch='06010', prd_code='01', order_dv='00', cncl_dv='02', qty_all_yn="Y"):
         return self._do_cancel_revise(order_no, order_branch, order_qty, order_price, prd_code, order_dv, cncl_dv, qty_all_yn)
@@ -771,38 +2114,125 @@ class KoreaInvestAPI:
     def overseas_do_revise(self, order_no, stock_code, order_qty, order_price="0", order_branch='06010', prd_code='01', cncl_dv='01'):
         return self._overseas_do_cancel_revise(order_no, stock_code, order_branch, order_qty, order_price, prd_code, cncl_dv)
 
-    def overseas_do_cancel_all(self, skip_codes=[]):
-        tdf = self.get_overseas_orders()
-        if tdf is not None:
-            for order_num, row in tdf.iterrows():
-                stock_code = row["종목코드"]
-                if stock_code in skip_codes:
-                    continue
-                exchange = row["거래소코드"]
-                price = row["주문가격"]
-                qty = row["주문수량"]
-                ar = self.overseas_do_cancel(order_num, stock_code, qty, price, exchange)
-                logger.info(f"get_error_code: {ar.get_error_code()}, get_error_message: {ar.get_error_message()}")
-                time.sleep(0.02)
-
-    def do_cancel_all(self, skip_codes=[]):
-        tdf = self.get_orders()
-        if tdf is not None:
-            for order_num, row in tdf.iterrows():
-                stock_code = row["종목코드"]
-                if stock_code in skip_codes:
-                    continue
-                branch = row["주문점"]
-                price = row["주문가격"]
-                qty = row["주문수량"]
-                ar = self.do_cancel(order_num, qty, price, branch)
-                logger.info(f"get_error_code: {ar.get_error_code()}, get_error_message: {ar.get_error_message()}")
-                time.sleep(0.02)
-
-    def get_my_complete(self, sdt, edt=None, prd_code='01', zipFlag=True):
-        # 내 계좌의 일별 주문 체결 조회
-        # Input: 시작일, 종료일 (Option)지정하지 않으면 현재일
-        # output: DataFrame
+    def do_orders(self, orders, max_workers=DEFAULT_BASKET_WORKERS, retry=0, use_hash=False):
+        # 여러 신규 주문을 동시에 전송하고 주문별 결과 DataFrame 반환 (index 는 orders 의 순서)
+        # Input: do_order 인자 dict 목록 또는 같은 열을 가진 DataFrame
+        #        (stock_code, order_qty, order_price 필수, buy_flag/order_type/prd_code/exchange 는 do_order 와 같은 기본값)
+        # 응답을 받지 못한 신규 주문은 실제로 접수됐을 수 있으므로 기본값은 재전송하지 않는다 (retry=0)
+        if isinstance(orders, pd.DataFrame):
+            orders = orders.to_dict('records')
+        requests_by_key = dict()
+        codes = dict()
+        for i, order in enumerate(orders):
+            requests_by_key[i] = self._do_order_request(
+                order['stock_code'], order['order_qty'], order['order_price'], order.get('prd_code', '01'),
+                order.get('buy_flag', True), order.get('order_type', '00'), order.get('exchange', 'KRX'),
+            )
+            codes[i] = order['stock_code']
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'no')
+
+    def overseas_do_orders(self, orders, max_workers=DEFAULT_BASKET_WORKERS, retry=0, use_hash=False):
+        # 해외주식 신규 주문 여러 건 동시 전송 (stock_code, exchange_code, order_qty, order_price 필수)
+        if isinstance(orders, pd.DataFrame):
+            orders = orders.to_dict('records')
+        requests_by_key = dict()
+        codes = dict()
+        for i, order in enumerate(orders):
+            requests_by_key[i] = self._overseas_do_order_request(
+                order['stock_code'], order['exchange_code'], order['order_qty'], order['order_price'],
+                order.get('prd_code', '01'), order.get('buy_flag', True), order.get('order_type', '00'),
+            )
+            codes[i] = order['stock_code']
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'no')
+
+    def do_revises(self, revisions, max_workers=DEFAULT_BASKET_WORKERS, retry=DEFAULT_BULK_RETRY, use_hash=False):
+        # 여러 주문을 동시에 정정하고 원주문번호를 index 로 하는 결과 DataFrame 반환
+        # Input: do_revise 인자 dict 목록 또는 DataFrame (order_no, order_qty, order_price 필수, stock_code 는 결과 표시용)
+        if isinstance(revisions, pd.DataFrame):
+            revisions = revisions.to_dict('records')
+        requests_by_key = dict()
+        codes = dict()
+        for revision in revisions:
+            order_no = revision['order_no']
+            requests_by_key[order_no] = self._do_cancel_revise_request(
+                order_no, revision.get('order_branch', '06010'), revision['order_qty'], revision['order_price'],
+                revision.get('prd_code', '01'), revision.get('order_dv', '00'), '01', revision.get('qty_all_yn', 'Y'),
+                revision.get('exchange', 'KRX'),
+            )
+            codes[order_no] = revision.get('stock_code', '')
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'odno')
+
+    def overseas_do_revises(self, revisions, max_workers=DEFAULT_BASKET_WORKERS, retry=DEFAULT_BULK_RETRY, use_hash=False):
+        # 해외주식 주문 여러 건 동시 정정 (order_no, stock_code, exchange_code, order_qty, order_price 필수)
+        if isinstance(revisions, pd.DataFrame):
+            revisions = revisions.to_dict('records')
+        requests_by_key = dict()
+        codes = dict()
+        for revision in revisions:
+            order_no = revision['order_no']
+            requests_by_key[order_no] = self._overseas_do_cancel_revise_request(
+                order_no, revision['stock_code'], revision['exchange_code'], revision['order_qty'], revision['order_price'],
+                revision.get('prd_code', '01'), '01',
+            )
+            codes[order_no] = revision['stock_code']
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'odno')
+
+    def do_cancels(self, orders=None, skip_codes=(), max_workers=DEFAULT_BASKET_WORKERS, retry=DEFAULT_BULK_RETRY, use_hash=False):
+        # 미체결 주문을 동시에 취소하고 원주문번호를 index 로 하는 결과 DataFrame 반환
+        # orders: get_orders() 결과 (None 이면 조회), skip_codes 종목은 취소하지 않는다
+        if orders is None:
+            orders = self.get_orders()
+        if orders is None or orders.empty:
+            return make_order_result_frame(dict(), dict(), 'odno')
+        if len(skip_codes):
+            orders = orders[~orders['종목코드'].isin(skip_codes)]
+        requests_by_key = dict()
+        codes = dict()
+        for order_no, stock_code, branch, qty, price in zip(
+            orders.index, orders['종목코드'], orders['주문점'], orders['주문수량'], orders['주문가격'],
+        ):
+            requests_by_key[order_no] = self._do_cancel_revise_request(order_no, branch, qty, price, '01', '00', '02', 'Y', 'KRX')
+            codes[order_no] = stock_code
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'odno')
+
+    def overseas_do_cancels(self, orders=None, skip_codes=(), max_workers=DEFAULT_BASKET_WORKERS, retry=DEFAULT_BULK_RETRY, use_hash=False):
+        # 해외주식 미체결 주문 동시 취소 (orders: get_overseas_orders() 결과, None 이면 조회)
+        if orders is None:
+            orders = self.get_overseas_orders()
+        if orders is None or orders.empty:
+            return make_order_result_frame(dict(), dict(), 'odno')
+        if len(skip_codes):
+            orders = orders[~orders['종목코드'].isin(skip_codes)]
+        requests_by_key = dict()
+        codes = dict()
+        for order_no, stock_code, exchange, qty, price in zip(
+            orders.index, orders['종목코드'], orders['거래소코드'], orders['주문수량'], orders['주문가격'],
+        ):
+            requests_by_key[order_no] = self._overseas_do_cancel_revise_request(order_no, stock_code, exchange, qty, price, '01', '02')
+            codes[order_no] = stock_code
+        results = self._submit_many(requests_by_key, max_workers=max_workers, retry=retry, use_hash=use_hash)
+        return make_order_result_frame(results, codes, 'odno')
+
+    def overseas_do_cancel_all(self, skip_codes=()):
+        # 해외주식 미체결 전체 취소 (skip_codes 종목 제외). 주문별 결과 DataFrame 반환
+        df = self.overseas_do_cancels(skip_codes=skip_codes)
+        for order_no, row in df[df['error'].notna()].iterrows():
+            logger.info(f"취소 실패 {order_no} {row['종목코드']}: {row['error']}")
+        return df
+
+    def do_cancel_all(self, skip_codes=()):
+        # 미체결 전체 취소 (skip_codes 종목 제외). 주문별 결과 DataFrame 반환
+        df = self.do_cancels(skip_codes=skip_codes)
+        for order_no, row in df[df['error'].notna()].iterrows():
+            logger.info(f"취소 실패 {order_no} {row['종목코드']}: {row['error']}")
+        return df
+
+    def _my_complete_request(self, sdt, edt, prd_code):
         url = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
         tr_id = "TTTC8001R"
 
@@ -828,52 +2258,47 @@ class KoreaInvestAPI:
             "CTX_AREA_FK100": "",
             "CTX_AREA_NK100": ""
         }
+        return url, tr_id, params
 
-        t1 = self._url_fetch(url, tr_id, params)
+    @staticmethod
+    def _my_complete_frame(output1, zipFlag):
+        if not output1:
+            return pd.DataFrame()
+        if (zipFlag):
+            return get_frame_schema('TTTC8001R').build(output1)
+        tdf = pd.DataFrame(output1)
+        tdf.set_index('odno', inplace=True)
+        return tdf
+
+    def get_my_complete(self, sdt, edt=None, prd_code='01', zipFlag=True):
+        # 내 계좌의 일별 주문 체결 조회 (연속조회로 전체 기간을 모두 가져옴)
+        # Input: 시작일, 종료일 (Option)지정하지 않으면 현재일
+        # output: DataFrame
+        url, tr_id, params = self._my_complete_request(sdt, edt, prd_code)
+        t1 = self._url_fetch_all(url, tr_id, params, ('output1',))
 
         # output1 과 output2 로 나뉘어서 결과가 옴. 지금은 output1만 DF 로 변환
         if t1 is not None and t1.is_ok():
-            tdf = pd.DataFrame(t1.get_body().output1)
-            tdf.set_index('odno', inplace=True)
-            if (zipFlag):
-                return tdf[
-                    [
-                        'ord_dt', 'orgn_odno', 'sll_buy_dvsn_cd_name', 'pdno',
-                        'ord_qty', 'ord_unpr', 'avg_prvs', 'cncl_yn',
-                        'tot_ccld_amt', 'rmn_qty',
-                    ]
-                ]
-            else:
-                return tdf
+            return self._my_complete_frame(t1.get_body().output1, zipFlag)
         elif t1 is None:
             return pd.DataFrame()
         else:
             t1.print_error()
             return pd.DataFrame()
 
-    def get_buyable_cash(self, stock_code='', qry_price=0, prd_code='01'):
-        url = "/uapi/domestic-stock/v1/trading/inquire-daily-ccld"
-        tr_id = "TTTC8908R"
-
-        params = {
-            "CANO": self.account_num,
-            "ACNT_PRDT_CD": prd_code,
-            "PDNO": stock_code,
-            "ORD_UNPR": str(qry_price),
-            "ORD_DVSN": "02",
-            "CMA_EVLU_AMT_ICLD_YN": "Y",  # API 설명부분 수정 필요 (YN)
-            "OVRS_ICLD_YN": "N"
-        }
+    def iter_my_complete(self, sdt, edt=None, prd_code='01', zipFlag=True):
+        # get_my_complete 의 페이지 단위 generator. 긴 기간의 체결 내역을 한 페이지씩 DataFrame 으로 처리할 때 사용
+        url, tr_id, params = self._my_complete_request(sdt, edt, prd_code)
+        for t1 in self.iter_pages(url, tr_id, params):
+            if not t1.is_ok():
+                t1.print_error()
+                return
+            yield self._my_complete_frame(t1.get_body().output1, zipFlag)
 
+    def get_buyable_cash(self, stock_code='', qry_price=0, prd_code='01'):
+        url, tr_id, params = self._buyable_cash_request(stock_code, qry_price, prd_code)
         t1 = self._url_fetch(url, tr_id, params)
-
-        if t1 is not None and t1.is_ok():
-            return int(t1.get_body().output['ord_psbl_cash'])
-        elif t1 is None:
-            return 0
-        else:
-            t1.print_error()
-            return 0
+        return self._buyable_cash_result(t1)
 
     def get_stock_completed(self, stock_no):
         # 종목별 체결 Data
@@ -903,16 +2328,7 @@ class KoreaInvestAPI:
         # 종목별 history data (현재 기준 30개만 조회 가능)
         # Input: 종목코드, 구분(D, W, M 기본값은 D)
         # output: 시세 History DataFrame
-        url = "/uapi/domestic-stock/v1/quotations/inquire-daily-price"
-        tr_id = "FHKST01010400"
-
-        params = {
-            "FID_COND_MRKT_DIV_CODE": 'J',
-            "FID_INPUT_ISCD": stock_no,
-            "FID_PERIOD_DIV_CODE": gb_cd,
-            "FID_ORG_ADJ_PRC": "0000000001"
-        }
-
+        url, tr_id, params = self._stock_history_request(stock_no, gb_cd)
         t1 = self._url_fetch(url, tr_id, params)
 
         if t1 is not None and t1.is_ok():
@@ -928,23 +2344,16 @@ class KoreaInvestAPI:
         # Input: 종목코드, 구분(D, W, M 기본값은 D), (Option)adVar 을 True 로 설정하면
         #        OHLCV 외에 inter_volatile 과 pct_change 를 추가로 반환한다.
         # output: 시세 History OHLCV DataFrame
-        hdf1 = self.get_stock_history(stock_no, gb_cd)
-
-        chosend_fld = ['stck_bsop_date', 'stck_oprc', 'stck_hgpr', 'stck_lwpr', 'stck_clpr', 'acml_vol']
-        renamed_fld = ['Date', 'Open', 'High', 'Low', 'Close', 'Volume']
-
-        hdf1 = hdf1[chosend_fld]
-        ren_dict = dict()
-        i = 0
-        for x in chosend_fld:
-            ren_dict[x] = renamed_fld[i]
-            i += 1
+        url, tr_id, params = self._stock_history_request(stock_no, gb_cd)
+        t1 = self._url_fetch(url, tr_id, params)
 
-        hdf1.rename(columns=ren_dict, inplace=True)
-        hdf1[['Date']] = hdf1[['Date']].apply(pd.to_datetime)
-        hdf1[['Open', 'High', 'Low', 'Close', 'Volume']] = hdf1[['Open', 'High', 'Low', 'Close', 'Volume']].apply(
-            pd.to_numeric)
-        hdf1.set_index('Date', inplace=True)
+        schema = get_frame_schema(tr_id)
+        if t1 is not None and t1.is_ok():
+            hdf1 = schema.build(t1.get_body().output)
+        else:
+            if t1 is not None:
+                t1.print_error()
+            hdf1 = schema.empty_frame()
 
         if (adVar):
             hdf1['inter_volatile'] = (hdf1['High'] - hdf1['Low']) / hdf1['Close']
@@ -952,6 +2361,75 @@ class KoreaInvestAPI:
 
         return hdf1
 
+    def iter_stock_history_pages(self, stock_no, start_date, end_date, gb_cd='D', adjusted=False):
+        # 기간별 시세를 end_date 부터 과거 방향으로 100개씩 조회해서 페이지(output2 list) 단위로 반환
+        # 다음 페이지는 이전 페이지의 가장 오래된 날짜 전날까지로 요청한다.
+        while end_date >= start_date:
+            url, tr_id, params = self._period_chart_request(stock_no, start_date, end_date, gb_cd, adjusted)
+            t1 = self._url_fetch(url, tr_id, params)
+            if t1 is None:
+                return
+            if not t1.is_ok():
+                t1.print_error()
+                return
+            rows = [row for row in (t1.get_body().output2 or []) if row.get('stck_bsop_date')]
+            if not rows:
+                return
+            yield rows
+            earliest = min(row['stck_bsop_date'] for row in rows)
+            end_date = (datetime.datetime.strptime(earliest, "%Y%m%d") - datetime.timedelta(days=1)).strftime("%Y%m%d")
+
+    def get_stock_history_range(self, stock_no, start_date, end_date=None, gb_cd='D', adVar=False, adjusted=False):
+        # start_date ~ end_date(YYYYMMDD, 기본값 오늘) 기간 전체의 history 를 get_stock_history_by_ohlcv 와 같은 형식으로 반환
+        # (30개 제한 없음, 최근 날짜가 위). adjusted 를 주지 않으면 get_stock_history_by_ohlcv 처럼 원주가
+        end_date = end_date or datetime.datetime.now().strftime("%Y%m%d")
+        rows = dict()
+        for page in self.iter_stock_history_pages(stock_no, start_date, end_date, gb_cd, adjusted):
+            for row in page:
+                rows.setdefault(row['stck_bsop_date'], row)  # 겹치는 구간 중복 제거
+        return make_ohlcv_frame(
+            [rows[date] for date in sorted(rows, reverse=True)], 'stck_bsop_date', None, 'stck_clpr', 'acml_vol', adVar,
+        )
+
+    def iter_minute_history_pages(self, stock_no, start_date, end_date=None, end_hour=MINUTE_HISTORY_END_HOUR):
+        # end_date 부터 start_date 까지 날짜별로, 각 날짜는 end_hour 부터 과거 방향으로 120개씩 분봉을 조회해서 페이지 단위로 반환
+        end_date = end_date or datetime.datetime.now().strftime("%Y%m%d")
+        date = datetime.datetime.strptime(end_date, "%Y%m%d")
+        start = datetime.datetime.strptime(start_date, "%Y%m%d")
+        empty_days = 0
+        while date >= start and empty_days < MINUTE_HISTORY_EMPTY_DAYS:
+            day = date.strftime("%Y%m%d")
+            hour = end_hour
+            empty_days += 1
+            while True:
+                url, tr_id, params = self._daily_minute_chart_request(stock_no, day, hour)
+                t1 = self._url_fetch(url, tr_id, params)
+                if t1 is None:
+                    return
+                if not t1.is_ok():
+                    t1.print_error()
+                    return
+                output2 = t1.get_body().output2 or []
+                rows = [row for row in output2 if row.get('stck_bsop_date') == day]
+                if rows:
+                    empty_days = 0
+                    yield rows
+                if len(rows) < len(output2) or len(output2) < DAILY_MINUTE_CHART_PAGE_SIZE:
+                    break  # 그 날짜의 첫 분봉까지 받음
+                earliest = datetime.datetime.strptime(day + min(row['stck_cntg_hour'] for row in rows), "%Y%m%d%H%M%S")
+                hour = (earliest - datetime.timedelta(minutes=1)).strftime("%H%M%S")
+            date -= datetime.timedelta(days=1)
+
+    def get_minute_history_range(self, stock_no, start_date, end_date=None, end_hour=MINUTE_HISTORY_END_HOUR):
+        # start_date ~ end_date 기간의 1분봉 OHLCV DataFrame (index: 일시, 최근 시간이 위)
+        rows = dict()
+        for page in self.iter_minute_history_pages(stock_no, start_date, end_date, end_hour):
+            for row in page:
+                rows.setdefault(row['stck_bsop_date'] + row['stck_cntg_hour'], row)
+        return make_ohlcv_frame(
+            [rows[key] for key in sorted(rows, reverse=True)], 'stck_bsop_date', 'stck_cntg_hour', 'stck_prpr', 'cntg_vol',
+        )
+
     def get_stock_investor(self, stock_no):
         # 투자자별 매매 동향
         # Input: 종목코드
@@ -967,23 +2445,8 @@ class KoreaInvestAPI:
         t1 = self._url_fetch(url, tr_id, params)
 
         if t1 is not None and t1.is_ok():
-            hdf1 = pd.DataFrame(t1.get_body().output)
-
-            chosend_fld = ['stck_bsop_date', 'prsn_ntby_qty', 'frgn_ntby_qty', 'orgn_ntby_qty']
-            renamed_fld = ['Date', 'PerBuy', 'ForBuy', 'OrgBuy']
-
-            hdf1 = hdf1[chosend_fld]
-            ren_dict = dict()
-            i = 0
-            for x in chosend_fld:
-                ren_dict[x] = renamed_fld[i]
-                i += 1
-
-            hdf1.rename(columns=ren_dict, inplace=True)
-            hdf1[['Date']] = hdf1[['Date']].apply(pd.to_datetime)
-            hdf1[['PerBuy', 'ForBuy', 'OrgBuy']] = hdf1[['PerBuy', 'ForBuy', 'OrgBuy']].apply(pd.to_numeric)
+            hdf1 = get_frame_schema(tr_id).build(t1.get_body().output)
             hdf1['EtcBuy'] = (hdf1['PerBuy'] + hdf1['ForBuy'] + hdf1['OrgBuy']) * -1
-            hdf1.set_index('Date', inplace=True)
             # sum을 맨 마지막에 추가하는 경우
             # tdf.append(tdf.sum(numeric_only=True), ignore_index=True) <- index를 없애고  만드는 경우
             # tdf.loc['Total'] = tdf.sum() <- index 에 Total 을 추가하는 경우
@@ -996,153 +2459,26 @@ class KoreaInvestAPI:
 
     def overseas_get_send_data(self, cmd=None, stockcode=None):
         # 1.주식호가, 2.주식호가해제, 3.주식체결, 4.주식체결해제, 5.주식체결통보(고객), 6.주식체결통보해제(고객), 7.주식체결통보(모의), 8.주식체결통보해제(모의)
-        # 입력값 체크 step
-        assert 0 < cmd < 9, f"Wrong Input Data: {cmd}"
-
-        # 입력값에 따라 전송 데이터셋 구분 처리
-        if cmd == 1:  # 주식호가 등록
-            tr_id = 'HDFSASP0'
-            tr_type = '1'
-        elif cmd == 2:  # 주식호가 등록해제
-            tr_id = 'HDFSASP0'
-            tr_type = '2'
-        elif cmd == 3:  # 주식체결 등록
-            tr_id = 'HDFSCNT0'
-            tr_type = '1'
-        elif cmd == 4:  # 주식체결 등록해제
-            tr_id = 'HDFSCNT0'
-            tr_type = '2'
-        elif cmd == 5:  # 주식체결통보 등록(고객용)
-            tr_id = 'H0GSCNI0'  # 고객체결통보
-            tr_type = '1'
-        elif cmd == 6:  # 주식체결통보 등록해제(고객용)
-            tr_id = 'H0GSCNI0'  # 고객체결통보
-            tr_type = '2'
-
-        # send json, 체결통보는 tr_key 입력항목이 상이하므로 분리를 한다.
-        if cmd in (5, 6, 7, 8):
-            senddata = '{"header":{"approval_key":"' + self.websocket_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + self.htsid + '"}}}'
-        else:
-            senddata = '{"header":{"approval_key":"' + self.websocket_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + stockcode + '"}}}'
-        return senddata
+        return self.subscription_registry.send_data('overseas', cmd, stockcode)
 
     def get_send_data(self, cmd=None, stockcode=None):
         # 1.주식호가, 2.주식호가해제, 3.주식체결, 4.주식체결해제, 5.주식체결통보(고객), 6.주식체결통보해제(고객), 7.주식체결통보(모의), 8.주식체결통보해제(모의)
-        # 입력값 체크 step
-        assert 0 < cmd < 9, f"Wrong Input Data: {cmd}"
-
-        # 입력값에 따라 전송 데이터셋 구분 처리
-        if cmd == 1:  # 주식호가 등록
-            tr_id = 'H0UNASP0'
-            tr_type = '1'
-        elif cmd == 2:  # 주식호가 등록해제
-            tr_id = 'H0UNASP0'
-            tr_type = '2'
-        elif cmd == 3:  # 주식체결 등록
-            tr_id = 'H0UNCNT0'
-            tr_type = '1'
-        elif cmd == 4:  # 주식체결 등록해제
-            tr_id = 'H0UNCNT0'
-            tr_type = '2'
-        elif cmd == 5:  # 주식체결통보 등록(고객용)
-            tr_id = 'H0STCNI0'  # 고객체결통보
-            tr_type = '1'
-        elif cmd == 6:  # 주식체결통보 등록해제(고객용)
-            tr_id = 'H0STCNI0'  # 고객체결통보
-            tr_type = '2'
-        elif cmd == 7:  # 주식체결통보 등록(모의)
-            tr_id = 'H0STCNI9'  # 테스트용 직원체결통보
-            tr_type = '1'
-        elif cmd == 8:  # 주식체결통보 등록해제(모의)
-            tr_id = 'H0STCNI9'  # 테스트용 직원체결통보
-            tr_type = '2'
-
-        # send json, 체결통보는 tr_key 입력항목이 상이하므로 분리를 한다.
-        if cmd in (5, 6, 7, 8):
-            senddata = '{"header":{"approval_key":"' + self.websocket_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + self.htsid + '"}}}'
-        else:
-            senddata = '{"header":{"approval_key":"' + self.websocket_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + stockcode + '"}}}'
-        return senddata
-    
-    def future_options_do_amend_cancel_order(self, order_qty, order_price=0, order_num='', is_cancel_order=True, prd_code="03", order_type="04"):
-        url = "/uapi/domestic-futureoption/v1/trading/order-rvsecncl"
-        if self.is_paper_trading:
-            tr_id = "VTTO1103U"
-        else:
-            tr_id = "TTTO1103U"
-
-        params = {
-            'ORD_PRCS_DVSN_CD': "02",
-            'CANO': self.future_account_num,
-            'ACNT_PRDT_CD': prd_code,
-            'RVSE_CNCL_DVSN_CD': "02" if is_cancel_order else "01",
-            'ORGN_ODNO': order_num,
-            'ORD_QTY': str(order_qty),
-            'UNIT_PRICE': str(order_price),
-            "NMPR_TYPE_CD": order_type,
-            "KRX_NMPR_CNDT_CD": "0",
-            'RMN_QTY_YN': 'Y',
-            "ORD_DVSN_CD": order_type,
-        }
+        return self.subscription_registry.send_data('domestic', cmd, stockcode)
 
+    def future_options_do_amend_cancel_order(self, order_qty, order_price=0, order_num='', is_cancel_order=True, prd_code="03", order_type="04"):
+        url, tr_id, params = self._future_options_do_amend_cancel_order_request(order_qty, order_price, order_num, is_cancel_order, prd_code, order_type)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=True)
-
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._order_result(t1)
 
     def future_options_do_order(self, product_code, order_qty, order_price=0, is_buy_order=True, prd_code="03", order_type="04"):
-        url = "/uapi/domestic-futureoption/v1/trading/order"
-        if self.is_paper_trading:
-            tr_id = "VTTO1101U"
-        else:
-            tr_id = "TTTO1101U"
-
-        params = {
-            'ORD_PRCS_DVSN_CD': "02",
-            'CANO': self.future_account_num,
-            'ACNT_PRDT_CD': prd_code,
-            "SLL_BUY_DVSN_CD": "02" if is_buy_order else "01",
-            'SHTN_PDNO': product_code,
-            'ORD_QTY': str(order_qty),
-            'UNIT_PRICE': str(order_price),
-            "NMPR_TYPE_CD": order_type,
-            "KRX_NMPR_CNDT_CD": "0",
-            "ORD_DVSN_CD": order_type,
-        }
-
+        url, tr_id, params = self._future_options_do_order_request(product_code, order_qty, order_price, is_buy_order, prd_code, order_type)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=True)
-
-        if t1 is not None and t1.is_ok():
-            return t1
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._order_result(t1)
 
     def get_futures_price(self, future_code):
-        url = "/uapi/domestic-futureoption/v1/quotations/inquire-price"
-        tr_id = "FHMIF10000000"
-
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "F",
-            "FID_INPUT_ISCD": future_code,
-        }
-
+        url, tr_id, params = self._futures_price_request(future_code)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=False)
-
-        if t1 is not None and t1.is_ok():
-            return float(t1.get_body().output1['futs_prpr'])
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._futures_price_result(t1)
 
     def get_futures_open_price(self, future_code):
         url = "/uapi/domestic-futureoption/v1/quotations/inquire-price"
@@ -1163,7 +2499,8 @@ class KoreaInvestAPI:
             t1.print_error()
             return None
 
-    def get_future_option_orders(self):
+    def _future_option_orders_request(self, sdt, edt, ccld_nccs_dvsn='02'):
+        # 선물옵션 주문체결내역. ccld_nccs_dvsn: 00 전체, 01 체결, 02 미체결
         url = "/uapi/domestic-futureoption/v1/trading/inquire-ccnl"
         if self.is_paper_trading:
             tr_id = "VTTO5201R"
@@ -1173,10 +2510,10 @@ class KoreaInvestAPI:
         params = {
             'CANO': self.future_account_num,
             'ACNT_PRDT_CD': '03',
-            'STRT_ORD_DT': datetime.datetime.now().strftime("%Y%m%d"),
-            'END_ORD_DT': datetime.datetime.now().strftime("%Y%m%d"),
+            'STRT_ORD_DT': sdt,
+            'END_ORD_DT': edt,
             'SLL_BUY_DVSN_CD': "00",
-            'CCLD_NCCS_DVSN': '02',
+            'CCLD_NCCS_DVSN': ccld_nccs_dvsn,
             'SORT_SQN': 'DS',
             'STRT_ODNO': '0',
             'PDNO': '',
@@ -1184,28 +2521,22 @@ class KoreaInvestAPI:
             'CTX_AREA_FK200': '',
             'CTX_AREA_NK200': '',
         }
+        return url, tr_id, params
 
-        t1 = self._url_fetch(url, tr_id, params, is_post_request=False)
+    def get_future_option_orders(self):
+        today = datetime.datetime.now().strftime("%Y%m%d")
+        url, tr_id, params = self._future_option_orders_request(today, today, '02')
+
+        t1 = self._url_fetch_all(url, tr_id, params, ('output1',))
 
         if t1 is not None and t1.is_ok():
+            schema = get_frame_schema(tr_id)
             try:
-                df = pd.DataFrame(t1.get_body().output1)[['pdno', 'prdt_name', 'ord_qty', 'qty', 'odno', 'trad_dvsn_name', 'nmpr_type_name']]
-                df.rename(
-                    columns={
-                        'pdno': '종목코드',
-                        'prdt_name': '종목명',
-                        'ord_qty': '주문수량',
-                        'qty': '미체결수량',
-                        'odno': '주문번호',
-                        'trad_dvsn_name': '매수매도구분',
-                        'nmpr_type_name': '주문유형',
-                    },
-                    inplace=True,
-                )
+                df = schema.build(t1.get_body().output1)
                 df = df[df['매수매도구분'].isin(['매수', '매도'])]
                 return df
             except:
-                return pd.DataFrame(columns=['종목코드', '종목명', '주문수량', '미체결수량', '주문번호', '매수매도구분', '주문유형'])
+                return schema.empty_frame()
         elif t1 is None:
             return None
         else:
@@ -1213,229 +2544,58 @@ class KoreaInvestAPI:
             return None
 
     def get_future_option_balance(self):
-        url = "/uapi/domestic-futureoption/v1/trading/inquire-balance"
-        if self.is_paper_trading:
-            tr_id = "VTFO6118R"
-        else:
-            tr_id = "CTFO6118R"
-
-        params = {
-            'CANO': self.future_account_num,
-            'ACNT_PRDT_CD': '03',
-            'MGNA_DVSN': "01",
-            'EXCC_STAT_CD': '1',
-            'CTX_AREA_FK200': '',
-            'CTX_AREA_NK200': '',
-        }
-
+        url, tr_id, params = self._future_option_balance_request()
         t1 = self._url_fetch(url, tr_id, params, is_post_request=False)
-
-        if t1 is not None and t1.is_ok():
-            추정예탁자산 = int(t1.get_body().output2['prsm_dpast'])
-            매매손익금액 = int(t1.get_body().output2['trad_pfls_amt_smtl'])
-            평가손익금액 = int(t1.get_body().output2['evlu_pfls_amt_smtl'])
-            return dict(매매손익금액=매매손익금액, 추정예탁자산=추정예탁자산, 평가손익금액=평가손익금액)
-        elif t1 is None:
-            return None
-        else:
-            t1.print_error()
-            return None
+        return self._future_option_balance_result(t1)
 
     def display_options(self, is_mini=False, target_date='202408'):
-        url = "/uapi/domestic-futureoption/v1/quotations/display-board-callput"
-        tr_id = "FHPIF05030100"
+        # 월물 옵션 전광판 (콜/풋을 행사가 기준으로 합친 DataFrame)
+        return self._display_option_board(target_date, OPTION_BOARD_MINI if is_mini else OPTION_BOARD_MONTHLY)
 
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "O",
-            "FID_COND_SCR_DIV_CODE": "20503",
-            "FID_MRKT_CLS_CODE": "CO",
-            "FID_MTRT_CNT": target_date,
-            "FID_COND_MRKT_CLS_CODE": "MKI" if is_mini else "",
-            "FID_MRKT_CLS_CODE1": "PO",
-        }
+    def display_weekly_options(self, is_monday=False, target_date='240801'):
+        # 위클리 옵션 전광판 (월요일물/목요일물)
+        return self._display_option_board(target_date, OPTION_BOARD_WEEKLY_MON if is_monday else OPTION_BOARD_WEEKLY_THU)
 
+    def _display_option_board(self, target_date, market_cls_code):
+        url, tr_id, params = self._option_board_request(target_date, market_cls_code)
         t1 = self._url_fetch(url, tr_id, params, is_post_request=False)
 
         if t1 is not None and t1.is_ok():
-            hdf1 = pd.DataFrame(t1.get_body().output1)[['optn_shrn_iscd', 'acml_vol', 'optn_prdy_vrss', 'optn_prdy_ctrt', 'optn_prpr', 'acpr']]
-            hdf1.rename(
-                columns={
-                    'optn_shrn_iscd': '종목코드',
-                    'acml_vol': '거래량',
-                    'optn_prdy_vrss': '전일대비',
-                    'optn_prdy_ctrt': '등락율',
-                    'optn_prpr': '현재가',
-                    'acpr': '행사가',
-                },
-                inplace=True
-            )
-            for col in hdf1.columns:
-                if col == '종목코드':
-                    hdf1[col] = hdf1[col].astype(str)
-                elif col == '거래량':
-                    hdf1[col] = hdf1[col].astype(int)
-                else:
-                    hdf1[col] = hdf1[col].astype(float)
-            hdf2 = pd.DataFrame(t1.get_body().output2)[['optn_shrn_iscd', 'acml_vol', 'optn_prdy_vrss', 'optn_prdy_ctrt', 'optn_prpr', 'acpr']]
-            hdf2.rename(
-                columns={
-                    'optn_shrn_iscd': '종목코드',
-                    'acml_vol': '거래량',
-                    'optn_prdy_vrss': '전일대비',
-                    'optn_prdy_ctrt': '등락율',
-                    'optn_prpr': '현재가',
-                    'acpr': '행사가',
-                },
-                inplace=True
-            )
-            for col in hdf2.columns:
-                if col == '종목코드':
-                    hdf2[col] = hdf2[col].astype(str)
-                elif col == '거래량':
-                    hdf2[col] = hdf2[col].astype(int)
-                else:
-                    hdf2[col] = hdf2[col].astype(float)
-            hdf2 = hdf2[hdf2.columns[::-1]]
-            # hdf1과 hdf2를 'acpr'를 기준으로 내부 조인
-            merged_df = pd.merge(hdf1, hdf2, on='행사가', suffixes=('_콜', '_풋'))
-            # 'acpr'를 중간으로 이동시키는 방법
-            cols = list(merged_df.columns)
-            # 'acpr' 컬럼을 제거
-            cols.remove('행사가')
-            # 새로운 순서 설정: 'acpr'를 중간에 위치
-            new_col_order = cols[:len(cols) // 2] + ['행사가'] + cols[len(cols) // 2:]
-            # 컬럼 순서 적용
-            merged_df = merged_df[new_col_order]
-            return merged_df
+            return self._option_board_frame(t1.get_body().output1, t1.get_body().output2)
         elif t1 is None:
             return pd.DataFrame(), pd.DataFrame()
         else:
             t1.print_error()
             return pd.DataFrame(), pd.DataFrame()
 
-    def display_weekly_options(self, is_monday=False, target_date='240801'):
-        url = "/uapi/domestic-futureoption/v1/quotations/display-board-callput"
-        tr_id = "FHPIF05030100"
-
-        params = {
-            "FID_COND_MRKT_DIV_CODE": "O",
-            "FID_COND_SCR_DIV_CODE": "20503",
-            "FID_MRKT_CLS_CODE": "CO",
-            "FID_MTRT_CNT": target_date,
-            "FID_COND_MRKT_CLS_CODE": "WKM" if is_monday else "WKI",
-            "FID_MRKT_CLS_CODE1": "PO",
-        }
+    def get_future_options_send_data(self, cmd=None, stockcode=None):
+        # 0.지수옵션체결해제, 1.지수옵션체결, 2.지수옵션호가, 3.지수선물체결, 4.지수옵션호가해제, 5.체결통보(고객), 6.체결통보해제(고객), 7.체결통보(모의), 8.체결통보해제(모의)
+        return self.subscription_registry.send_data('future_options', cmd, stockcode)
 
-        t1 = self._url_fetch(url, tr_id, params, is_post_request=False)
 
-        if t1 is not None and t1.is_ok():
-            hdf1 = pd.DataFrame(t1.get_body().output1)[['optn_shrn_iscd', 'acml_vol', 'optn_prdy_vrss', 'optn_prdy_ctrt', 'optn_prpr', 'acpr']]
-            hdf1.rename(
-                columns={
-                    'optn_shrn_iscd': '종목코드',
-                    'acml_vol': '거래량',
-                    'optn_prdy_vrss': '전일대비',
-                    'optn_prdy_ctrt': '등락율',
-                    'optn_prpr': '현재가',
-                    'acpr': '행사가',
-                },
-                inplace=True
-            )
-            for col in hdf1.columns:
-                if col == '종목코드':
-                    hdf1[col] = hdf1[col].astype(str)
-                elif col == '거래량':
-                    hdf1[col] = hdf1[col].astype(int)
-                else:
-                    hdf1[col] = hdf1[col].astype(float)
-            hdf2 = pd.DataFrame(t1.get_body().output2)[['optn_shrn_iscd', 'acml_vol', 'optn_prdy_vrss', 'optn_prdy_ctrt', 'optn_prpr', 'acpr']]
-            hdf2.rename(
-                columns={
-                    'optn_shrn_iscd': '종목코드',
-                    'acml_vol': '거래량',
-                    'optn_prdy_vrss': '전일대비',
-                    'optn_prdy_ctrt': '등락율',
-                    'optn_prpr': '현재가',
-                    'acpr': '행사가',
-                },
-                inplace=True
-            )
-            for col in hdf2.columns:
-                if col == '종목코드':
-                    hdf2[col] = hdf2[col].astype(str)
-                elif col == '거래량':
-                    hdf2[col] = hdf2[col].astype(int)
-                else:
-                    hdf2[col] = hdf2[col].astype(float)
-            hdf2 = hdf2[hdf2.columns[::-1]]
-            # hdf1과 hdf2를 'acpr'를 기준으로 내부 조인
-            merged_df = pd.merge(hdf1, hdf2, on='행사가', suffixes=('_콜', '_풋'))
-            # 'acpr'를 중간으로 이동시키는 방법
-            cols = list(merged_df.columns)
-            # 'acpr' 컬럼을 제거
-            cols.remove('행사가')
-            # 새로운 순서 설정: 'acpr'를 중간에 위치
-            new_col_order = cols[:len(cols) // 2] + ['행사가'] + cols[len(cols) // 2:]
-            # 컬럼 순서 적용
-            merged_df = merged_df[new_col_order]
-            return merged_df
-        elif t1 is None:
-            return pd.DataFrame(), pd.DataFrame()
-        else:
-            t1.print_error()
-            return pd.DataFrame(), pd.DataFrame()
+_record_types = dict()
 
-    def get_future_options_send_data(self, cmd=None, stockcode=None):
-        # 1.주식호가, 2.주식호가해제, 3.주식체결, 4.주식체결해제, 5.주식체결통보(고객), 6.주식체결통보해제(고객), 7.주식체결통보(모의), 8.주식체결통보해제(모의)
-        # 입력값 체크 step
-        assert 0 <= cmd < 9, f"Wrong Input Data: {cmd}"
-
-        # 입력값에 따라 전송 데이터셋 구분 처리
-        if cmd == 0:  # 지수옵션체결 등록
-            tr_id = 'H0IOCNT0'
-            tr_type = '2'
-        elif cmd == 1:  # 지수옵션체결 등록
-            tr_id = 'H0IOCNT0'
-            tr_type = '1'
-        elif cmd == 2:  # 지수옵션호가 등록
-            tr_id = 'H0IOASP0'
-            tr_type = '1'
-        elif cmd == 3:  # 지수선물체결 등록
-            tr_id = 'H0IFCNT0'
-            tr_type = '1'
-        elif cmd == 4:  # 지수옵션호가 해제
-            tr_id = 'H0IOASP0'
-            tr_type = '2'
-        elif cmd == 5:  # 주식체결통보 등록(고객용)
-            tr_id = 'H0IFCNI0'  # 고객체결통보
-            tr_type = '1'
-        elif cmd == 6:  # 주식체결통보 등록해제(고객용)
-            tr_id = 'H0IFCNI0'  # 고객체결통보
-            tr_type = '2'
-        elif cmd == 7:  # 주식체결통보 등록(모의)
-            tr_id = 'H0IFCNI9'  # 고객체결통보
-            tr_type = '1'
-        elif cmd == 8:  # 주식체결통보 등록해제(모의)
-            tr_id = 'H0IFCNI9'  # 고객체결통보
-            tr_type = '2'
-
-        # send json, 체결통보는 tr_key 입력항목이 상이하므로 분리를 한다.
-        if cmd in (5, 6, 7, 8):
-            senddata = '{"header":{"approval_key":"' + self.g_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + self.htsid + '"}}}'
-        else:
-            senddata = '{"header":{"approval_key":"' + self.g_approval_key + '","custtype":"' + self.custtype + '","tr_type":"' + tr_type + '","content-type":"utf-8"},"body":{"input":{"tr_id":"' + tr_id + '","tr_key":"' + stockcode + '"}}}'
-        return senddata
 
+def get_record_type(name, fields):
+    # 필드 구성별 namedtuple 클래스를 한 번만 만들어 재사용 (응답마다 클래스를 새로 만들지 않음)
+    key = (name, fields)
+    record_type = _record_types.get(key)
+    if record_type is None:
+        record_type = namedtuple(name, fields, rename=True)
+        _record_types[key] = record_type
+    return record_type
 
 
 class APIResponse:
+    __slots__ = ('_rescode', '_resp', '_header', '_body', '_err_code', '_err_message')
+
     def __init__(self, resp):
         self._rescode = resp.status_code
         self._resp = resp
-        self._header = self._set_header()
+        self._header = None  # 헤더는 get_header 를 처음 호출할 때 만든다
         self._body = self._set_body()
-        self._err_code = self._body.rt_cd
-        self._err_message = self._body.msg1
+        self._err_code = getattr(self._body, 'rt_cd', None)
+        self._err_message = getattr(self._body, 'msg1', None)
 
     def get_result_code(self):
         return self._rescode
@@ -1445,16 +2605,25 @@ class APIResponse:
         for x in self._resp.headers.keys():
             if x.islower():
                 fld[x] = self._resp.headers.get(x)
-        _th_ = namedtuple('header', fld.keys())
-        return _th_(**fld)
+        return get_record_type('header', tuple(fld))(*fld.values())
 
     def _set_body(self):
-        _tb_ = namedtuple('body', self._resp.json().keys())
-        return _tb_(**self._resp.json())
+        data = json_loads(self._resp.content)  # 본문은 bytes 그대로 한 번만 파싱
+        return get_record_type('body', tuple(data))(*data.values())
 
     def get_header(self):
+        if self._header is None:
+            self._header = self._set_header()
         return self._header
 
+    def has_next_page(self):
+        # 연속조회 응답 헤더 tr_cont: F/M 다음 데이터 있음, D/E 마지막 데이터
+        return self._resp.headers.get('tr_cont', '') in ('F', 'M')
+
+    def replace_body(self, **fields):
+        # body 의 일부 필드를 교체 (연속조회 결과를 합칠 때 사용)
+        self._body = self._body._replace(**fields)
+
     def get_body(self):
         return self._body
 
@@ -1462,13 +2631,7 @@ class APIResponse:
         return self._resp
 
     def is_ok(self):
-        try:
-            if (self.get_body().rt_cd == '0'):
-                return True
-            else:
-                return False
-        except:
-            return False
+        return self._err_code == '0'
 
     def get_error_code(self):
         return self._err_code
@@ -1503,6 +2666,52 @@ def aes_cbc_base64_dec(key, iv, cipher_text):
     return bytes.decode(unpad(cipher.decrypt(b64decode(cipher_text)), AES.block_size))
 
 
+class AESCBCDecryptor:
+    # 체결통보 복호화용. 실시간 등록 응답으로 받은 key, iv 는 세션 동안 바뀌지 않으므로 한 번만 준비한다.
+    # CBC 복호화 = ECB 복호화 결과 XOR 직전 암호문 블록(첫 블록은 iv) 이므로
+    # 상태가 없는 ECB cipher 하나를 재사용하고, 여러 건은 decrypt 한 번과 XOR 한 번으로 처리한다.
+    def __init__(self, key, iv):
+        self._ecb = AES.new(key.encode('utf-8'), AES.MODE_ECB)
+        self._iv = iv.encode('utf-8')
+
+    @staticmethod
+    def _unpad_range(plain, start, end):
+        # PKCS7 padding 을 뺀 끝 위치
+        pad_len = plain[end - 1]
+        if not 0 < pad_len <= AES.block_size or end - start < pad_len:
+            raise ValueError("Padding is incorrect.")
+        return end - pad_len
+
+    def _decrypt_joined(self, datas):
+        joined = datas[0] if len(datas) == 1 else b''.join(datas)
+        prev = b''.join([self._iv + d[:-AES.block_size] for d in datas])
+        n = len(joined)
+        return (int.from_bytes(self._ecb.decrypt(joined), 'big') ^ int.from_bytes(prev, 'big')).to_bytes(n, 'big')
+
+    def decrypt_bytes(self, cipher_text):
+        # Base64 str/bytes -> 평문 bytes
+        data = b64decode(cipher_text)
+        plain = self._decrypt_joined([data])
+        return plain[:self._unpad_range(plain, 0, len(plain))]
+
+    def decrypt(self, cipher_text):
+        return self.decrypt_bytes(cipher_text).decode('utf-8')
+
+    def decrypt_many(self, cipher_texts):
+        # 여러 건을 한 번에 복호화해서 평문 str 리스트로 반환
+        if not cipher_texts:
+            return []
+        datas = [b64decode(c) for c in cipher_texts]
+        plain = self._decrypt_joined(datas)
+        result = []
+        pos = 0
+        for data in datas:
+            end = pos + len(data)
+            result.append(plain[pos:self._unpad_range(plain, pos, end)].decode('utf-8'))
+            pos = end
+        return result
+
+
 if __name__ == "__main__":
     with open("./config.yaml", encoding='UTF-8') as f:
         cfg = yaml.load(f, Loader=yaml.FullLoader)